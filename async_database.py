@@ -0,0 +1,69 @@
+"""
+Асинхронный фасад над хранилищем (Database или другой реализацией Storage).
+
+Повторяет API хранилища в виде корутин: каждый вызов выполняется в
+выделенном пуле потоков, размер которого совпадает с пулом соединений,
+поэтому sqlite никогда не блокирует event loop бота.
+"""
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from storage import Storage
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDatabase:
+    """Корутинная обёртка над Database: await db.get_all_tasks() и т.д."""
+
+    def __init__(self, db: Storage, max_workers: Optional[int] = None):
+        self.sync = db
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or db.concurrency,
+            thread_name_prefix="db",
+        )
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Выполнить произвольную синхронную функцию в пуле потоков БД"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+
+    def now(self):
+        """Текущее время домохозяйства — без обращения к БД, поэтому синхронно"""
+        return self.sync.now()
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.sync, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        write_op = getattr(attr, "write_op", None)
+        if write_op is not None and getattr(self.sync, "write_queue", None):
+            # Мутация через очередь группового коммита: ждём её Future,
+            # не занимая поток пула на время ожидания COMMIT
+            @functools.wraps(attr)
+            async def method(*args, **kwargs):
+                future = self.sync.submit_write(write_op, *args, **kwargs)
+                try:
+                    return await asyncio.wrap_future(future)
+                except Exception as e:
+                    return attr.write_error(e)
+        else:
+            @functools.wraps(attr)
+            async def method(*args, **kwargs):
+                return await self.run(attr, *args, **kwargs)
+
+        # Кэшируем обёртку, чтобы __getattr__ не вызывался повторно
+        setattr(self, name, method)
+        return method
+
+    async def close(self) -> None:
+        """Дождаться текущих запросов и закрыть соединения"""
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+        self.sync.close()
@@ -0,0 +1,124 @@
+"""
+Резервные копии базы данных через sqlite3 backup API.
+
+Копировать файл household.db работающего бота нельзя: в WAL-режиме часть
+данных лежит в -wal, а запись может идти посреди копирования. Здесь копия
+снимается соединением-читателем пула внутри транзакции чтения: в WAL
+писатели при этом не блокируются, а копия соответствует одному
+согласованному снимку и не перезапускается от их изменений.
+
+Страницы копируются порциями по pages_per_step с паузой step_sleep между
+порциями. Готовая копия проверяется PRAGMA integrity_check и только после
+этого получает окончательное имя; старые копии сверх keep удаляются.
+Длительность, размер и ошибки записываются в metrics.
+"""
+
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+from database import Database
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+BACKUP_PREFIX = "household-"
+BACKUP_SUFFIX = ".db"
+
+
+def list_backups(directory: str) -> List[str]:
+    """Пути готовых копий в каталоге, от старых к новым"""
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(
+        name for name in os.listdir(directory)
+        if name.startswith(BACKUP_PREFIX) and name.endswith(BACKUP_SUFFIX)
+    )
+    return [os.path.join(directory, name) for name in names]
+
+
+def rotate_backups(directory: str, keep: int) -> List[str]:
+    """Удалить копии сверх keep самых новых; возвращает удалённые пути"""
+    backups = list_backups(directory)
+    removed = backups[:max(0, len(backups) - keep)]
+    for path in removed:
+        os.remove(path)
+    return removed
+
+
+def _integrity_check(path: str) -> str:
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("PRAGMA integrity_check").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def create_backup(
+    db: Database,
+    directory: str,
+    keep: int = 7,
+    pages_per_step: int = 256,
+    step_sleep: float = 0.005,
+) -> Dict[str, Any]:
+    """
+    Снять копию БД в directory и проверить её. Возвращает
+    {'path', 'size_bytes', 'duration_ms', 'steps', 'removed'}; при ошибке
+    проверки или копирования бросает исключение, недописанная копия удаляется.
+    """
+    name = f"{BACKUP_PREFIX}{datetime.now().strftime('%Y%m%d-%H%M%S')}{BACKUP_SUFFIX}"
+    path = os.path.join(directory, name)
+    partial = path + ".part"
+
+    steps = 0
+
+    def pause(status: int, remaining: int, total: int) -> None:
+        # sleep= у backup() срабатывает только на SQLITE_BUSY; пауза между
+        # порциями — здесь
+        nonlocal steps
+        steps += 1
+        if remaining:
+            time.sleep(step_sleep)
+
+    started = time.monotonic()
+    try:
+        os.makedirs(directory, exist_ok=True)
+        target = sqlite3.connect(partial)
+        try:
+            with db.pool.reader() as conn:
+                # Транзакция чтения фиксирует снимок на всё время копирования
+                conn.execute("BEGIN")
+                try:
+                    conn.execute("SELECT 1 FROM sqlite_master LIMIT 1")
+                    conn.backup(target, pages=pages_per_step, progress=pause)
+                finally:
+                    conn.execute("COMMIT")
+        finally:
+            target.close()
+
+        result = _integrity_check(partial)
+        if result != "ok":
+            raise sqlite3.DatabaseError(f"integrity_check failed: {result}")
+        os.replace(partial, path)
+
+    except Exception:
+        metrics.increment("backup.failures")
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+
+    duration_ms = (time.monotonic() - started) * 1000
+    size_bytes = os.path.getsize(path)
+    metrics.observe("backup.duration_ms", duration_ms)
+    metrics.observe("backup.size_bytes", size_bytes)
+
+    return {
+        'path': path,
+        'size_bytes': size_bytes,
+        'duration_ms': duration_ms,
+        'steps': steps,
+        'removed': rotate_backups(directory, keep),
+    }
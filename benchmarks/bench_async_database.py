@@ -0,0 +1,90 @@
+"""
+Проверка отзывчивости event loop при заблокированной записи.
+
+Стороннее соединение держит RESERVED-блокировку (BEGIN IMMEDIATE), поэтому
+запись через Database ждёт busy_timeout. Параллельно корутина-"пульс"
+каждые 10 мс замеряет задержку event loop. Через AsyncDatabase задержка
+остаётся в пределах миллисекунд; при прямом синхронном вызове loop
+замирает на всё время ожидания блокировки.
+
+Запуск: python benchmarks/bench_async_database.py
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from async_database import AsyncDatabase  # noqa: E402
+from database import Database  # noqa: E402
+from migrations import DEFAULT_HOUSEHOLD_ID  # noqa: E402
+
+LOCK_SECONDS = 0.5
+TICK = 0.01
+
+
+async def heartbeat(stop: asyncio.Event, lags: list) -> None:
+    """Замеряет, насколько позже ожидаемого просыпается корутина"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+def hold_write_lock(db_path: str, started: threading.Event) -> None:
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute("BEGIN IMMEDIATE")
+    started.set()
+    time.sleep(LOCK_SECONDS)
+    conn.execute("ROLLBACK")
+    conn.close()
+
+
+async def run_case(label: str, db_path: str, write) -> None:
+    started = threading.Event()
+    locker = threading.Thread(target=hold_write_lock, args=(db_path, started))
+    locker.start()
+    started.wait()
+
+    stop = asyncio.Event()
+    lags: list = []
+    beat = asyncio.create_task(heartbeat(stop, lags))
+    await asyncio.sleep(TICK * 2)
+
+    start = time.perf_counter()
+    await write()
+    write_time = time.perf_counter() - start
+
+    stop.set()
+    await beat
+    locker.join()
+    print(
+        f"{label:<28} запись {write_time * 1000:7.1f} мс, "
+        f"макс. задержка loop {max(lags) * 1000:7.1f} мс"
+    )
+
+
+async def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        sync_db = Database(db_path)
+        adb = AsyncDatabase(sync_db)
+
+        async def blocking_write():
+            sync_db.add_shopping_item(DEFAULT_HOUSEHOLD_ID, "Молоко")
+
+        async def async_write():
+            await adb.add_shopping_item(DEFAULT_HOUSEHOLD_ID, "Хлеб")
+
+        await run_case("Database (синхронно)", db_path, blocking_write)
+        await run_case("AsyncDatabase", db_path, async_write)
+        await adb.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
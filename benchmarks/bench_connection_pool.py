@@ -0,0 +1,65 @@
+"""
+Бенчмарк: задержка одного вызова Database до и после пула соединений.
+
+"До" — соединение открывается и закрывается на каждый вызов (как было раньше),
+"после" — те же запросы через ConnectionPool.
+
+Запуск: python benchmarks/bench_connection_pool.py [итераций]
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from migrations import DEFAULT_HOUSEHOLD_ID  # noqa: E402
+
+
+def per_call_connect(db_path: str):
+    """Старый путь: connect -> SELECT -> close на каждый вызов"""
+    def get_all_tasks():
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            "SELECT id, name, interval_days, last_done, last_done_by, created_at "
+            "FROM tasks ORDER BY name"
+        ).fetchall()
+        conn.close()
+
+    def get_user_name():
+        conn = sqlite3.connect(db_path)
+        conn.execute("SELECT first_name FROM users WHERE chat_id = ?", (1,)).fetchone()
+        conn.close()
+
+    return get_all_tasks, get_user_name
+
+
+def measure(label: str, func, iterations: int) -> None:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed / iterations * 1e6:8.1f} мкс/вызов")
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        db = Database(db_path)
+
+        old_tasks, old_user = per_call_connect(db_path)
+        measure("get_all_tasks (connect на вызов)", old_tasks, iterations)
+        measure("get_all_tasks (пул)", lambda: db.get_all_tasks(DEFAULT_HOUSEHOLD_ID), iterations)
+        measure("get_user_name (connect на вызов)", old_user, iterations)
+        measure("get_user_name (пул)", lambda: db.get_user_name(1), iterations)
+
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
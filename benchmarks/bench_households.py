@@ -0,0 +1,73 @@
+"""
+Бенчмарк запросов одного домохозяйства при росте числа домохозяйств.
+
+Время get_all_tasks, get_shopping_items и get_overdue_tasks для одного
+домохозяйства должно оставаться примерно постоянным: составные индексы
+начинаются с household_id, поэтому запрос читает только строки этого
+домохозяйства, а не всю таблицу.
+
+Запуск: python benchmarks/bench_households.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+
+ITERATIONS = 500
+TASKS_PER_HOUSEHOLD = 20
+ITEMS_PER_HOUSEHOLD = 30
+
+
+def measure(func) -> float:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func()
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+
+def main() -> None:
+    for households in (10, 1_000, 10_000):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Database(os.path.join(tmp, "bench.db"))
+            with db.pool.writer() as conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO households (id, name, invite_code) VALUES (?, ?, ?)",
+                    ((h, f"Дом {h}", f"code{h}") for h in range(1, households + 1))
+                )
+                conn.executemany(
+                    "INSERT INTO tasks (household_id, name, interval_days) VALUES (?, ?, ?)",
+                    (
+                        (h, f"Задача {i}", 7)
+                        for h in range(1, households + 1)
+                        for i in range(TASKS_PER_HOUSEHOLD)
+                    )
+                )
+                conn.executemany(
+                    "INSERT INTO shopping_items (household_id, item_text, item_key, is_checked) "
+                    "VALUES (?, ?, ?, ?)",
+                    (
+                        (h, f"Пункт {i}", f"пункт {i}", i % 3 == 0)
+                        for h in range(1, households + 1)
+                        for i in range(ITEMS_PER_HOUSEHOLD)
+                    )
+                )
+                conn.execute("ANALYZE")
+
+            household_id = households // 2 + 1
+            tasks = measure(lambda: db.get_all_tasks(household_id))
+            items = measure(lambda: db.get_shopping_items(household_id))
+            overdue = measure(lambda: db.get_overdue_tasks(household_id))
+            print(
+                f"{households:>6} домохозяйств: get_all_tasks {tasks:6.1f} мкс, "
+                f"get_shopping_items {items:6.1f} мкс, get_overdue_tasks {overdue:6.1f} мкс"
+            )
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
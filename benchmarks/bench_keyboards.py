@@ -0,0 +1,67 @@
+"""
+Бенчмарк построения и сериализации клавиатур.
+
+"До" — новая разметка PTB на каждый вызов: кнопки создаются заново и
+to_dict() обходит их целиком. "После" — keyboards: статические клавиатуры
+строятся один раз вместе с готовым dict/JSON, у динамических ряды кнопок
+берутся из кэша по id пункта и его состоянию. В обоих случаях замеряется
+путь до JSON-строки параметра reply_markup, как её готовит PTB.
+
+Запуск: python benchmarks/bench_keyboards.py
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup  # noqa: E402
+from telegram.request._requestparameter import RequestParameter  # noqa: E402
+
+import keyboards  # noqa: E402
+from models import ShoppingItem  # noqa: E402
+
+ITERATIONS = 2000
+
+
+def uncached(keyboard):
+    """Та же клавиатура обычными объектами PTB, собранная заново"""
+    rows = [
+        [InlineKeyboardButton(button.text, callback_data=button.callback_data) for button in row]
+        for row in keyboard.inline_keyboard
+    ]
+    return InlineKeyboardMarkup(rows)
+
+
+def serialize(markup) -> str:
+    return RequestParameter.from_input("reply_markup", markup).json_value
+
+
+def measure(func) -> float:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func()
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+
+def main() -> None:
+    management = keyboards.get_management_keyboard()
+    assert serialize(uncached(management)) == serialize(management)
+    before = measure(lambda: serialize(uncached(management)))
+    after = measure(lambda: serialize(keyboards.get_management_keyboard()))
+    print(f"управление задачами: заново {before:7.1f} мкс, из кэша {after:7.1f} мкс")
+
+    for size in (5, 30, 100):
+        items = [ShoppingItem(i, f"Товар {i}", i % 3 == 0, datetime.now()) for i in range(size)]
+        stats = {'total': size, 'checked': sum(item.is_checked for item in items)}
+        markup = keyboards.get_shopping_items_keyboard(items, stats)
+        assert serialize(uncached(markup)) == serialize(markup)
+        before = measure(lambda: serialize(uncached(markup)))
+        after = measure(lambda: serialize(keyboards.get_shopping_items_keyboard(items, stats)))
+        print(f"{size:>4} покупок: заново {before:7.1f} мкс, ряды из кэша {after:7.1f} мкс")
+
+
+if __name__ == "__main__":
+    main()
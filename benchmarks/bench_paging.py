@@ -0,0 +1,87 @@
+"""
+Бенчмарк выборки для одного рендера списка покупок и задач.
+
+"До" — весь список (get_shopping_items / get_all_tasks + подсчёт
+просроченных по всем задачам), "после" — одна страница по курсору
+(get_shopping_page / get_tasks_page + count_overdue_tasks). Страница берётся
+из середины списка, чтобы замерить именно seek по ключу, а не начало
+индекса. Время "после" не должно расти вместе с размером списка.
+
+Запуск: python benchmarks/bench_paging.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from migrations import DEFAULT_HOUSEHOLD_ID  # noqa: E402
+from task_status import evaluate_statuses  # noqa: E402
+
+HID = DEFAULT_HOUSEHOLD_ID
+
+
+def fill(db: Database, size: int) -> None:
+    with db.pool.writer() as conn:
+        conn.execute("DELETE FROM tasks")
+        conn.executemany(
+            "INSERT INTO shopping_items (household_id, item_text, item_key, is_checked, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                (HID, f"Пункт {i}", f"пункт {i}", i % 3 == 0, f"2024-01-{i % 28 + 1:02d} 10:{i % 60:02d}:00")
+                for i in range(size)
+            )
+        )
+        conn.executemany(
+            "INSERT INTO tasks (household_id, name, interval_days, last_done) VALUES (?, ?, ?, ?)",
+            ((HID, f"Задача {i:06d}", i % 14 + 1, "2024-01-01T10:00:00") for i in range(size))
+        )
+
+
+def middle_cursors(db: Database, size: int):
+    """Курсоры страниц из середины списков"""
+    shopping = db.get_shopping_items(HID)[size // 2]
+    tasks = db.get_all_tasks(HID)[size // 2]
+    return (int(shopping.is_checked), shopping.created_at, shopping.id), tasks.id
+
+
+def measure(func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e3
+
+
+def main() -> None:
+    for size, iterations in ((100, 200), (10_000, 20), (100_000, 3)):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Database(os.path.join(tmp, "bench.db"))
+            fill(db, size)
+            shopping_cursor, task_cursor = middle_cursors(db, size)
+
+            def tasks_full():
+                tasks = db.get_all_tasks(HID)
+                return evaluate_statuses(tasks, db.now()).overdue_count()
+
+            def tasks_page():
+                page = db.get_tasks_page(HID, after=task_cursor)
+                evaluate_statuses(page.items, db.now())
+                return db.count_overdue_tasks(HID)
+
+            assert tasks_full() == tasks_page()
+            shopping_before = measure(lambda: db.get_shopping_items(HID), iterations)
+            shopping_after = measure(lambda: db.get_shopping_page(HID, after=shopping_cursor), iterations)
+            tasks_before = measure(tasks_full, iterations)
+            tasks_after = measure(tasks_page, iterations)
+            print(
+                f"{size:>7} записей: покупки {shopping_before:9.3f} → {shopping_after:6.3f} мс, "
+                f"задачи {tasks_before:9.3f} → {tasks_after:6.3f} мс"
+            )
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
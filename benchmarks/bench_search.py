@@ -0,0 +1,64 @@
+"""
+Бенчмарк поиска по списку покупок.
+
+"До" — все совпадения LOWER(item_text) LIKE '%запрос%' полным перебором
+таблицы (так раньше работал find_task_by_name), "после" — search_shopping_items:
+кандидаты из триграммного индекса FTS5 и ранжирование в Python.
+
+Запуск: python benchmarks/bench_search.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from migrations import DEFAULT_HOUSEHOLD_ID  # noqa: E402
+
+ITERATIONS = 50
+WORDS = ["молоко", "хлеб", "сыр", "яблоки", "гречка", "кофе", "чай", "масло"]
+QUERIES = ["молоко 123", "гречк", "ябл 4999"]
+
+
+def like_scan(db: Database, query: str):
+    with db.pool.reader() as conn:
+        return conn.execute(
+            "SELECT id, item_text FROM shopping_items WHERE LOWER(item_text) LIKE LOWER(?)",
+            (f"%{query}%",)
+        ).fetchall()
+
+
+def measure(func) -> float:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func()
+    return (time.perf_counter() - start) / ITERATIONS * 1e3
+
+
+def main() -> None:
+    for size in (1_000, 100_000):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Database(os.path.join(tmp, "bench.db"))
+            with db.pool.writer() as conn:
+                conn.executemany(
+                    "INSERT INTO shopping_items (item_text, item_key, is_checked) VALUES (?, ?, 1)",
+                    (
+                        (f"{WORDS[i % len(WORDS)]} {i}", f"{WORDS[i % len(WORDS)]} {i}")
+                        for i in range(size)
+                    )
+                )
+
+            print(f"{size} пунктов (FTS5: {db.search_enabled})")
+            for query in QUERIES:
+                before = measure(lambda: like_scan(db, query))
+                after = measure(lambda: db.search_shopping_items(DEFAULT_HOUSEHOLD_ID, query, limit=5))
+                top = [item.item_text for item in db.search_shopping_items(DEFAULT_HOUSEHOLD_ID, query, limit=3)]
+                print(f"  {query!r:14} LIKE {before:7.2f} мс, поиск {after:7.2f} мс, топ: {top}")
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Бенчмарк get_shopping_item_count на больших списках покупок.
+
+"До" — два COUNT(*) по shopping_items (как было раньше),
+"после" — чтение одной строки shopping_counters, которую ведут триггеры.
+В конце сверяет счётчики с пересчётом через check_shopping_counters.
+
+Запуск: python benchmarks/bench_shopping_counters.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from migrations import DEFAULT_HOUSEHOLD_ID  # noqa: E402
+
+ITERATIONS = 200
+
+
+def two_counts(db: Database):
+    with db.pool.reader() as conn:
+        conn.execute('SELECT COUNT(*) FROM shopping_items WHERE is_checked = 0').fetchone()
+        conn.execute('SELECT COUNT(*) FROM shopping_items WHERE is_checked = 1').fetchone()
+
+
+def measure(func) -> float:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func()
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+
+def main() -> None:
+    for size in (100, 10_000, 200_000):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Database(os.path.join(tmp, "bench.db"))
+            with db.pool.writer() as conn:
+                conn.executemany(
+                    "INSERT INTO shopping_items (item_text, item_key, is_checked) VALUES (?, ?, ?)",
+                    ((f"Пункт {i}", f"пункт {i}", i % 3 == 0) for i in range(size))
+                )
+
+            before = measure(lambda: two_counts(db))
+            after = measure(lambda: db.get_shopping_item_count(DEFAULT_HOUSEHOLD_ID))
+            check = db.check_shopping_counters(repair=False)
+            print(
+                f"{size:>8} пунктов: два COUNT(*) {before:9.1f} мкс, "
+                f"счётчики {after:6.1f} мкс, согласованы: {check['consistent']}"
+            )
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Бенчмарк статусов задач всего домохозяйства.
+
+"До" — цикл по объектам Task: task.status(now) для каждой задачи, затем
+подсчёт просроченных и отбор срочных. "После" — task_status: колонки
+собираются из задач (TaskColumns.from_tasks) и считаются одним проходом
+(NumPy, если установлен, иначе array); отдельно — только проход по уже
+собранным колонкам. Перед замером проверяется, что статусы совпадают с
+Task.status(now).
+
+Запуск: python benchmarks/bench_status_engine.py
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Task  # noqa: E402
+from task_status import BACKEND, TaskColumns, evaluate_statuses  # noqa: E402
+
+TZ = ZoneInfo("Europe/Moscow")
+
+
+def make_tasks(size: int, now) -> list:
+    rng = random.Random(size)
+    tasks = []
+    for i in range(size):
+        last_done = None
+        if rng.random() > 0.1:
+            last_done = now - timedelta(seconds=rng.randrange(0, 20 * 86400), microseconds=rng.randrange(10 ** 6))
+        tasks.append(Task(id=i + 1, name=f"Задача {i}", interval_days=rng.randrange(1, 15), last_done=last_done))
+    return tasks
+
+
+def per_object(tasks, now):
+    statuses = [task.status(now) for task in tasks]
+    overdue = sum(1 for status in statuses if status.is_overdue)
+    urgent = [i for i, status in enumerate(statuses) if status.is_overdue or status.days_until_due <= 2]
+    return overdue, urgent
+
+
+def columnar(tasks, now):
+    statuses = evaluate_statuses(tasks, now)
+    return statuses.overdue_count(), statuses.urgent_indices()
+
+
+def measure(func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e3
+
+
+def main() -> None:
+    print(f"Бэкенд task_status: {BACKEND}")
+    for size, iterations in ((10, 2000), (1000, 200), (100_000, 5)):
+        now = datetime.now(TZ)
+        tasks = make_tasks(size, now)
+
+        statuses = evaluate_statuses(tasks, now)
+        assert all(statuses[i] == task.status(now) for i, task in enumerate(tasks))
+        assert per_object(tasks, now) == columnar(tasks, now)
+
+        columns = TaskColumns.from_tasks(tasks, TZ)
+        before = measure(lambda: per_object(tasks, now), iterations)
+        after = measure(lambda: columnar(tasks, now), iterations)
+        evaluate_only = measure(lambda: columns.evaluate(now).overdue_count(), iterations)
+        print(
+            f"{size:>7} задач: по объектам {before:9.3f} мс, колонки {after:9.3f} мс, "
+            f"только проход {evaluate_only:9.3f} мс"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Сравнение скорости реализаций Storage.
+
+Одна и та же нагрузка — рендер меню, отметки выполнения, покупки —
+измеряется на Database (временный файл SQLite) и на MemoryStorage; разница
+показывает, сколько времени уходит на сам SQLite. Соответствие реализаций
+протоколу проверяют тесты tests/test_storage.py.
+
+Запуск: python benchmarks/bench_storage.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from memory_storage import MemoryStorage  # noqa: E402
+from migrations import DEFAULT_HOUSEHOLD_ID  # noqa: E402
+from storage import Storage  # noqa: E402
+
+ITERATIONS = 2000
+OWNER = 1001
+
+
+def workload(storage: Storage) -> None:
+    """Типичная смесь запросов бота: меню задач, отметка, список покупок"""
+    home = DEFAULT_HOUSEHOLD_ID
+    tasks = storage.get_all_tasks(home)
+    storage.get_overdue_tasks(home)
+    storage.mark_task_done(home, tasks[0].id, OWNER, "owner", "Анна")
+    storage.add_shopping_item(home, "Сыр")
+    items = storage.get_shopping_items(home)
+    storage.toggle_shopping_item(home, items[0].id)
+    storage.get_shopping_item_count(home)
+    storage.delete_checked_items(home)
+
+
+def measure(storage: Storage) -> float:
+    workload(storage)
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        workload(storage)
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = {
+            "Database": lambda name: Database(os.path.join(tmp, f"{name}.db")),
+            "MemoryStorage": lambda name: MemoryStorage(),
+        }
+
+        for title, make in backends.items():
+            storage = make("workload")
+            elapsed = measure(storage)
+            storage.close()
+            print(f"{title:>14}: {elapsed:7.1f} мкс на итерацию нагрузки")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Бенчмарк get_all_tasks с TaskCache.
+
+"До" — чтение и разбор задач из БД на каждый вызов (Database._load_tasks),
+"после" — get_all_tasks, который после первого промаха отдаёт список из
+кэша, пока задачи домохозяйства не изменятся.
+
+Запуск: python benchmarks/bench_task_cache.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from migrations import DEFAULT_HOUSEHOLD_ID  # noqa: E402
+
+ITERATIONS = 2000
+
+
+def measure(func) -> float:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func()
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+
+def main() -> None:
+    for size in (5, 30, 200):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Database(os.path.join(tmp, "bench.db"))
+            with db.pool.writer() as conn:
+                conn.execute("DELETE FROM tasks")
+                conn.executemany(
+                    "INSERT INTO tasks (household_id, name, interval_days, last_done) VALUES (?, ?, ?, ?)",
+                    (
+                        (DEFAULT_HOUSEHOLD_ID, f"Задача {i}", 7, "2024-01-01T10:00:00")
+                        for i in range(size)
+                    )
+                )
+
+            before = measure(lambda: db._load_tasks(DEFAULT_HOUSEHOLD_ID))
+            after = measure(lambda: db.get_all_tasks(DEFAULT_HOUSEHOLD_ID))
+            print(
+                f"{size:>4} задач: из БД {before:7.1f} мкс, из кэша {after:5.1f} мкс, "
+                f"{db.task_cache.stats()}"
+            )
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Бенчмарк отрисовки списка задач со статусами.
+
+"До" — задачи без имён и format_status(get_user_name): отдельный запрос к
+users на каждую выполненную задачу (N+1), "после" — задачи, загруженные
+одним запросом с JOIN users (Database._load_tasks), и format_status() без
+обращений к БД. Статусы в обоих вариантах считаются на один момент db.now().
+
+Запуск: python benchmarks/bench_task_status.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from migrations import DEFAULT_HOUSEHOLD_ID  # noqa: E402
+from task_status import evaluate_tasks  # noqa: E402
+
+ITERATIONS = 500
+
+
+def user_name_query(db: Database, chat_id: int) -> str:
+    with db.pool.reader() as conn:
+        row = conn.execute('SELECT first_name FROM users WHERE chat_id = ?', (chat_id,)).fetchone()
+    return row[0] if row else "Неизвестный пользователь"
+
+
+def render_n_plus_one(db: Database):
+    with db.pool.reader() as conn:
+        rows = conn.execute(
+            "SELECT id, name, interval_days, last_done, last_done_by, created_at "
+            "FROM tasks WHERE household_id = ? ORDER BY name", (DEFAULT_HOUSEHOLD_ID,)
+        ).fetchall()
+    tasks = [db._row_to_task(row) for row in rows]
+    now = db.now()
+    return [
+        task.format_status(task.status(now), lambda chat_id: user_name_query(db, chat_id))
+        for task in tasks
+    ]
+
+
+def render_joined(db: Database):
+    evaluated = evaluate_tasks(db._load_tasks(DEFAULT_HOUSEHOLD_ID), db.now())
+    return [task.format_status(status) for task, status in evaluated]
+
+
+def measure(func) -> float:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func()
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+
+def main() -> None:
+    for size in (5, 30, 100):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Database(os.path.join(tmp, "bench.db"))
+            with db.pool.writer() as conn:
+                conn.execute("DELETE FROM tasks")
+                conn.executemany(
+                    "INSERT INTO users (chat_id, username, first_name) VALUES (?, ?, ?)",
+                    [(uid, f"user{uid}", f"Пользователь {uid}") for uid in range(1, 5)]
+                )
+                conn.executemany(
+                    "INSERT INTO tasks (household_id, name, interval_days, last_done, last_done_by) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (
+                        (DEFAULT_HOUSEHOLD_ID, f"Задача {i}", 7, "2024-01-01T10:00:00", i % 4 + 1)
+                        for i in range(size)
+                    )
+                )
+
+            assert render_n_plus_one(db) == render_joined(db)
+            before = measure(lambda: render_n_plus_one(db))
+            after = measure(lambda: render_joined(db))
+            print(f"{size:>4} задач: N+1 {before:8.1f} мкс, JOIN {after:7.1f} мкс")
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
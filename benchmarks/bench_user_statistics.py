@@ -0,0 +1,76 @@
+"""
+Бенчмарк get_user_statistics на годе истории выполнений.
+
+Заполняет task_history за 365 дней (по умолчанию ~100 тыс. записей) и
+замеряет статистику за неделю, месяц и год. Печатает план запроса, чтобы
+было видно использование индекса (done_at, done_by, task_id).
+
+Запуск: python benchmarks/bench_user_statistics.py [записей_в_день]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from migrations import DEFAULT_HOUSEHOLD_ID  # noqa: E402
+
+ITERATIONS = 20
+
+
+def main() -> None:
+    per_day = int(sys.argv[1]) if len(sys.argv) > 1 else 275
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        now = datetime.now()
+
+        with db.pool.writer() as conn:
+            conn.executemany(
+                "INSERT INTO users (chat_id, username, first_name) VALUES (?, ?, ?)",
+                [(uid, f"user{uid}", f"Пользователь {uid}") for uid in range(1, 6)]
+            )
+            conn.executemany(
+                "INSERT INTO tasks (name, interval_days) VALUES (?, ?)",
+                [(f"Задача {i}", 7) for i in range(30)]
+            )
+            conn.executemany(
+                "INSERT INTO task_history (task_id, done_by, done_at) VALUES (?, ?, ?)",
+                (
+                    (rng.randint(1, 35), rng.randint(1, 5),
+                     (now - timedelta(days=day, seconds=rng.randint(0, 86399))).isoformat())
+                    for day in range(365)
+                    for _ in range(per_day)
+                )
+            )
+            conn.execute("ANALYZE")
+
+        with db.pool.reader() as conn:
+            total = conn.execute("SELECT COUNT(*) FROM task_history").fetchone()[0]
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT done_by, task_id, COUNT(*) FROM task_history "
+                "WHERE household_id = ? AND done_at >= ? GROUP BY done_by, task_id",
+                (DEFAULT_HOUSEHOLD_ID, now.isoformat())
+            ).fetchall()
+        print(f"Записей истории: {total}")
+        for row in plan:
+            print(f"  план: {row[-1]}")
+
+        for days in (7, 30, 365):
+            start = time.perf_counter()
+            for _ in range(ITERATIONS):
+                stats = db.get_user_statistics(DEFAULT_HOUSEHOLD_ID, days=days)
+            elapsed = (time.perf_counter() - start) / ITERATIONS * 1000
+            print(f"get_user_statistics(days={days:<3}) {elapsed:7.2f} мс, выполнено: {stats['total_tasks']}")
+
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
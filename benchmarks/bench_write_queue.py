@@ -0,0 +1,59 @@
+"""
+Бенчмарк пропускной способности мутаций с групповым коммитом и без него.
+
+Много потоков одновременно добавляют пункты в список покупок и
+переключают их отметку — как несколько обработчиков, ожидающих
+AsyncDatabase. Сравниваются отдельная транзакция на каждую мутацию и
+очередь WriteQueue, объединяющая их в общие транзакции.
+
+Запуск: python benchmarks/bench_write_queue.py [операций] [потоков]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from migrations import DEFAULT_HOUSEHOLD_ID  # noqa: E402
+
+# FULL делает стоимость каждого COMMIT (fsync) заметной, как на реальном диске
+PRAGMAS = {"synchronous": "FULL"}
+
+
+def run(label: str, operations: int, threads: int, write_queue) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"), pragmas=PRAGMAS, write_queue=write_queue)
+
+        def work(i: int) -> None:
+            if i % 2 == 0:
+                db.add_shopping_item(DEFAULT_HOUSEHOLD_ID, f"Пункт {i}")
+            else:
+                db.toggle_shopping_item(DEFAULT_HOUSEHOLD_ID, i // 2 + 1)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(work, range(operations)))
+        elapsed = time.perf_counter() - start
+
+        batches = ""
+        if db.write_queue:
+            wq = db.write_queue
+            batches = f", транзакций: {wq.batches} (в среднем {wq.operations / max(wq.batches, 1):.1f} оп.)"
+        print(f"{label:<26} {operations / elapsed:9.0f} оп/с{batches}")
+        db.close()
+
+
+def main() -> None:
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+
+    run("без группировки", operations, threads, None)
+    run("групповой коммит", operations, threads, {"flush_interval_ms": 2, "max_batch": 128})
+
+
+if __name__ == "__main__":
+    main()
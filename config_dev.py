@@ -9,5 +9,71 @@ DATABASE_PATH = "household_dev.db"
 LOG_LEVEL = "INFO"
 DB_CONFIG = {
     "path": "household_dev.db",
-    "timeout": 30
+    "timeout": 30,
+    # Пул соединений: 1 писатель + (pool_size - 1) читателей
+    "pool_size": 4,
+    "pragmas": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -8000,
+        "mmap_size": 67108864,
+        "busy_timeout": 30000,
+    },
+    # Групповой коммит мутаций: запись фиксируется не позже чем через
+    # flush_interval_ms после постановки в очередь; обработчик получает ответ
+    # только после COMMIT. Долговечность COMMIT задаёт pragmas["synchronous"].
+    "write_queue": {
+        "enabled": True,
+        "flush_interval_ms": 2,
+        "max_batch": 128,
+    },
+    # Время жизни кэша имён пользователей (get_user_name), секунды
+    "user_cache_ttl": 300,
+    # Время жизни кэша списков задач, секунды: за это время бот увидит
+    # изменения, сделанные другим процессом (импорт через transfer.py)
+    "task_cache_ttl": 60,
+    # Замеры каждого оператора SQL по методам Database (команда /dbstats);
+    # операторы дольше slow_query_ms пишутся в лог с EXPLAIN QUERY PLAN
+    "profiling": {
+        "enabled": True,
+        "slow_query_ms": 50,
+        "sample_size": 1000,
+    },
+}
+# Очистка task_history фоновой задачей: порциями по chunk_size строк,
+# не дольше time_budget_ms за запуск
+HISTORY_RETENTION = {
+    "retention_days": 90,
+    "interval_minutes": 60,
+    "chunk_size": 500,
+    "time_budget_ms": 200,
+}
+# Резервные копии БД (sqlite3 backup API): раз в сутки в time, копируется
+# по pages_per_step страниц с паузой step_sleep_ms, хранятся keep последних
+BACKUP_CONFIG = {
+    "enabled": True,
+    "dir": "backups",
+    "time": time(4, 0, 0),
+    "keep": 7,
+    "pages_per_step": 256,
+    "step_sleep_ms": 5,
+}
+# Обслуживание файла БД (db_maintenance.py): контрольные точки WAL,
+# PRAGMA optimize и incremental_vacuum — ночью, не дольше time_budget_ms.
+# Первый запуск на старой базе один раз делает полный VACUUM, чтобы
+# включить auto_vacuum = INCREMENTAL.
+DB_MAINTENANCE = {
+    "enabled": True,
+    "time": time(4, 30, 0),
+    "time_budget_ms": 2000,
+    "vacuum_pages_per_step": 256,
+    "analysis_limit": 400,
+}
+# Кто может создавать домохозяйства командой /newhome. По умолчанию — только
+# ADMIN_IDS и allowed_ids; "open": True разрешает это любому пользователю
+# Telegram. Всем, кроме ADMIN_IDS, — не чаще одного раза за cooldown_minutes.
+HOUSEHOLD_CREATION = {
+    "open": False,
+    "allowed_ids": [],
+    "cooldown_minutes": 1440,
 }
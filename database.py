@@ -1,586 +1,1060 @@
 import sqlite3
 import logging
-from datetime import datetime, timedelta
+import functools
+import time
+from concurrent.futures import Future
+from datetime import datetime, timedelta, tzinfo
 from typing import List, Optional, Tuple, Dict, Any
-from models import Task, ShoppingItem
+from zoneinfo import ZoneInfo
+from models import Page, ShoppingCursor, Task, TaskCursor, ShoppingItem, normalize_text, rank_by_match
+from db_pool import ConnectionPool
+from migrations import DEFAULT_TASKS, migrate, new_invite_code
+from write_queue import WriteQueue
+from task_cache import TaskCache
+from user_directory import UserDirectory
+from query_profiler import QueryProfiler, instrument_methods
 
 logger = logging.getLogger(__name__)
 
+# Поиск: сколько кандидатов брать из индекса на один результат
+SEARCH_CANDIDATES_PER_RESULT = 10
+SEARCH_MIN_CANDIDATES = 50
+
+# Размер страницы списков по умолчанию (get_tasks_page / get_shopping_page)
+PAGE_SIZE = 20
+
+# Задачи вместе с именем последнего исполнителя — одним запросом, без
+# отдельного get_user_name на каждую строку
+TASK_SELECT = '''
+    SELECT t.id, t.name, t.interval_days, t.last_done, t.last_done_by, t.created_at, u.first_name
+    FROM tasks t
+    LEFT JOIN users u ON u.chat_id = t.last_done_by
+'''
+
+# Триграммные индексы (миграция 7) для таблиц с поиском
+FTS_TABLES = {"tasks": "tasks_fts", "shopping_items": "shopping_fts"}
+
+
+def _fts_phrase(text: str) -> str:
+    """Строка как фраза FTS5: в триграммном индексе это поиск подстроки"""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _fts_stages(key: str) -> List[str]:
+    """
+    Выражения FTS5 MATCH от точных к нечётким: подстрока целиком, все слова
+    запроса (AND), любая триграмма (OR) — кандидаты для опечаток.
+    """
+    stages = [_fts_phrase(key)]
+    words = [word for word in key.split() if len(word) >= 3]
+    if len(words) > 1:
+        stages.append(" AND ".join(_fts_phrase(word) for word in words))
+    trigrams = dict.fromkeys(key[i:i + 3] for i in range(len(key) - 2))
+    stages.append(" OR ".join(_fts_phrase(t) for t in trigrams))
+    return stages
+
+
+def queued_write(default: Any = None, error_message: Optional[str] = None):
+    """
+    Декоратор мутаций, которые идут через очередь группового коммита.
+
+    Декорируемая функция принимает (self, conn, ...) и выполняется внутри
+    общей транзакции. Если задан error_message, ошибка логируется и
+    возвращается default (как в остальных методах Database), иначе
+    исключение пробрасывается вызывающему.
+    """
+    def decorator(op):
+        def handle_error(e: Exception):
+            if error_message is None:
+                raise e
+            logger.error(f"{error_message}: {e}")
+            return default
+
+        @functools.wraps(op)
+        def method(self, *args, **kwargs):
+            try:
+                return self.submit_write(op, *args, **kwargs).result()
+            except Exception as e:
+                return handle_error(e)
+
+        # Нужны AsyncDatabase, чтобы ждать Future без занятого потока
+        method.write_op = op
+        method.write_error = handle_error
+        return method
+    return decorator
+
+
+@instrument_methods(skip=("now", "close", "submit_write"))
 class Database:
-    def __init__(self, db_path="household_dev.db"):
+    def __init__(
+        self,
+        db_path="household_dev.db",
+        timeout: float = 30,
+        pool_size: int = 4,
+        pragmas: Optional[Dict[str, Any]] = None,
+        write_queue: Optional[Dict[str, Any]] = None,
+        timezone: Optional[str] = None,
+        user_cache_ttl: float = 300,
+        task_cache_ttl: float = 60,
+        profiling: Optional[Dict[str, Any]] = None,
+    ):
         self.db_path = db_path
-        self.init_db()
-        self.create_shopping_table()
-    
-    def init_db(self):
-        """Инициализация таблиц"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Таблица пользователей
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                chat_id INTEGER PRIMARY KEY,
-                username TEXT,
-                first_name TEXT,
-                joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Таблица задач
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS tasks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                interval_days INTEGER NOT NULL,
-                last_done TIMESTAMP,
-                last_done_by INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (last_done_by) REFERENCES users (chat_id)
-            )
-        ''')
-        
-        # Таблица для хранения истории выполнений
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS task_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                task_id INTEGER,
-                done_by INTEGER,
-                done_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (task_id) REFERENCES tasks (id),
-                FOREIGN KEY (done_by) REFERENCES users (chat_id)
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_task_history_date 
-            ON task_history(done_at)
-        ''')
-        
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_task_history_task 
-            ON task_history(task_id)
-        ''')
-        
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_tasks_interval 
-            ON tasks(interval_days)
-        ''')
-        conn.commit()
-        conn.close()
-        
-        # Добавляем стандартные задачи при первом запуске
-        self.add_default_tasks()
-    
-    def create_shopping_table(self):
-        """Создание таблицы для списка покупок"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS shopping_items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                item_text TEXT NOT NULL,
-                is_checked BOOLEAN DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        # Замеры операторов и методов (None или enabled=False — без накладных расходов)
+        self.profiler: Optional[QueryProfiler] = None
+        if profiling and profiling.get("enabled", True):
+            self.profiler = QueryProfiler(
+                slow_query_ms=profiling.get("slow_query_ms", 50),
+                sample_size=profiling.get("sample_size", 1000),
             )
-        ''')
-        
-        conn.commit()
-        conn.close()
-    
-    def add_default_tasks(self):
-        """Добавление стандартных задач при первом запуске"""
-        default_tasks = [
-            ("Помыть полы", 7),
-            ("Пропылесосить", 7),
-            ("Помыть ванну", 21),
-            ("Приготовить еду", 3),
-            ("Поменять постельное", 7)
-        ]
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM tasks")
-        count = cursor.fetchone()[0]
-        
-        if count == 0:
-            for task_name, interval in default_tasks:
-                cursor.execute(
-                    "INSERT INTO tasks (name, interval_days) VALUES (?, ?)",
-                    (task_name, interval)
-                )
-        
-        conn.commit()
-        conn.close()
-    
-    def get_all_tasks(self) -> List[Task]:
-        """Получить все задачи"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, name, interval_days, last_done, last_done_by, created_at 
-            FROM tasks 
-            ORDER BY name
-        ''')
-        
-        tasks = []
-        for row in cursor.fetchall():
-            task = Task(
-                id=row[0],
-                name=row[1],
-                interval_days=row[2],
-                last_done=datetime.fromisoformat(row[3]) if row[3] else None,
-                last_done_by=row[4],
-                created_at=datetime.fromisoformat(row[5]) if row[5] else None
+        # Часовой пояс домохозяйства: в нём хранятся last_done/done_at
+        # и считаются сроки задач (None — системный пояс)
+        self.tz: tzinfo = ZoneInfo(timezone) if timezone else datetime.now().astimezone().tzinfo
+        # Долгоживущие соединения: один писатель + (pool_size - 1) читателей
+        self.pool = ConnectionPool(
+            db_path,
+            readers=max(1, pool_size - 1),
+            timeout=timeout,
+            pragmas=pragmas,
+            profiler=self.profiler,
+        )
+        self.pool.create_function("next_due_epoch", 2, self._next_due_epoch)
+        # Схема: одно чтение user_version, если база уже актуальна
+        self.schema_version = migrate(self.pool)
+        # Триграммный индекс есть, только если SQLite собран с FTS5
+        with self.pool.reader() as conn:
+            self.search_enabled = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'tasks_fts'"
+            ).fetchone() is not None
+
+        # Разобранные списки задач; сбрасываются после COMMIT изменений задач,
+        # изменения из других процессов видны не позже чем через task_cache_ttl
+        self.task_cache = TaskCache(ttl=task_cache_ttl)
+        # Имена пользователей по chat_id для get_user_name
+        self.user_directory = UserDirectory(self._load_user_name, ttl=user_cache_ttl)
+
+        # Групповой коммит мутаций (None или enabled=False — писать сразу)
+        self.write_queue: Optional[WriteQueue] = None
+        if write_queue and write_queue.get("enabled", True):
+            self.write_queue = WriteQueue(
+                self.pool,
+                flush_interval=write_queue.get("flush_interval_ms", 2) / 1000,
+                max_batch=write_queue.get("max_batch", 128),
             )
-            tasks.append(task)
-        
-        conn.close()
-        return tasks
-    
-    # ================== МЕТОДЫ ДЛЯ СПИСКА ПОКУПОК ==================
-    
-    def add_shopping_item(self, item_text: str) -> bool:
-        """Добавить пункт в список покупок"""
+
+    @classmethod
+    def from_config(cls, db_config: Dict[str, Any], timezone: Optional[str] = None) -> "Database":
+        """Создать Database по словарю config.DB_CONFIG и config.TIMEZONE"""
+        return cls(
+            timezone=timezone,
+            db_path=db_config.get("path", "household.db"),
+            timeout=db_config.get("timeout", 30),
+            pool_size=db_config.get("pool_size", 4),
+            pragmas=db_config.get("pragmas"),
+            write_queue=db_config.get("write_queue"),
+            user_cache_ttl=db_config.get("user_cache_ttl", 300),
+            task_cache_ttl=db_config.get("task_cache_ttl", 60),
+            profiling=db_config.get("profiling"),
+        )
+
+    @property
+    def concurrency(self) -> int:
+        """Параллельных вызовов не больше, чем соединений в пуле"""
+        return self.pool.size
+
+    def close(self):
+        """Дописать очередь записи и закрыть все соединения пула"""
+        if self.write_queue:
+            self.write_queue.close()
+        self.pool.close()
+
+    def submit_write(self, op, *args, **kwargs) -> Future:
+        """
+        Выполнить мутацию op(self, conn, ...) через очередь группового коммита.
+        Без очереди операция выполняется сразу в отдельной транзакции.
+        """
+        if self.profiler is None:
+            return self._submit_write(op, *args, **kwargs)
+
+        # Операторы op приписываются её имени, а длительность вызова — от
+        # постановки в очередь до COMMIT, как её видит вызывающий
+        name, profiler = op.__name__, self.profiler
+        started = time.perf_counter()
+
+        def profiled_op(db, conn, *args, **kwargs):
+            with profiler.attribute(name):
+                return op(db, conn, *args, **kwargs)
+
+        future = self._submit_write(profiled_op, *args, **kwargs)
+        future.add_done_callback(
+            lambda _: profiler.record_call(name, (time.perf_counter() - started) * 1000)
+        )
+        return future
+
+    def _submit_write(self, op, *args, **kwargs) -> Future:
+        if self.write_queue:
+            return self.write_queue.submit(functools.partial(op, self), *args, **kwargs)
+
+        future: Future = Future()
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Проверяем, нет ли уже такого пункта (неотмеченного)
-            cursor.execute('''
-                SELECT id FROM shopping_items 
-                WHERE LOWER(item_text) = LOWER(?) AND is_checked = 0
-            ''', (item_text,))
-            
-            existing_item = cursor.fetchone()
-            if existing_item:
-                conn.close()
-                return False
-            
-            # Добавляем новый пункт
-            cursor.execute('''
-                INSERT INTO shopping_items (item_text, is_checked) 
-                VALUES (?, 0)
-            ''', (item_text,))
-            
-            conn.commit()
-            conn.close()
-            return True
-            
+            with self.pool.writer() as conn:
+                future.set_result(op(self, conn, *args, **kwargs))
         except Exception as e:
-            logger.error(f"Error adding shopping item: {e}")
-            return False
-    
-    def get_shopping_items(self, show_checked: bool = True) -> List[ShoppingItem]:
-        """Получить все пункты списка покупок"""
+            future.set_exception(e)
+        return future
+
+    def now(self) -> datetime:
+        """Текущее время в часовом поясе домохозяйства (tz-aware)"""
+        return datetime.now(self.tz)
+
+    def _local_now(self) -> datetime:
+        """Текущее время без tzinfo — в формате, в котором оно хранится в таблицах"""
+        return self.now().replace(tzinfo=None)
+
+    def _next_due_epoch(self, last_done: Optional[str], interval_days: Optional[int]) -> Optional[int]:
+        """
+        SQL-функция next_due_epoch(last_done, interval_days): момент, когда задача
+        станет просроченной, в секундах Unix. last_done хранится как локальное
+        время часового пояса домохозяйства, дни прибавляются по календарю этого пояса.
+        """
+        if not last_done or interval_days is None:
+            return None
+        done_at = datetime.fromisoformat(last_done)
+        if done_at.tzinfo is None:
+            done_at = done_at.replace(tzinfo=self.tz)
+        return int((done_at + timedelta(days=interval_days)).timestamp())
+
+    def _row_to_task(self, row) -> Task:
+        """
+        Собрать Task из строки (id, name, interval_days, last_done, last_done_by,
+        created_at[, first_name исполнителя]) — см. TASK_SELECT.
+        last_done хранится как локальное время домохозяйства и получает self.tz
+        """
+        return Task(
+            id=row[0],
+            name=row[1],
+            interval_days=row[2],
+            last_done=datetime.fromisoformat(row[3]).replace(tzinfo=self.tz) if row[3] else None,
+            last_done_by=row[4],
+            created_at=datetime.fromisoformat(row[5]) if row[5] else None,
+            last_done_by_name=row[6] if len(row) > 6 else None
+        )
+
+    @staticmethod
+    def _row_to_shopping_item(row) -> ShoppingItem:
+        """Собрать ShoppingItem из строки (id, item_text, is_checked, created_at)"""
+        return ShoppingItem(
+            id=row[0],
+            item_text=row[1],
+            is_checked=bool(row[2]),
+            created_at=datetime.fromisoformat(row[3]) if row[3] else datetime.now()
+        )
+
+    def get_all_tasks(self, household_id: int) -> List[Task]:
+        """
+        Получить все задачи домохозяйства (из TaskCache). Объекты Task общие
+        для всех вызывающих — их нельзя изменять.
+        """
+        return self.task_cache.get(household_id, lambda: self._load_tasks(household_id))
+
+    def _invalidate_tasks(self, household_id: int) -> None:
+        """Сбросить кэш задач домохозяйства после COMMIT текущей транзакции"""
+        self.pool.after_commit(lambda: self.task_cache.invalidate(household_id))
+
+    def _load_tasks(self, household_id: int) -> List[Task]:
+        """Прочитать задачи домохозяйства из БД"""
+        with self.pool.reader() as conn:
+            rows = conn.execute(TASK_SELECT + '''
+                WHERE t.household_id = ?
+                ORDER BY t.name
+            ''', (household_id,)).fetchall()
+
+        return [self._row_to_task(row) for row in rows]
+
+    def get_tasks_page(
+        self,
+        household_id: int,
+        after: Optional[TaskCursor] = None,
+        before: Optional[TaskCursor] = None,
+        limit: int = PAGE_SIZE,
+        due_within_days: Optional[int] = None,
+    ) -> Page[Task]:
+        """
+        Страница задач в порядке (name, id) — keyset по idx_tasks_household_name.
+        after/before — id задачи, после (перед) которой начинается страница:
+        её ключ (name, id) читается подзапросом, поэтому курсор помещается в
+        callback_data при любой длине названия. Если задачи-курсора уже нет
+        или перед before меньше страницы — возвращается первая страница.
+        due_within_days — только задачи, срок которых наступит не позже чем
+        через столько дней (включая просроченные и ни разу не выполнявшиеся).
+        """
+        due_filter, due_params = '', ()
+        if due_within_days is not None:
+            due_filter = ' AND (t.next_due_at IS NULL OR t.next_due_at <= ?)'
+            due_params = (int(self.now().timestamp()) + due_within_days * 86400,)
+
+        with self.pool.reader() as conn:
+            if before is not None:
+                rows = conn.execute(TASK_SELECT + f'''
+                    WHERE t.household_id = ?{due_filter}
+                      AND (t.name, t.id) < (SELECT name, id FROM tasks WHERE id = ? AND household_id = ?)
+                    ORDER BY t.name DESC, t.id DESC
+                    LIMIT ?
+                ''', (household_id, *due_params, before, household_id, limit + 1)).fetchall()
+                if len(rows) > limit:
+                    rows = rows[:limit]
+                    rows.reverse()
+                    return self._task_page(rows, has_prev=True, has_next=True)
+
+            elif after is not None:
+                rows = conn.execute(TASK_SELECT + f'''
+                    WHERE t.household_id = ?{due_filter}
+                      AND (t.name, t.id) > (SELECT name, id FROM tasks WHERE id = ? AND household_id = ?)
+                    ORDER BY t.name, t.id
+                    LIMIT ?
+                ''', (household_id, *due_params, after, household_id, limit + 1)).fetchall()
+                if rows:
+                    return self._task_page(rows[:limit], has_prev=True, has_next=len(rows) > limit)
+
+            rows = conn.execute(TASK_SELECT + f'''
+                WHERE t.household_id = ?{due_filter}
+                ORDER BY t.name, t.id
+                LIMIT ?
+            ''', (household_id, *due_params, limit + 1)).fetchall()
+
+        return self._task_page(rows[:limit], has_prev=False, has_next=len(rows) > limit)
+
+    def _task_page(self, rows, has_prev: bool, has_next: bool) -> Page[Task]:
+        tasks = [self._row_to_task(row) for row in rows]
+        return Page(
+            tasks,
+            next_cursor=tasks[-1].id if has_next and tasks else None,
+            prev_cursor=tasks[0].id if has_prev and tasks else None,
+        )
+
+    # ================== МЕТОДЫ ДЛЯ СПИСКА ПОКУПОК ==================
+
+    @queued_write(default=False, error_message="Error adding shopping item")
+    def add_shopping_item(self, conn, household_id: int, item_text: str) -> bool:
+        """Добавить пункт в список покупок (False, если такой неотмеченный уже есть)"""
+        # Дубль отсекает частичный уникальный индекс по (household_id, item_key)
+        cursor = conn.execute('''
+            INSERT INTO shopping_items (household_id, item_text, item_key, is_checked)
+            VALUES (?, ?, ?, 0)
+            ON CONFLICT DO NOTHING
+        ''', (household_id, item_text, normalize_text(item_text)))
+
+        return cursor.rowcount == 1
+
+    def get_shopping_items(self, household_id: int, show_checked: bool = True) -> List[ShoppingItem]:
+        """Получить все пункты списка покупок домохозяйства"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             query = '''
-                SELECT id, item_text, is_checked, created_at 
-                FROM shopping_items 
-                ORDER BY is_checked, created_at DESC
+                SELECT id, item_text, is_checked, created_at
+                FROM shopping_items
+                WHERE household_id = ?
+                ORDER BY is_checked, created_at DESC, id DESC
             '''
-            
+
             if not show_checked:
                 query = '''
-                    SELECT id, item_text, is_checked, created_at 
-                    FROM shopping_items 
-                    WHERE is_checked = 0
-                    ORDER BY created_at DESC
+                    SELECT id, item_text, is_checked, created_at
+                    FROM shopping_items
+                    WHERE household_id = ? AND is_checked = 0
+                    ORDER BY created_at DESC, id DESC
                 '''
-            
-            cursor.execute(query)
-            
-            items = []
-            for row in cursor.fetchall():
-                item = ShoppingItem(
-                    id=row[0],
-                    item_text=row[1],
-                    is_checked=bool(row[2]),
-                    created_at=datetime.fromisoformat(row[3]) if row[3] else datetime.now()
-                )
-                items.append(item)
-            
-            conn.close()
-            return items
-            
+
+            with self.pool.reader() as conn:
+                rows = conn.execute(query, (household_id,)).fetchall()
+
+            return [self._row_to_shopping_item(row) for row in rows]
+
         except Exception as e:
             logger.error(f"Error getting shopping items: {e}")
             return []
-    
-    def toggle_shopping_item(self, item_id: int) -> Optional[ShoppingItem]:
-        """Переключить статус отметки пункта"""
+
+    def get_shopping_page(
+        self,
+        household_id: int,
+        show_checked: bool = True,
+        after: Optional[ShoppingCursor] = None,
+        before: Optional[ShoppingCursor] = None,
+        limit: int = PAGE_SIZE,
+    ) -> Page[ShoppingItem]:
+        """
+        Страница списка покупок в порядке get_shopping_items (неотмеченные
+        первыми, новые выше) по ключу (is_checked, created_at, id). after/before —
+        курсор соседней страницы. Каждая группа is_checked читается отдельным
+        диапазоном idx_shopping_household (id — rowid, последний столбец индекса),
+        так что стоимость страницы не зависит от длины списка. Если за курсором
+        ничего нет или перед before меньше страницы — возвращается первая страница.
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Получаем текущее состояние
-            cursor.execute('''
-                SELECT id, item_text, is_checked, created_at 
-                FROM shopping_items 
-                WHERE id = ?
-            ''', (item_id,))
-            
-            row = cursor.fetchone()
-            if not row:
-                conn.close()
-                return None
-            
-            # Переключаем статус
-            current_status = bool(row[2])
-            new_status = 0 if current_status else 1
-            
-            cursor.execute('''
-                UPDATE shopping_items 
-                SET is_checked = ? 
-                WHERE id = ?
-            ''', (new_status, item_id))
-            
-            conn.commit()
-            conn.close()
-            
-            # Возвращаем обновленный объект
-            return ShoppingItem(
-                id=row[0],
-                item_text=row[1],
-                is_checked=new_status,
-                created_at=datetime.fromisoformat(row[3]) if row[3] else datetime.now()
-            )
-            
+            buckets = (0, 1) if show_checked else (0,)
+            with self.pool.reader() as conn:
+                # Группы читаются разными запросами — из одного снимка
+                conn.execute("BEGIN")
+                try:
+                    if before is not None:
+                        rows = self._shopping_keyset(conn, household_id, buckets, before, limit + 1, backward=True)
+                        if len(rows) > limit:
+                            rows = rows[:limit]
+                            rows.reverse()
+                            return self._shopping_page(rows, has_prev=True, has_next=True)
+
+                    elif after is not None:
+                        rows = self._shopping_keyset(conn, household_id, buckets, after, limit + 1, backward=False)
+                        if rows:
+                            return self._shopping_page(rows[:limit], has_prev=True, has_next=len(rows) > limit)
+
+                    rows = self._shopping_keyset(conn, household_id, buckets, None, limit + 1, backward=False)
+                finally:
+                    conn.execute("COMMIT")
+
+            return self._shopping_page(rows[:limit], has_prev=False, has_next=len(rows) > limit)
+
         except Exception as e:
-            logger.error(f"Error toggling shopping item: {e}")
-            return None
-    
-    def delete_checked_items(self) -> int:
-        """Удалить все отмеченные пункты"""
+            logger.error(f"Error getting shopping page: {e}")
+            return Page([])
+
+    @staticmethod
+    def _shopping_keyset(conn, household_id: int, buckets, cursor, limit: int, backward: bool) -> list:
+        """
+        До limit строк после курсора (backward — перед ним, в обратном порядке),
+        проходя группы is_checked по порядку вывода
+        """
+        order, compare = ("ASC", ">") if backward else ("DESC", "<")
+        rows = []
+        for bucket in (reversed(buckets) if backward else buckets):
+            params = [household_id, bucket]
+            condition = ""
+            if cursor is not None:
+                # Группы по другую сторону курсора пропускаем
+                if (bucket > cursor[0]) if backward else (bucket < cursor[0]):
+                    continue
+                if bucket == cursor[0]:
+                    condition = f"AND (created_at, id) {compare} (?, ?)"
+                    params += [cursor[1], cursor[2]]
+            params.append(limit - len(rows))
+            rows.extend(conn.execute(f'''
+                SELECT id, item_text, is_checked, created_at
+                FROM shopping_items
+                WHERE household_id = ? AND is_checked = ? {condition}
+                ORDER BY created_at {order}, id {order}
+                LIMIT ?
+            ''', params).fetchall())
+            if len(rows) >= limit:
+                break
+        return rows
+
+    def _shopping_page(self, rows, has_prev: bool, has_next: bool) -> Page[ShoppingItem]:
+        def key(row) -> ShoppingCursor:
+            return (int(row[2]), row[3], row[0])
+        return Page(
+            [self._row_to_shopping_item(row) for row in rows],
+            next_cursor=key(rows[-1]) if has_next and rows else None,
+            prev_cursor=key(rows[0]) if has_prev and rows else None,
+        )
+
+    @queued_write(default=None, error_message="Error toggling shopping item")
+    def toggle_shopping_item(self, conn, household_id: int, item_id: int) -> Optional[ShoppingItem]:
+        """Переключить статус отметки пункта"""
+        # Одно атомарное UPDATE: одновременные нажатия не теряют переключение
+        # (чужие пункты не видны)
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Считаем сколько удаляем
-            cursor.execute('SELECT COUNT(*) FROM shopping_items WHERE is_checked = 1')
-            count = cursor.fetchone()[0]
-            
-            # Удаляем
-            cursor.execute('DELETE FROM shopping_items WHERE is_checked = 1')
-            
-            conn.commit()
-            conn.close()
-            return count
-            
-        except Exception as e:
-            logger.error(f"Error deleting checked items: {e}")
-            return 0
-    
-    def delete_all_shopping_items(self) -> int:
+            row = conn.execute('''
+                UPDATE shopping_items
+                SET is_checked = NOT is_checked
+                WHERE id = ? AND household_id = ?
+                RETURNING id, item_text, is_checked, created_at
+            ''', (item_id, household_id)).fetchone()
+        except sqlite3.IntegrityError:
+            # Снимаем отметку, а такой же неотмеченный пункт уже добавлен заново:
+            # оставляем его, а отмеченную копию удаляем
+            item_key = conn.execute(
+                'DELETE FROM shopping_items WHERE id = ? AND household_id = ? RETURNING item_key',
+                (item_id, household_id)
+            ).fetchone()[0]
+            twin = conn.execute('''
+                SELECT id, item_text, is_checked, created_at
+                FROM shopping_items
+                WHERE household_id = ? AND is_checked = 0 AND item_key = ?
+            ''', (household_id, item_key)).fetchone()
+            return self._row_to_shopping_item(twin)
+
+        return self._row_to_shopping_item(row) if row else None
+
+    @queued_write(default=0, error_message="Error deleting checked items")
+    def delete_checked_items(self, conn, household_id: int) -> int:
+        """Удалить все отмеченные пункты"""
+        # Число удалённых — из changes(), без отдельного COUNT(*)
+        cursor = conn.execute(
+            'DELETE FROM shopping_items WHERE household_id = ? AND is_checked = 1',
+            (household_id,)
+        )
+        return cursor.rowcount
+
+    @queued_write(default=0, error_message="Error deleting all shopping items")
+    def delete_all_shopping_items(self, conn, household_id: int) -> int:
         """Удалить все пункты списка покупок"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Считаем сколько удаляем
-            cursor.execute('SELECT COUNT(*) FROM shopping_items')
-            count = cursor.fetchone()[0]
-            
-            # Удаляем
-            cursor.execute('DELETE FROM shopping_items')
-            
-            conn.commit()
-            conn.close()
-            return count
-            
-        except Exception as e:
-            logger.error(f"Error deleting all shopping items: {e}")
-            return 0
-    
-    def get_shopping_item_count(self) -> Dict[str, int]:
+        cursor = conn.execute('DELETE FROM shopping_items WHERE household_id = ?', (household_id,))
+        return cursor.rowcount
+
+    def get_shopping_item_count(self, household_id: int) -> Dict[str, int]:
         """Получить статистику по списку покупок"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT COUNT(*) FROM shopping_items WHERE is_checked = 0')
-            unchecked = cursor.fetchone()[0]
-            
-            cursor.execute('SELECT COUNT(*) FROM shopping_items WHERE is_checked = 1')
-            checked = cursor.fetchone()[0]
-            
-            conn.close()
-            
+            # Счётчики поддерживаются триггерами — одна строка вместо двух COUNT(*)
+            with self.pool.reader() as conn:
+                row = conn.execute(
+                    'SELECT total, checked FROM shopping_counters WHERE household_id = ?',
+                    (household_id,)
+                ).fetchone()
+
+            # Строки ещё нет, если в домохозяйстве не добавляли ни одного пункта
+            total, checked = row if row else (0, 0)
             return {
-                'total': unchecked + checked,
-                'unchecked': unchecked,
+                'total': total,
+                'unchecked': total - checked,
                 'checked': checked
             }
-            
+
         except Exception as e:
             logger.error(f"Error getting shopping item count: {e}")
             return {'total': 0, 'unchecked': 0, 'checked': 0}
+
+    def check_shopping_counters(self, repair: bool = True) -> Dict[str, Any]:
+        """
+        Пересчитать счётчики списка покупок всех домохозяйств по таблице и
+        сравнить с сохранёнными. При repair=True расхождения исправляются.
+        """
+        with self.pool.writer() as conn:
+            stored = {
+                row[0]: (row[1], row[2])
+                for row in conn.execute('SELECT household_id, total, checked FROM shopping_counters')
+            }
+            actual = {
+                row[0]: (row[1], row[2])
+                for row in conn.execute('''
+                    SELECT household_id, COUNT(*), COALESCE(SUM(is_checked != 0), 0)
+                    FROM shopping_items
+                    GROUP BY household_id
+                ''')
+            }
+
+            mismatched = {}
+            for household_id in stored.keys() | actual.keys():
+                expected = actual.get(household_id, (0, 0))
+                if stored.get(household_id, (0, 0)) != expected:
+                    mismatched[household_id] = {
+                        'stored': stored.get(household_id),
+                        'actual': {'total': expected[0], 'checked': expected[1]},
+                    }
+
+            if mismatched:
+                logger.warning(f"Shopping counters mismatch: {mismatched}")
+                if repair:
+                    conn.executemany(
+                        'INSERT OR REPLACE INTO shopping_counters (household_id, total, checked) VALUES (?, ?, ?)',
+                        [(household_id, *actual.get(household_id, (0, 0))) for household_id in mismatched]
+                    )
+
+        return {
+            'consistent': not mismatched,
+            'mismatched': mismatched,
+        }
     # ================== КОНЕЦ МЕТОДОВ ДЛЯ СПИСКА ПОКУПОК ==================
-    
-    def mark_task_done(self, task_id: int, user_chat_id: int, username: str, first_name: str):
+
+    @queued_write()
+    def mark_task_done(
+        self, conn, household_id: int, task_id: int, user_chat_id: int, username: str, first_name: str
+    ):
         """Отметить задачу выполненной"""
-        conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
-        
+
         # Добавляем/обновляем пользователя
         cursor.execute('''
-            INSERT OR REPLACE INTO users (chat_id, username, first_name) 
+            INSERT OR REPLACE INTO users (chat_id, username, first_name)
             VALUES (?, ?, ?)
         ''', (user_chat_id, username, first_name))
-        
+        self.pool.after_commit(lambda: self.user_directory.invalidate(user_chat_id))
+
         # Обновляем задачу
-        current_time = datetime.now().isoformat()
+        current_time = self._local_now().isoformat()
         cursor.execute('''
-            UPDATE tasks 
-            SET last_done = ?, last_done_by = ? 
-            WHERE id = ?
-        ''', (current_time, user_chat_id, task_id))
-        
+            UPDATE tasks
+            SET last_done = ?, last_done_by = ?, next_due_at = next_due_epoch(?, interval_days)
+            WHERE id = ? AND household_id = ?
+        ''', (current_time, user_chat_id, current_time, task_id, household_id))
+        if cursor.rowcount == 0:
+            return
+        self._invalidate_tasks(household_id)
+
         # Добавляем запись в историю
         cursor.execute('''
-            INSERT INTO task_history (task_id, done_by, done_at) 
-            VALUES (?, ?, ?)
-        ''', (task_id, user_chat_id, current_time))
-        
-        conn.commit()
-        conn.close()
-        self.cleanup_old_history()
-
-    
-    
-    def find_task_by_name(self, task_name: str) -> Optional[Task]:
-        """Найти задачу по названию (регистронезависимо)"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, name, interval_days, last_done, last_done_by, created_at 
-            FROM tasks 
-            WHERE LOWER(name) LIKE LOWER(?)
-        ''', (f'%{task_name}%',))
-        
-        row = cursor.fetchone()
-        conn.close()
-        
-        if row:
-            return Task(
-                id=row[0],
-                name=row[1],
-                interval_days=row[2],
-                last_done=datetime.fromisoformat(row[3]) if row[3] else None,
-                last_done_by=row[4],
-                created_at=datetime.fromisoformat(row[5]) if row[5] else None
+            INSERT INTO task_history (household_id, task_id, done_by, done_at)
+            VALUES (?, ?, ?, ?)
+        ''', (household_id, task_id, user_chat_id, current_time))
+
+    def find_task_by_name(self, household_id: int, task_name: str) -> Optional[Task]:
+        """Найти задачу по названию: лучший результат search_tasks"""
+        tasks = self.search_tasks(household_id, task_name, limit=1)
+        return tasks[0] if tasks else None
+
+    # ================== ПОИСК ==================
+
+    def _search(
+        self,
+        household_id: int,
+        query: str,
+        limit: int,
+        table: str,
+        columns: str,
+        text_column: int,
+    ) -> List[tuple]:
+        """
+        Ранжированный поиск строк домохозяйства: кандидаты из триграммного
+        индекса FTS5 {table}_fts, затем переоценка по match_score. Запросы
+        короче трёх символов и базы без FTS5 обходятся перебором строк
+        домохозяйства — по индексу с household_id в начале.
+        """
+        key = normalize_text(query)
+        if not key or limit <= 0:
+            return []
+
+        if not (self.search_enabled and len(key) >= 3):
+            with self.pool.reader() as conn:
+                rows = conn.execute(
+                    f"SELECT {columns} FROM {table} WHERE household_id = ?", (household_id,)
+                ).fetchall()
+            return self._rank_rows(key, rows, limit, text_column)
+
+        # Нечёткие стадии дороже (OR по частым триграммам), поэтому идём к ним,
+        # только если точных совпадений не хватило на limit результатов
+        fts_table = FTS_TABLES[table]
+        candidates = max(SEARCH_MIN_CANDIDATES, limit * SEARCH_CANDIDATES_PER_RESULT)
+        rows: Dict[int, tuple] = {}
+        ranked: List[tuple] = []
+        with self.pool.reader() as conn:
+            for expression in _fts_stages(key):
+                for row in conn.execute(f'''
+                    SELECT {columns} FROM {table}
+                    WHERE id IN (
+                        SELECT {fts_table}.rowid
+                        FROM {fts_table} JOIN {table} AS owner ON owner.id = {fts_table}.rowid
+                        WHERE {fts_table} MATCH ? AND owner.household_id = ?
+                        ORDER BY {fts_table}.rank
+                        LIMIT ?
+                    )
+                ''', (expression, household_id, candidates)):
+                    rows[row[0]] = row
+                ranked = self._rank_rows(key, rows.values(), limit, text_column)
+                if len(ranked) >= limit:
+                    break
+        return ranked
+
+    @staticmethod
+    def _rank_rows(key: str, rows, limit: int, text_column: int) -> List[tuple]:
+        """Отсортировать строки по match_score и вернуть лучшие limit"""
+        return rank_by_match(key, rows, lambda row: row[text_column], limit)
+
+    def search_tasks(self, household_id: int, query: str, limit: int = 5) -> List[Task]:
+        """Найти до limit задач домохозяйства, лучшие совпадения первыми"""
+        try:
+            rows = self._search(household_id, query, limit, "tasks", "id, name", text_column=1)
+            # Сами задачи (с именами исполнителей) — из списка в TaskCache
+            tasks = {task.id: task for task in self.get_all_tasks(household_id)}
+            return [tasks[row[0]] for row in rows if row[0] in tasks]
+        except Exception as e:
+            logger.error(f"Error searching tasks: {e}")
+            return []
+
+    def search_shopping_items(self, household_id: int, query: str, limit: int = 10) -> List[ShoppingItem]:
+        """Найти до limit позиций списка покупок домохозяйства, лучшие совпадения первыми"""
+        try:
+            rows = self._search(
+                household_id, query, limit, "shopping_items",
+                "id, item_text, is_checked, created_at",
+                text_column=1,
             )
-        return None
-    
+            return [self._row_to_shopping_item(row) for row in rows]
+        except Exception as e:
+            logger.error(f"Error searching shopping items: {e}")
+            return []
+
     def get_user_name(self, chat_id: int) -> str:
-        """Получить имя пользователя по chat_id"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT first_name FROM users WHERE chat_id = ?', (chat_id,))
-        row = cursor.fetchone()
-        conn.close()
-        
-        return row[0] if row else "Неизвестный пользователь"
-    
-    def get_overdue_tasks(self) -> List[Task]:
-        """Получить список просроченных задач"""
-        tasks = self.get_all_tasks()
-        return [task for task in tasks if task.is_overdue()]
-    
-    def get_tasks_due_soon(self, days_threshold: int = 2) -> List[Task]:
-        """Получить задачи, которые скоро должны быть выполнены"""
-        tasks = self.get_all_tasks()
-        due_soon = []
-        
-        for task in tasks:
-            if task.last_done and not task.is_overdue():
-                days_until_due = task.days_until_due()
-                if 0 < days_until_due <= days_threshold:
-                    due_soon.append(task)
-        
-        return due_soon
+        """Получить имя пользователя по chat_id (через кэш UserDirectory)"""
+        name = self.user_directory.get(chat_id)
+        return name if name is not None else "Неизвестный пользователь"
+
+    def _load_user_name(self, chat_id: int) -> Optional[str]:
+        with self.pool.reader() as conn:
+            row = conn.execute(
+                'SELECT first_name FROM users WHERE chat_id = ?', (chat_id,)
+            ).fetchone()
+
+        return row[0] if row else None
+
+    def get_overdue_tasks(self, household_id: int) -> List[Task]:
+        """Получить список просроченных задач (и ни разу не выполнявшихся)"""
+        now_epoch = int(self.now().timestamp())
+        with self.pool.reader() as conn:
+            rows = conn.execute(TASK_SELECT + '''
+                WHERE t.household_id = ? AND (t.next_due_at IS NULL OR t.next_due_at <= ?)
+                ORDER BY t.name
+            ''', (household_id, now_epoch)).fetchall()
+
+        return [self._row_to_task(row) for row in rows]
+
+    def count_overdue_tasks(self, household_id: int) -> int:
+        """Сколько задач вернул бы get_overdue_tasks — по диапазонам idx_tasks_household_due"""
+        now_epoch = int(self.now().timestamp())
+        with self.pool.reader() as conn:
+            row = conn.execute('''
+                SELECT (SELECT COUNT(*) FROM tasks WHERE household_id = ? AND next_due_at IS NULL)
+                     + (SELECT COUNT(*) FROM tasks WHERE household_id = ? AND next_due_at <= ?)
+            ''', (household_id, household_id, now_epoch)).fetchone()
+
+        return row[0]
+
+    def get_tasks_due_soon(self, household_id: int, days_threshold: int = 2) -> List[Task]:
+        """Получить задачи, которые станут просроченными в ближайшие days_threshold дней"""
+        now_epoch = int(self.now().timestamp())
+        with self.pool.reader() as conn:
+            rows = conn.execute(TASK_SELECT + '''
+                WHERE t.household_id = ? AND t.next_due_at > ? AND t.next_due_at <= ?
+                ORDER BY t.name
+            ''', (household_id, now_epoch, now_epoch + days_threshold * 86400)).fetchall()
+
+        return [self._row_to_task(row) for row in rows]
 
     # ДОБАВЛЯЕМ НОВЫЕ МЕТОДЫ ДЛЯ УПРАВЛЕНИЯ ЗАДАЧАМИ
 
-    def cleanup_old_history(self, days_to_keep: int = 90):
-        """Автоматическая очистка старых записей истории (старше 90 дней)"""
+    def cleanup_old_history(
+        self,
+        days_to_keep: int = 90,
+        chunk_size: int = 500,
+        time_budget: float = 0.2,
+    ) -> int:
+        """
+        Очистка записей истории старше days_to_keep дней.
+
+        Удаляет порциями по chunk_size строк, каждая порция — отдельная короткая
+        транзакция, чтобы не держать писателя. Останавливается, когда старых
+        записей не осталось или исчерпан time_budget (секунды); остаток
+        дочистит следующий запуск. Возвращает число удалённых строк.
+        """
+        cutoff_date = (self._local_now() - timedelta(days=days_to_keep)).isoformat()
+        started = time.monotonic()
+        deleted_count = 0
+
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cutoff_date = (datetime.now() - timedelta(days=days_to_keep)).isoformat()
-            
-            # Удаляем старые записи
-            cursor.execute('''
-                DELETE FROM task_history 
-                WHERE done_at < ?
-            ''', (cutoff_date,))
-            
-            deleted_count = cursor.rowcount
-            
-            conn.commit()
-            conn.close()
-            
-            if deleted_count > 0:
-                logger.info(f"🧹 Автоочистка: удалено {deleted_count} старых записей истории")
-            
+            while True:
+                with self.pool.writer() as conn:
+                    # Удаляем старые записи
+                    cursor = conn.execute('''
+                        DELETE FROM task_history
+                        WHERE id IN (
+                            SELECT id FROM task_history
+                            WHERE done_at < ?
+                            ORDER BY done_at
+                            LIMIT ?
+                        )
+                    ''', (cutoff_date, chunk_size))
+                deleted_count += cursor.rowcount
+
+                if cursor.rowcount < chunk_size or time.monotonic() - started >= time_budget:
+                    break
+
         except Exception as e:
             logger.error(f"Error cleaning old history: {e}")
-    
-    def get_history_stats(self) -> Dict[str, int]:
-        """Получить статистику по истории выполнений"""
+
+        elapsed_ms = (time.monotonic() - started) * 1000
+        logger.info(f"🧹 Очистка истории: удалено {deleted_count} записей за {elapsed_ms:.1f} мс")
+        return deleted_count
+
+    def get_history_stats(self, household_id: int) -> Dict[str, int]:
+        """
+        Получить статистику по истории выполнений.
+        Считается по дневным агрегатам task_history_daily, поэтому периоды
+        сравниваются по календарным дням и переживают очистку сырой истории.
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Всего записей
-            cursor.execute('SELECT COUNT(*) FROM task_history')
-            total = cursor.fetchone()[0]
-            
-            # За последние 30 дней
-            since_date = (datetime.now() - timedelta(days=30)).isoformat()
-            cursor.execute('SELECT COUNT(*) FROM task_history WHERE done_at >= ?', (since_date,))
-            last_30_days = cursor.fetchone()[0]
-            
-            # За последние 7 дней
-            since_week = (datetime.now() - timedelta(days=7)).isoformat()
-            cursor.execute('SELECT COUNT(*) FROM task_history WHERE done_at >= ?', (since_week,))
-            last_7_days = cursor.fetchone()[0]
-            
-            conn.close()
-            
+            today = self._local_now().date()
+            since_year = (today - timedelta(days=365)).isoformat()
+            since_month = (today - timedelta(days=30)).isoformat()
+            since_week = (today - timedelta(days=7)).isoformat()
+
+            with self.pool.reader() as conn:
+                row = conn.execute('''
+                    SELECT
+                        COALESCE(SUM(count), 0),
+                        COALESCE(SUM(CASE WHEN day >= ? THEN count END), 0),
+                        COALESCE(SUM(CASE WHEN day >= ? THEN count END), 0),
+                        COALESCE(SUM(CASE WHEN day >= ? THEN count END), 0)
+                    FROM task_history_daily
+                    WHERE household_id = ?
+                ''', (since_year, since_month, since_week, household_id)).fetchone()
+
             return {
-                'total': total,
-                'last_30_days': last_30_days,
-                'last_7_days': last_7_days
+                'total': row[0],
+                'last_365_days': row[1],
+                'last_30_days': row[2],
+                'last_7_days': row[3]
             }
-            
+
         except Exception as e:
             logger.error(f"Error getting history stats: {e}")
-            return {'total': 0, 'last_30_days': 0, 'last_7_days': 0}
+            return {'total': 0, 'last_365_days': 0, 'last_30_days': 0, 'last_7_days': 0}
+
+    def get_user_statistics(self, household_id: int, days: int = 7, top_tasks: int = 5) -> Dict[str, Any]:
+        """
+        Статистика выполнений домохозяйства за последние days дней: по
+        пользователям, общее количество и самые частые задачи. Один
+        сгруппированный проход по task_history через покрывающий индекс
+        (household_id, done_at, done_by, task_id). user_stats — по chat_id
+        исполнителя: {'name': ..., 'task_count': ...} (имена могут совпадать).
+        """
+        try:
+            since = (self._local_now() - timedelta(days=days)).isoformat()
+
+            with self.pool.reader() as conn:
+                rows = conn.execute('''
+                    SELECT
+                        g.done_by,
+                        COALESCE(u.first_name, 'Неизвестный пользователь'),
+                        COALESCE(t.name, 'Удалённая задача'),
+                        g.cnt
+                    FROM (
+                        SELECT done_by, task_id, COUNT(*) AS cnt
+                        FROM task_history
+                        WHERE household_id = ? AND done_at >= ?
+                        GROUP BY done_by, task_id
+                    ) AS g
+                    LEFT JOIN users u ON u.chat_id = g.done_by
+                    LEFT JOIN tasks t ON t.id = g.task_id
+                ''', (household_id, since)).fetchall()
+
+            user_stats: Dict[int, Dict[str, Any]] = {}
+            task_counts: Dict[str, int] = {}
+            total = 0
+            for done_by, user_name, task_name, count in rows:
+                user_stats.setdefault(done_by, {'name': user_name, 'task_count': 0})['task_count'] += count
+                task_counts[task_name] = task_counts.get(task_name, 0) + count
+                total += count
+
+            popular_tasks = sorted(task_counts.items(), key=lambda item: item[1], reverse=True)
+
+            return {
+                'days': days,
+                'total_tasks': total,
+                'user_stats': dict(
+                    sorted(user_stats.items(), key=lambda item: item[1]['task_count'], reverse=True)
+                ),
+                'popular_tasks': popular_tasks[:top_tasks]
+            }
+
+        except Exception as e:
+            logger.error(f"Error getting user statistics: {e}")
+            return {'days': days, 'total_tasks': 0, 'user_stats': {}, 'popular_tasks': []}
 
-    def add_new_task(self, name: str, interval_days: int) -> bool:
+    def add_new_task(self, household_id: int, name: str, interval_days: int) -> bool:
         """Добавить новую задачу"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Проверяем, нет ли уже задачи с таким названием
-            cursor.execute("SELECT id FROM tasks WHERE LOWER(name) = LOWER(?)", (name,))
-            existing_task = cursor.fetchone()
-            
-            if existing_task:
-                conn.close()
-                return False
-            
-            # Добавляем новую задачу
-            cursor.execute(
-                "INSERT INTO tasks (name, interval_days) VALUES (?, ?)",
-                (name, interval_days)
-            )
-            
-            conn.commit()
-            conn.close()
+            with self.pool.writer() as conn:
+                # Задачу с таким же названием отсекает уникальный индекс
+                # по (household_id, name_key)
+                cursor = conn.execute('''
+                    INSERT INTO tasks (household_id, name, name_key, interval_days)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT DO NOTHING
+                ''', (household_id, name, normalize_text(name), interval_days))
+                if cursor.rowcount == 0:
+                    return False
+                self._invalidate_tasks(household_id)
+
             return True
-            
+
         except Exception as e:
             logger.error(f"Error adding new task: {e}")
             return False
 
-    def update_task_interval(self, task_id: int, new_interval: int) -> bool:
+    def update_task_interval(self, household_id: int, task_id: int, new_interval: int) -> bool:
         """Обновить интервал выполнения задачи"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                "UPDATE tasks SET interval_days = ? WHERE id = ?",
-                (new_interval, task_id)
-            )
-            
-            conn.commit()
-            conn.close()
+            with self.pool.writer() as conn:
+                # Чужую или удалённую задачу не трогаем
+                cursor = conn.execute('''
+                    UPDATE tasks SET interval_days = ?, next_due_at = next_due_epoch(last_done, ?)
+                    WHERE id = ? AND household_id = ?
+                ''', (new_interval, new_interval, task_id, household_id))
+                if cursor.rowcount == 0:
+                    return False
+                self._invalidate_tasks(household_id)
+
             return True
-            
+
         except Exception as e:
             logger.error(f"Error updating task interval: {e}")
             return False
 
-    def delete_task(self, task_id: int) -> bool:
+    def delete_task(self, household_id: int, task_id: int) -> bool:
         """Удалить задачу и связанную историю"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Удаляем историю выполнений задачи
-            cursor.execute("DELETE FROM task_history WHERE task_id = ?", (task_id,))
-            
-            # Удаляем саму задачу
-            cursor.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
-            
-            conn.commit()
-            conn.close()
+            with self.pool.writer() as conn:
+                # Удаляем саму задачу; чужую задачу не трогаем
+                cursor = conn.execute(
+                    "DELETE FROM tasks WHERE id = ? AND household_id = ?", (task_id, household_id)
+                )
+                if cursor.rowcount == 0:
+                    return False
+                self._invalidate_tasks(household_id)
+
+                # Удаляем историю выполнений задачи и её агрегаты
+                conn.execute("DELETE FROM task_history WHERE task_id = ?", (task_id,))
+                conn.execute(
+                    "DELETE FROM task_history_daily WHERE household_id = ? AND task_id = ?",
+                    (household_id, task_id)
+                )
+
             return True
-            
+
         except Exception as e:
             logger.error(f"Error deleting task: {e}")
             return False
-    def rename_task(self, task_id: int, new_name: str) -> bool:
+    def rename_task(self, household_id: int, task_id: int, new_name: str) -> bool:
         """Переименовать задачу"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Проверяем, нет ли уже задачи с таким названием
-            cursor.execute("SELECT id FROM tasks WHERE LOWER(name) = LOWER(?) AND id != ?", (new_name, task_id))
-            existing_task = cursor.fetchone()
-            
-            if existing_task:
-                conn.close()
-                return False
-            
-            # Переименовываем задачу
-            cursor.execute("UPDATE tasks SET name = ? WHERE id = ?", (new_name, task_id))
-            conn.commit()
-            conn.close()
+            with self.pool.writer() as conn:
+                # Занятое название отсекает уникальный индекс по (household_id, name_key),
+                # чужую или удалённую задачу — условие WHERE
+                cursor = conn.execute(
+                    "UPDATE tasks SET name = ?, name_key = ? WHERE id = ? AND household_id = ?",
+                    (new_name, normalize_text(new_name), task_id, household_id)
+                )
+                if cursor.rowcount == 0:
+                    return False
+                self._invalidate_tasks(household_id)
+
             return True
-            
+
+        except sqlite3.IntegrityError:
+            return False
+
         except Exception as e:
             logger.error(f"Error renaming task: {e}")
             return False
-    
-    def get_task_by_id(self, task_id: int) -> Optional[Task]:
-        """Получить задачу по ID"""
+
+    def get_task_by_id(self, household_id: int, task_id: int) -> Optional[Task]:
+        """Получить задачу домохозяйства по ID (из списка в TaskCache)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT id, name, interval_days, last_done, last_done_by, created_at 
-                FROM tasks WHERE id = ?
-            ''', (task_id,))
-            
-            row = cursor.fetchone()
-            conn.close()
-            
-            if row:
-                return Task(
-                    id=row[0],
-                    name=row[1],
-                    interval_days=row[2],
-                    last_done=datetime.fromisoformat(row[3]) if row[3] else None,
-                    last_done_by=row[4],
-                    created_at=datetime.fromisoformat(row[5]) if row[5] else None
-                )
+            for task in self.get_all_tasks(household_id):
+                if task.id == task_id:
+                    return task
             return None
-            
+
         except Exception as e:
             logger.error(f"Error getting task by ID: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    # ================== ДОМОХОЗЯЙСТВА ==================
+
+    def create_household(self, name: str, owner_chat_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Создать домохозяйство со стандартными задачами. Владелец становится
+        его администратором и выходит из прежнего домохозяйства.
+        """
+        try:
+            invite_code = new_invite_code()
+            with self.pool.writer() as conn:
+                household_id = conn.execute(
+                    "INSERT INTO households (name, invite_code) VALUES (?, ?)",
+                    (name, invite_code)
+                ).lastrowid
+                conn.execute("DELETE FROM household_members WHERE chat_id = ?", (owner_chat_id,))
+                conn.execute(
+                    "INSERT INTO household_members (household_id, chat_id, role) VALUES (?, ?, 'admin')",
+                    (household_id, owner_chat_id)
+                )
+                conn.executemany(
+                    "INSERT INTO tasks (household_id, name, name_key, interval_days) VALUES (?, ?, ?, ?)",
+                    [
+                        (household_id, task_name, normalize_text(task_name), interval)
+                        for task_name, interval in DEFAULT_TASKS
+                    ]
+                )
+                self._invalidate_tasks(household_id)
+
+            return {'id': household_id, 'name': name, 'invite_code': invite_code}
+
+        except Exception as e:
+            logger.error(f"Error creating household: {e}")
+            return None
+
+    def add_household_member(self, household_id: int, chat_id: int, role: str = "member") -> bool:
+        """Добавить пользователя, если он ещё не состоит ни в одном домохозяйстве"""
+        try:
+            with self.pool.writer() as conn:
+                cursor = conn.execute('''
+                    INSERT INTO household_members (household_id, chat_id, role)
+                    SELECT ?, ?, ?
+                    WHERE NOT EXISTS (SELECT 1 FROM household_members WHERE chat_id = ?)
+                ''', (household_id, chat_id, role, chat_id))
+
+            return cursor.rowcount == 1
+
+        except Exception as e:
+            logger.error(f"Error adding household member: {e}")
+            return False
+
+    def join_household(self, invite_code: str, chat_id: int) -> Optional[Dict[str, Any]]:
+        """Перейти в домохозяйство по коду приглашения (None — неверный код)"""
+        try:
+            with self.pool.writer() as conn:
+                row = conn.execute(
+                    "SELECT id, name FROM households WHERE invite_code = ?", (invite_code.strip(),)
+                ).fetchone()
+                if not row:
+                    return None
+
+                conn.execute("DELETE FROM household_members WHERE chat_id = ?", (chat_id,))
+                conn.execute(
+                    "INSERT INTO household_members (household_id, chat_id) VALUES (?, ?)",
+                    (row[0], chat_id)
+                )
+
+            return {'id': row[0], 'name': row[1], 'role': 'member'}
+
+        except Exception as e:
+            logger.error(f"Error joining household: {e}")
+            return None
+
+    def get_user_household(self, chat_id: int) -> Optional[Dict[str, Any]]:
+        """Домохозяйство пользователя и его роль в нём (None — не состоит)"""
+        with self.pool.reader() as conn:
+            row = conn.execute('''
+                SELECT h.id, h.name, h.invite_code, m.role
+                FROM household_members m
+                JOIN households h ON h.id = m.household_id
+                WHERE m.chat_id = ?
+            ''', (chat_id,)).fetchone()
+
+        if not row:
+            return None
+        return {'id': row[0], 'name': row[1], 'invite_code': row[2], 'role': row[3]}
+
+    def get_household_members(self, household_id: int) -> List[int]:
+        """chat_id всех участников домохозяйства"""
+        with self.pool.reader() as conn:
+            rows = conn.execute(
+                "SELECT chat_id FROM household_members WHERE household_id = ?", (household_id,)
+            ).fetchall()
+
+        return [row[0] for row in rows]
+
+    def get_household_ids(self) -> List[int]:
+        """Домохозяйства, в которых есть хотя бы один участник"""
+        with self.pool.reader() as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT household_id FROM household_members ORDER BY household_id"
+            ).fetchall()
+
+        return [row[0] for row in rows]
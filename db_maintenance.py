@@ -0,0 +1,136 @@
+"""
+Обслуживание файла базы данных: контрольные точки WAL, статистика
+планировщика и возврат свободного места.
+
+run_maintenance() выполняет шаги по порядку, пока не исчерпан общий бюджет
+времени; шаг, на который времени не осталось, пропускается до следующего
+запуска:
+
+1. wal_checkpoint(PASSIVE) — перенести журнал в базу, никого не дожидаясь;
+2. PRAGMA optimize с analysis_limit — ANALYZE только там, где статистика
+   устарела, и по ограниченной выборке строк;
+3. incremental_vacuum порциями по vacuum_pages_per_step страниц — вернуть
+   ОС страницы, освободившиеся после удаления истории и списка покупок;
+4. wal_checkpoint(TRUNCATE) — обрезать -wal, выросший при вакууме; ожидание
+   читателей ограничено остатком бюджета.
+
+incremental_vacuum работает только при auto_vacuum = INCREMENTAL. В старых
+базах режим выключен, и переключить его можно лишь полным VACUUM — он
+выполняется один раз при первом запуске (convert_auto_vacuum) и бюджетом
+не ограничивается: на время VACUUM запись в базу ждёт.
+"""
+
+import logging
+import os
+import time
+from typing import Any, Dict
+
+from database import Database
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def database_stats(db: Database) -> Dict[str, int]:
+    """Размер файла и журнала, число страниц и свободных страниц"""
+    with db.pool.reader() as conn:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    wal_path = db.db_path + "-wal"
+    return {
+        'file_bytes': os.path.getsize(db.db_path),
+        'wal_bytes': os.path.getsize(wal_path) if os.path.exists(wal_path) else 0,
+        'page_size': page_size,
+        'page_count': page_count,
+        'freelist_pages': freelist,
+    }
+
+
+def enable_incremental_vacuum(db: Database) -> bool:
+    """Включить auto_vacuum = INCREMENTAL (полный VACUUM); True, если режим менялся"""
+    with db.pool.exclusive() as conn:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == AUTO_VACUUM_INCREMENTAL:
+            return False
+        started = time.monotonic()
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    logger.info(f"auto_vacuum = INCREMENTAL включён, VACUUM за {(time.monotonic() - started) * 1000:.0f} мс")
+    return True
+
+
+def run_maintenance(
+    db: Database,
+    time_budget: float = 2.0,
+    vacuum_pages_per_step: int = 256,
+    analysis_limit: int = 400,
+    convert_auto_vacuum: bool = True,
+) -> Dict[str, Any]:
+    """
+    Выполнить шаги обслуживания в пределах time_budget секунд. Возвращает
+    {'before', 'after', 'steps': {шаг: мс}, 'skipped': [...], 'vacuumed_pages'}.
+    """
+    before = database_stats(db)
+    if convert_auto_vacuum:
+        enable_incremental_vacuum(db)
+
+    started = time.monotonic()
+    deadline = started + time_budget
+    steps: Dict[str, float] = {}
+    skipped = []
+    vacuumed = 0
+
+    def run_step(name: str, func) -> None:
+        if time.monotonic() >= deadline:
+            skipped.append(name)
+            return
+        step_started = time.monotonic()
+        with db.pool.exclusive() as conn:
+            func(conn)
+        steps[name] = (time.monotonic() - step_started) * 1000
+
+    def optimize(conn) -> None:
+        conn.execute(f"PRAGMA analysis_limit = {int(analysis_limit)}")
+        conn.execute("PRAGMA optimize")
+
+    def incremental_vacuum(conn) -> None:
+        nonlocal vacuumed
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+            return
+        while time.monotonic() < deadline:
+            free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if free == 0:
+                break
+            # execute() делает один шаг прагмы — одну страницу; executescript
+            # выполняет её до конца
+            conn.executescript(f"PRAGMA incremental_vacuum({int(vacuum_pages_per_step)})")
+            vacuumed += free - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    def truncate_checkpoint(conn) -> None:
+        # Ждём читателей не дольше остатка бюджета, затем возвращаем обычный таймаут
+        remaining_ms = max(0, int((deadline - time.monotonic()) * 1000))
+        conn.execute(f"PRAGMA busy_timeout = {remaining_ms}")
+        try:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        finally:
+            conn.execute(f"PRAGMA busy_timeout = {int(db.pool.pragmas['busy_timeout'])}")
+
+    run_step("checkpoint_passive", lambda conn: conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall())
+    run_step("optimize", optimize)
+    run_step("incremental_vacuum", incremental_vacuum)
+    run_step("checkpoint_truncate", truncate_checkpoint)
+
+    after = database_stats(db)
+    metrics.observe("maintenance.duration_ms", (time.monotonic() - started) * 1000)
+    metrics.observe("maintenance.reclaimed_bytes", before['file_bytes'] - after['file_bytes'])
+
+    return {
+        'before': before,
+        'after': after,
+        'steps': steps,
+        'skipped': skipped,
+        'vacuumed_pages': vacuumed,
+    }
@@ -0,0 +1,171 @@
+"""
+Пул долгоживущих соединений SQLite.
+
+Одно соединение-писатель (захватывается эксклюзивно) и несколько читателей
+в режиме WAL. Настройки PRAGMA задаются профилем из config.DB_CONFIG.
+"""
+
+import queue
+import sqlite3
+import threading
+import logging
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from query_profiler import InstrumentedConnection, QueryProfiler
+
+logger = logging.getLogger(__name__)
+
+# Профиль по умолчанию: WAL + NORMAL безопасны для WAL и заметно быстрее FULL
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -8000,         # ~8 МБ на соединение
+    "mmap_size": 64 * 1024 * 1024,
+    "busy_timeout": 30000,       # мс
+    "temp_store": "MEMORY",
+}
+
+
+class ConnectionPool:
+    """Пул соединений: один писатель и несколько читателей"""
+
+    def __init__(
+        self,
+        db_path: str,
+        readers: int = 3,
+        timeout: float = 30,
+        pragmas: Optional[Dict[str, Any]] = None,
+        profiler: Optional[QueryProfiler] = None,
+    ):
+        self.db_path = db_path
+        self.timeout = timeout
+        # Если задан, все операторы всех соединений попадают в профайлер
+        self.profiler = profiler
+        self.pragmas = dict(DEFAULT_PRAGMAS)
+        if pragmas:
+            self.pragmas.update(pragmas)
+        self.size = readers + 1
+
+        self._closed = False
+        self._all: List[sqlite3.Connection] = []
+
+        # journal_mode сохраняется в файле БД, поэтому писатель открывается первым
+        self._writer = self._connect()
+        self._writer_lock = threading.RLock()
+        # Действия после COMMIT текущей транзакции писателя (под _writer_lock)
+        self._after_commit: List[Callable[[], None]] = []
+
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(readers):
+            self._readers.put(self._connect())
+
+    def _connect(self) -> sqlite3.Connection:
+        """Открыть соединение и применить профиль PRAGMA"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            isolation_level=None,   # транзакциями управляем явно
+            factory=InstrumentedConnection if self.profiler else sqlite3.Connection,
+        )
+        if self.profiler:
+            conn.profiler = self.profiler
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        self._all.append(conn)
+        return conn
+
+    def create_function(self, name: str, num_params: int, func) -> None:
+        """Зарегистрировать SQL-функцию на всех соединениях пула (до начала работы)"""
+        for conn in self._all:
+            conn.create_function(name, num_params, func, deterministic=True)
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Взять соединение для чтения (autocommit, каждый SELECT — свой снимок)"""
+        conn = self._readers.get(timeout=self.timeout)
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """
+        Захватить соединение-писатель и открыть транзакцию.
+        COMMIT при успешном выходе, ROLLBACK при исключении.
+        Вложенные вызовы из того же потока работают в общей транзакции.
+        """
+        with self._writer_lock:
+            conn = self._writer
+            if conn.in_transaction:
+                yield conn
+                return
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                self._after_commit.clear()
+                raise
+            else:
+                conn.execute("COMMIT")
+                self._run_after_commit()
+
+    @contextmanager
+    def exclusive(self) -> Iterator[sqlite3.Connection]:
+        """
+        Захватить соединение-писатель без транзакции — для команд, которые
+        нельзя выполнять внутри BEGIN (VACUUM, wal_checkpoint). Остальные
+        записи ждут освобождения, как при writer().
+        """
+        with self._writer_lock:
+            if self._writer.in_transaction:
+                raise sqlite3.OperationalError("exclusive() inside an open writer transaction")
+            yield self._writer
+
+    @contextmanager
+    def savepoint(self, conn: sqlite3.Connection, name: str = "sp") -> Iterator[sqlite3.Connection]:
+        """
+        SAVEPOINT внутри транзакции writer(): при исключении откатываются
+        изменения и действия after_commit, добавленные внутри блока.
+        """
+        hooks = len(self._after_commit)
+        conn.execute(f"SAVEPOINT {name}")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute(f"ROLLBACK TO {name}")
+            conn.execute(f"RELEASE {name}")
+            del self._after_commit[hooks:]
+            raise
+        else:
+            conn.execute(f"RELEASE {name}")
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        """
+        Выполнить callback после COMMIT текущей транзакции writer()
+        (например, сбросить кэш). При ROLLBACK callback отбрасывается.
+        """
+        self._after_commit.append(callback)
+
+    def _run_after_commit(self) -> None:
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Error in after-commit callback: {e}")
+
+    def close(self) -> None:
+        """Закрыть все соединения пула"""
+        if self._closed:
+            return
+        self._closed = True
+        for conn in self._all:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Error closing connection: {e}")
+        self._all.clear()
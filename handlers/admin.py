@@ -0,0 +1,73 @@
+"""
+Служебные команды для администраторов бота (ADMIN_IDS из конфига,
+main кладёт их в bot_data["admin_ids"]).
+/dbstats — задержки методов БД, самые дорогие запросы и метрики обслуживания.
+"""
+
+import html
+import logging
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from metrics import metrics
+from utils import send_message
+
+logger = logging.getLogger(__name__)
+
+DBSTATS_METHODS = 15
+DBSTATS_STATEMENTS = 5
+DBSTATS_SQL_LENGTH = 80
+
+
+def _is_admin(context: ContextTypes.DEFAULT_TYPE, user_id: int) -> bool:
+    """Проверка, является ли пользователь администратором бота."""
+    return user_id in context.bot_data.get("admin_ids", ())
+
+
+async def show_db_stats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Команда /dbstats: перцентили методов БД и самые дорогие запросы."""
+    if not _is_admin(context, update.effective_user.id):
+        await send_message(update, "❌ У вас нет прав для выполнения этого действия.")
+        return
+
+    profiler = getattr(context.bot_data["db"].sync, "profiler", None)
+    if profiler is None:
+        await send_message(update, "ℹ️ Профилирование запросов выключено (DB_CONFIG['profiling']).")
+        return
+
+    lines = ["📊 <b>Методы БД</b> (p50 / p95 / p99, мс; вызовов)"]
+    summary = sorted(profiler.summary().items(), key=lambda item: item[1]['p95_ms'], reverse=True)
+    for name, stats in summary[:DBSTATS_METHODS]:
+        lines.append(
+            f"• {html.escape(name)}: {stats['p50_ms']:.2f} / {stats['p95_ms']:.2f} / "
+            f"{stats['p99_ms']:.2f} ({stats['calls']})"
+        )
+    if not summary:
+        lines.append("• пока нет данных")
+
+    lines.append(f"\n🐢 Медленных запросов (≥ {profiler.slow_query_ms} мс): {profiler.slow_queries}")
+
+    lines.append("\n⏱ <b>Запросы с наибольшим суммарным временем</b>")
+    for statement in profiler.top_statements(DBSTATS_STATEMENTS):
+        sql = statement['sql'][:DBSTATS_SQL_LENGTH]
+        lines.append(
+            f"• {html.escape(statement['method'])}: {statement['total_ms']:.1f} мс, "
+            f"{statement['count']} раз, {statement['rows']} строк\n  <code>{html.escape(sql)}</code>"
+        )
+
+    snapshot = metrics.snapshot()
+    observations = snapshot['observations']
+    for name, title in (("backup.duration_ms", "Последняя резервная копия"),
+                        ("maintenance.duration_ms", "Последнее обслуживание БД")):
+        if name in observations:
+            lines.append(f"\n💾 {title}: {observations[name]['last']:.0f} мс")
+
+    counters = snapshot['counters']
+    lines.append(
+        f"\n📨 Правки сообщений: сэкономлено запросов {counters.get('telegram.edits_skipped', 0)}, "
+        f"только клавиатура {counters.get('telegram.edits_markup_only', 0)}, "
+        f"целиком {counters.get('telegram.edits_full', 0)}"
+    )
+
+    await send_message(update, "\n".join(lines))
@@ -8,9 +8,11 @@ import logging
 from telegram import Update, CallbackQuery
 from telegram.ext import ContextTypes
 
-from utils import send_message
+from utils import edit_message, send_message
 from handlers import tasks, shopping
+from handlers.households import resolve_household
 from keyboards import get_main_keyboard
+from paging import SHOPPING_PAGE_PREFIX, TASKS_PAGE_PREFIX, parse_shopping_page
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +20,9 @@ logger = logging.getLogger(__name__)
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Обработчик команды /start. Показывает главное меню с reply-клавиатурой."""
     try:
+        if await resolve_household(update, context) is None:
+            return
+
         welcome_text = """
 Привет!
 
@@ -39,6 +44,11 @@ async def handle_text_message(update: Update, context: ContextTypes.DEFAULT_TYPE
     user_id = update.effective_user.id
     text = update.message.text
 
+    # Все разделы работают с данными домохозяйства пользователя
+    if await resolve_household(update, context) is None:
+        context.user_data.pop("state", None)
+        return
+
     # Проверяем, есть ли активное состояние
     state = context.user_data.get("state")
     if state:
@@ -79,20 +89,18 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     query = update.callback_query
     await query.answer()
 
-    user_id = query.from_user.id
     data = query.data
 
-    # Проверка прав администратора
-    import config
-    if user_id not in config.ADMIN_IDS:
-        await query.edit_message_text("❌ У вас нет прав для выполнения этого действия")
+    # Доступ есть только у участников домохозяйства
+    if await resolve_household(query, context) is None:
         return
 
     try:
         # ================== ОБЩИЕ ДЕЙСТВИЯ ==================
         if data == "back_to_main":
             # Возвращаемся в главное меню с reply-клавиатурой
-            await query.edit_message_text(
+            await edit_message(
+                query,
                 "👋 Главное меню\n\nВыберите раздел:",
                 reply_markup=get_main_keyboard()
             )
@@ -103,12 +111,14 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         # ================== ЗАДАЧИ ==================
         elif data == "tasks_main":
             await tasks.show_tasks_menu(query, context)
-        elif data == "show_tasks":
+        elif data in ("show_tasks", "show_all_tasks"):
             await tasks.show_tasks_with_keyboard(query, context, show_all=True)
         elif data == "show_urgent_tasks":
             await tasks.show_tasks_with_keyboard(query, context, show_all=False)
         elif data == "refresh_tasks":
-            await tasks.show_tasks_with_keyboard(query, context, show_all=True)
+            await tasks.refresh_tasks(query, context)
+        elif data.startswith(TASKS_PAGE_PREFIX):
+            await tasks.show_tasks_page(query, context, data)
         elif data == "manage_tasks":
             await tasks.manage_tasks(query, context)
         elif data == "add_task":
@@ -142,6 +152,10 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             await shopping.show_shopping_items(query, context)
         elif data == "shopping_toggle_view":
             await shopping.toggle_shopping_view(query, context)
+        elif data == "shopping_refresh":
+            await shopping.refresh_shopping_items(query, context)
+        elif data.startswith(SHOPPING_PAGE_PREFIX):
+            await shopping.show_shopping_items(query, context, page_request=parse_shopping_page(data))
         elif data == "shopping_add":
             await shopping.add_shopping_item(query, context)
         elif data.startswith("shopping_toggle_"):
@@ -161,7 +175,8 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             await shopping.quick_clear_all_shopping_items(query, context)
         elif data == "back_to_shopping":
             # Перенаправляем в главное меню, так как прямого меню покупок больше нет
-            await query.edit_message_text(
+            await edit_message(
+                query,
                 "👋 Главное меню\n\nВыберите раздел:",
                 reply_markup=get_main_keyboard()
             )    
@@ -170,7 +185,8 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         elif data == "cancel_action":
             # Очищаем состояние и возвращаемся в главное меню
             context.user_data.clear()
-            await query.edit_message_text(
+            await edit_message(
+                query,
                 "👋 Главное меню\n\nВыберите раздел:",
                 reply_markup=get_main_keyboard()
             )
@@ -179,8 +195,8 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             pass
         else:
             logger.warning(f"Unknown callback data: {data}")
-            await query.edit_message_text("❌ Неизвестное действие")
+            await edit_message(query, "❌ Неизвестное действие")
 
     except Exception as e:
         logger.error(f"Error in handle_callback: {e}", exc_info=True)
-        await query.edit_message_text("❌ Произошла ошибка при обработке действия")
\ No newline at end of file
+        await edit_message(query, "❌ Произошла ошибка при обработке действия")
\ No newline at end of file
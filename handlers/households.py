@@ -0,0 +1,176 @@
+"""
+Обработчики домохозяйств Telegram-бота.
+Определяют домохозяйство пользователя для остальных обработчиков и содержат
+команды /newhome, /join и /invite.
+"""
+
+import logging
+import time
+from typing import Any, Dict, Iterable, Optional, Union
+
+from telegram import Update, CallbackQuery
+from telegram.ext import ContextTypes
+
+from utils import send_message
+
+logger = logging.getLogger(__name__)
+
+# Ключ кэша членства в context.user_data
+HOUSEHOLD_KEY = "household"
+
+NOT_A_MEMBER_TEXT = (
+    "🏠 Вы пока не состоите ни в одном домохозяйстве.\n\n"
+    "• /join <код> — присоединиться по коду приглашения\n"
+    "• /newhome <название> — создать своё домохозяйство"
+)
+
+
+# ================== ПРАВО СОЗДАВАТЬ ДОМОХОЗЯЙСТВА ==================
+
+class HouseholdCreationPolicy:
+    """
+    Кто и как часто может создавать домохозяйства командой /newhome
+    (config.HOUSEHOLD_CREATION, main кладёт политику в bot_data).
+    Время последнего создания хранится в памяти процесса.
+    """
+
+    def __init__(
+        self,
+        admin_ids: Iterable[int],
+        allowed_ids: Iterable[int] = (),
+        open_to_all: bool = False,
+        cooldown_minutes: float = 1440,
+    ):
+        self.admin_ids = frozenset(admin_ids)
+        self.allowed_ids = frozenset(allowed_ids)
+        self.open_to_all = open_to_all
+        self.cooldown = cooldown_minutes * 60
+        self._last_created: Dict[int, float] = {}
+
+    @classmethod
+    def from_config(
+        cls, creation_config: Optional[Dict[str, Any]], admin_ids: Iterable[int]
+    ) -> "HouseholdCreationPolicy":
+        """Политика по словарю config.HOUSEHOLD_CREATION (None — только администраторы)"""
+        creation_config = creation_config or {}
+        return cls(
+            admin_ids,
+            allowed_ids=creation_config.get("allowed_ids", ()),
+            open_to_all=creation_config.get("open", False),
+            cooldown_minutes=creation_config.get("cooldown_minutes", 1440),
+        )
+
+    def refusal(self, user_id: int) -> Optional[str]:
+        """Текст отказа или None, если пользователь может создать домохозяйство сейчас"""
+        if user_id in self.admin_ids:
+            return None
+        if not self.open_to_all and user_id not in self.allowed_ids:
+            return (
+                "❌ Создавать домохозяйства могут только администраторы бота.\n"
+                "Попросите код приглашения и отправьте /join <код>."
+            )
+        last = self._last_created.get(user_id)
+        if last is not None and time.monotonic() - last < self.cooldown:
+            minutes = int((self.cooldown - (time.monotonic() - last)) // 60) + 1
+            return f"⏳ Новое домохозяйство можно будет создать через {minutes} мин."
+        return None
+
+    def record(self, user_id: int) -> None:
+        """Запомнить, что пользователь только что создал домохозяйство"""
+        self._last_created[user_id] = time.monotonic()
+
+
+# ================== ОПРЕДЕЛЕНИЕ ДОМОХОЗЯЙСТВА ==================
+
+async def resolve_household(
+    update: Union[Update, CallbackQuery],
+    context: ContextTypes.DEFAULT_TYPE
+) -> Optional[int]:
+    """
+    Найти домохозяйство пользователя (с кэшем в user_data) и вернуть его id.
+    Если пользователь нигде не состоит, отправляет подсказку и возвращает None.
+    """
+    household = context.user_data.get(HOUSEHOLD_KEY)
+    if household is None:
+        user = update.from_user if isinstance(update, CallbackQuery) else update.effective_user
+        household = await context.bot_data["db"].get_user_household(user.id)
+        if household is None:
+            await send_message(update, NOT_A_MEMBER_TEXT)
+            return None
+        context.user_data[HOUSEHOLD_KEY] = household
+    return household["id"]
+
+
+def current_household(context: ContextTypes.DEFAULT_TYPE) -> int:
+    """id домохозяйства, уже определённого диспетчером для этого обновления"""
+    return context.user_data[HOUSEHOLD_KEY]["id"]
+
+
+# ================== КОМАНДЫ ==================
+
+async def new_household(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Команда /newhome <название>: создать домохозяйство и стать его администратором.
+    Доступна по HouseholdCreationPolicy из bot_data["household_creation"].
+    """
+    user_id = update.effective_user.id
+    policy = context.bot_data["household_creation"]
+    refusal = policy.refusal(user_id)
+    if refusal:
+        await send_message(update, refusal)
+        return
+
+    name = " ".join(context.args).strip() or f"Дом {update.effective_user.first_name or ''}".strip()
+    db = context.bot_data["db"]
+    household = await db.create_household(name, user_id)
+
+    if not household:
+        await send_message(update, "❌ Не удалось создать домохозяйство. Попробуйте позже.")
+        return
+
+    policy.record(user_id)
+
+    context.user_data.clear()
+    await send_message(
+        update,
+        f"✅ Домохозяйство «{household['name']}» создано.\n\n"
+        f"Код приглашения для остальных: {household['invite_code']}\n"
+        f"Им нужно отправить боту: /join {household['invite_code']}"
+    )
+
+
+async def join_household(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Команда /join <код>: присоединиться к домохозяйству по коду приглашения."""
+    if not context.args:
+        await send_message(update, "❌ Укажите код приглашения: /join <код>")
+        return
+
+    db = context.bot_data["db"]
+    household = await db.join_household(context.args[0], update.effective_user.id)
+
+    if not household:
+        await send_message(update, "❌ Неверный код приглашения.")
+        return
+
+    context.user_data.clear()
+    await send_message(update, f"✅ Вы присоединились к домохозяйству «{household['name']}».")
+
+
+async def show_invite_code(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Команда /invite: показать код приглашения (только администраторам домохозяйства)."""
+    # Роль и код читаем из БД, а не из кэша: их могли изменить
+    household = await context.bot_data["db"].get_user_household(update.effective_user.id)
+
+    if household is None:
+        await send_message(update, NOT_A_MEMBER_TEXT)
+        return
+    if household["role"] != "admin":
+        await send_message(update, "❌ Код приглашения доступен только администраторам.")
+        return
+
+    await send_message(
+        update,
+        f"🏠 {household['name']}\n\n"
+        f"Код приглашения: {household['invite_code']}\n"
+        f"Новому участнику нужно отправить боту: /join {household['invite_code']}"
+    )
@@ -4,12 +4,14 @@
 """
 
 import logging
-from typing import Union
+from typing import Optional, Tuple, Union
 
-from telegram import Update, CallbackQuery
+from telegram import Update, CallbackQuery, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
-from utils import send_message
+from paging import FIRST_PAGE, PageRequest
+from utils import edit_message, send_message
+from handlers.households import current_household
 from keyboards import (
     get_shopping_keyboard,
     get_shopping_items_keyboard,
@@ -19,18 +21,10 @@ from keyboards import (
     get_shopping_add_stream_keyboard,
     get_cancel_keyboard,
 )
-import config
 
 logger = logging.getLogger(__name__)
 
 
-# ================== ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ ==================
-
-def _is_admin(user_id: int) -> bool:
-    """Проверка, является ли пользователь администратором."""
-    return user_id in config.ADMIN_IDS
-
-
 # ================== ОСНОВНОЕ МЕНЮ ==================
 
 async def show_shopping_menu(update: Union[Update, CallbackQuery], context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -59,32 +53,63 @@ async def show_shopping_list(query: CallbackQuery, context: ContextTypes.DEFAULT
 
 # ================== ОТОБРАЖЕНИЕ ПУНКТОВ ==================
 
+async def _shopping_page_view(
+    db,
+    household_id: int,
+    show_checked: bool,
+    page_request: PageRequest
+) -> Optional[Tuple[str, InlineKeyboardMarkup]]:
+    """
+    Текст и клавиатура одной страницы списка покупок; None — список пуст.
+    Если страница по курсору опустела (пункты отметили или удалили),
+    показывается первая страница.
+    """
+    page = await db.get_shopping_page(household_id, show_checked, *page_request)
+    if not page.items and page_request != FIRST_PAGE:
+        page = await db.get_shopping_page(household_id, show_checked)
+    if not page.items:
+        return None
+
+    stats = await db.get_shopping_item_count(household_id)
+
+    message_lines = ["🛒 Список покупок:\n"]
+    if stats['total'] > 0:
+        message_lines.append(
+            f"📊 Всего: {stats['total']} | ✅ Отмечено: {stats['checked']} | ⬜️ Неотмечено: {stats['unchecked']}\n"
+        )
+    for item in page.items:
+        message_lines.append(f"{item.format_for_display()}")
+
+    keyboard = get_shopping_items_keyboard(page.items, stats, show_checked, page=page)
+    return "\n".join(message_lines), keyboard
+
+
 async def show_shopping_items(
     update: Union[Update, CallbackQuery],
     context: ContextTypes.DEFAULT_TYPE,
-    show_checked: bool = None
+    show_checked: bool = None,
+    page_request: Optional[PageRequest] = None
 ) -> None:
     """
-    Показать список покупок с кнопками для отметки.
+    Показать страницу списка покупок с кнопками для отметки.
     Работает как с Update, так и с CallbackQuery.
+    page_request — (after, before) из кнопок навигации, None — первая страница.
     """
     try:
-        # Определяем user_id в зависимости от типа
-        if isinstance(update, CallbackQuery):
-            user_id = update.from_user.id
-        else:
-            user_id = update.effective_user.id
-
         db = context.bot_data["db"]
 
+        household_id = current_household(context)
+
         if show_checked is None:
             show_checked = context.user_data.get("shopping_show_checked", True)
         else:
             context.user_data["shopping_show_checked"] = show_checked
 
-        items = db.get_shopping_items(show_checked=show_checked)
+        page_request = page_request or FIRST_PAGE
+        context.user_data["shopping_page"] = page_request
 
-        if not items:
+        view = await _shopping_page_view(db, household_id, show_checked, page_request)
+        if view is None:
             await send_message(
                 update,
                 "📝 Список покупок пуст. Добавьте первый пункт!",
@@ -92,33 +117,23 @@ async def show_shopping_items(
             )
             return
 
-        stats = db.get_shopping_item_count()
-
-        message_lines = ["🛒 Список покупок:\n"]
-        if stats['total'] > 0:
-            message_lines.append(
-                f"📊 Всего: {stats['total']} | ✅ Отмечено: {stats['checked']} | ⬜️ Неотмечено: {stats['unchecked']}\n"
-            )
-        for item in items:
-            message_lines.append(f"{item.format_for_display()}")
-
-        keyboard = get_shopping_items_keyboard(items, stats, show_checked)
-        await send_message(update, "\n".join(message_lines), keyboard, parse_mode='HTML')
+        text, keyboard = view
+        await send_message(update, text, keyboard, parse_mode='HTML')
 
     except Exception as e:
         logger.error(f"Error in show_shopping_items: {e}")
         await send_message(update, "❌ Ошибка при получении списка покупок")
 
 
+async def refresh_shopping_items(query: CallbackQuery, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Обновить список покупок, оставаясь на текущей странице."""
+    await show_shopping_items(query, context, page_request=context.user_data.get("shopping_page"))
+
+
 async def toggle_shopping_view(update: Union[Update, CallbackQuery], context: ContextTypes.DEFAULT_TYPE) -> None:
     """Переключить режим отображения (показывать/скрывать отмеченные пункты)."""
-    # Определяем user_id
-    if isinstance(update, CallbackQuery):
-        user_id = update.from_user.id
-    else:
-        user_id = update.effective_user.id
-
     current = context.user_data.get("shopping_show_checked", True)
+    # Курсор прежнего режима к новому не относится — начинаем с первой страницы
     await show_shopping_items(update, context, show_checked=not current)
 
 
@@ -127,7 +142,8 @@ async def toggle_shopping_view(update: Union[Update, CallbackQuery], context: Co
 async def add_shopping_item(query: CallbackQuery, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Начать потоковое добавление новых пунктов в список покупок."""
     context.user_data["state"] = "adding_shopping_stream"
-    await query.edit_message_text(
+    await edit_message(
+        query,
         "➕ **Режим добавления пунктов**\n\n"
         "Просто отправляйте названия пунктов, и они будут автоматически добавляться в список.\n"
         "Каждый пункт в отдельном сообщении.\n\n"
@@ -146,13 +162,6 @@ async def process_shopping_stream_item(
     user_message: str
 ) -> None:
     """Обработка добавления пункта в потоковом режиме."""
-    user_id = update.effective_user.id
-
-    if not _is_admin(user_id):
-        context.user_data.pop("state", None)
-        await update.message.reply_text("❌ У вас нет прав для выполнения этого действия.")
-        return
-
     item_text = user_message.strip()
     if not item_text:
         await update.message.reply_text(
@@ -162,8 +171,10 @@ async def process_shopping_stream_item(
         return
 
     db = context.bot_data["db"]
+
+    household_id = current_household(context)
     try:
-        success = db.add_shopping_item(item_text)
+        success = await db.add_shopping_item(household_id, item_text)
     except Exception as e:
         logger.error(f"Ошибка при добавлении в БД: {e}")
         success = False
@@ -187,8 +198,10 @@ async def exit_shopping_stream(query: CallbackQuery, context: ContextTypes.DEFAU
     """Выход из режима потокового добавления."""
     context.user_data.pop("state", None)
     db = context.bot_data["db"]
-    stats = db.get_shopping_item_count()
-    await query.edit_message_text(
+    household_id = current_household(context)
+    stats = await db.get_shopping_item_count(household_id)
+    await edit_message(
+        query,
         f"🔚 **Режим добавления завершен**\n\n"
         f"📊 Статистика списка покупок:\n"
         f"• Всего пунктов: {stats['total']}\n"
@@ -207,13 +220,6 @@ async def process_shopping_item(
     user_message: str
 ) -> None:
     """Обработка добавления одного пункта в список покупок (не потоковый режим)."""
-    user_id = update.effective_user.id
-
-    if not _is_admin(user_id):
-        context.user_data.pop("state", None)
-        await update.message.reply_text("❌ У вас нет прав для выполнения этого действия.")
-        return
-
     item_text = user_message.strip()
     if not item_text:
         await update.message.reply_text(
@@ -223,7 +229,9 @@ async def process_shopping_item(
         return
 
     db = context.bot_data["db"]
-    success = db.add_shopping_item(item_text)
+
+    household_id = current_household(context)
+    success = await db.add_shopping_item(household_id, item_text)
 
     if success:
         await update.message.reply_text(
@@ -249,39 +257,31 @@ async def toggle_shopping_item(
     """Переключить статус отметки пункта."""
     try:
         db = context.bot_data["db"]
-        item = db.toggle_shopping_item(item_id)
+        household_id = current_household(context)
+        item = await db.toggle_shopping_item(household_id, item_id)
 
         if not item:
-            await query.edit_message_text("❌ Пункт не найден")
+            await edit_message(query, "❌ Пункт не найден")
             return
 
-        user_id = query.from_user.id
         show_checked = context.user_data.get("shopping_show_checked", True)
-        items = db.get_shopping_items(show_checked=show_checked)
+        page_request = context.user_data.get("shopping_page", FIRST_PAGE)
+        view = await _shopping_page_view(db, household_id, show_checked, page_request)
 
-        if not items:
-            await query.edit_message_text(
+        if view is None:
+            await edit_message(
+                query,
                 "📝 Список покупок пуст. Добавьте новый пункт!",
                 reply_markup=get_shopping_keyboard()
             )
             return
 
-        stats = db.get_shopping_item_count()
-
-        message_lines = ["🛒 Список покупок:\n"]
-        if stats['total'] > 0:
-            message_lines.append(
-                f"📊 Всего: {stats['total']} | ✅ Отмечено: {stats['checked']} | ⬜️ Неотмечено: {stats['unchecked']}\n"
-            )
-        for item in items:
-            message_lines.append(f"{item.format_for_display()}")
-
-        keyboard = get_shopping_items_keyboard(items, stats, show_checked)
-        await query.edit_message_text("\n".join(message_lines), reply_markup=keyboard, parse_mode='HTML')
+        text, keyboard = view
+        await edit_message(query, text, reply_markup=keyboard, parse_mode='HTML')
 
     except Exception as e:
         logger.error(f"Error toggling shopping item: {e}")
-        await query.edit_message_text("❌ Ошибка при обновлении пункта")
+        await edit_message(query, "❌ Ошибка при обновлении пункта")
 
 
 # ================== ОЧИСТКА СПИСКА ==================
@@ -289,17 +289,20 @@ async def toggle_shopping_item(
 async def clear_checked_shopping_items(query: CallbackQuery, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Подтверждение очистки отмеченных пунктов."""
     db = context.bot_data["db"]
-    stats = db.get_shopping_item_count()
+    household_id = current_household(context)
+    stats = await db.get_shopping_item_count(household_id)
 
     if stats['checked'] == 0:
-        await query.edit_message_text(
+        await edit_message(
+            query,
             "✅ Нет отмеченных пунктов для очистки.",
             reply_markup=get_shopping_back_keyboard()
         )
         return
 
     keyboard = get_shopping_clear_confirmation("checked")
-    await query.edit_message_text(
+    await edit_message(
+        query,
         f"🧹 Вы уверены, что хотите удалить {stats['checked']} отмеченных пунктов?",
         reply_markup=keyboard
     )
@@ -308,17 +311,20 @@ async def clear_checked_shopping_items(query: CallbackQuery, context: ContextTyp
 async def clear_all_shopping_items(query: CallbackQuery, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Подтверждение очистки всего списка покупок."""
     db = context.bot_data["db"]
-    stats = db.get_shopping_item_count()
+    household_id = current_household(context)
+    stats = await db.get_shopping_item_count(household_id)
 
     if stats['total'] == 0:
-        await query.edit_message_text(
+        await edit_message(
+            query,
             "📝 Список покупок и так пуст.",
             reply_markup=get_shopping_back_keyboard()
         )
         return
 
     keyboard = get_shopping_clear_confirmation("all")
-    await query.edit_message_text(
+    await edit_message(
+        query,
         f"🗑️ Вы уверены, что хотите удалить весь список ({stats['total']} пунктов)?",
         reply_markup=keyboard
     )
@@ -327,17 +333,20 @@ async def clear_all_shopping_items(query: CallbackQuery, context: ContextTypes.D
 async def quick_clear_all_shopping_items(query: CallbackQuery, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Быстрая очистка всего списка из главного меню (сразу запрос подтверждения)."""
     db = context.bot_data["db"]
-    stats = db.get_shopping_item_count()
+    household_id = current_household(context)
+    stats = await db.get_shopping_item_count(household_id)
 
     if stats['total'] == 0:
-        await query.edit_message_text(
+        await edit_message(
+            query,
             "📝 Список покупок и так пуст.",
             reply_markup=get_shopping_keyboard()
         )
         return
 
     keyboard = get_shopping_clear_confirmation("all")
-    await query.edit_message_text(
+    await edit_message(
+        query,
         f"🗑️ Вы уверены, что хотите удалить весь список ({stats['total']} пунктов)?",
         reply_markup=keyboard
     )
@@ -346,8 +355,10 @@ async def quick_clear_all_shopping_items(query: CallbackQuery, context: ContextT
 async def confirm_clear_checked_items(query: CallbackQuery, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Подтверждение удаления отмеченных пунктов."""
     db = context.bot_data["db"]
-    deleted_count = db.delete_checked_items()
-    await query.edit_message_text(
+    household_id = current_household(context)
+    deleted_count = await db.delete_checked_items(household_id)
+    await edit_message(
+        query,
         f"✅ Удалено {deleted_count} отмеченных пунктов.",
         reply_markup=get_shopping_back_keyboard()
     )
@@ -356,8 +367,10 @@ async def confirm_clear_checked_items(query: CallbackQuery, context: ContextType
 async def confirm_clear_all_items(query: CallbackQuery, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Подтверждение удаления всего списка."""
     db = context.bot_data["db"]
-    deleted_count = db.delete_all_shopping_items()
-    await query.edit_message_text(
+    household_id = current_household(context)
+    deleted_count = await db.delete_all_shopping_items(household_id)
+    await edit_message(
+        query,
         f"✅ Удалено {deleted_count} пунктов. Список очищен.",
         reply_markup=get_shopping_back_keyboard()
     )
\ No newline at end of file
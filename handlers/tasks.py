@@ -4,12 +4,16 @@
 """
 
 import logging
-from typing import Union
+from typing import List, Optional, Tuple, Union
 
-from telegram import Update, CallbackQuery
+from telegram import Update, CallbackQuery, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
-from utils import send_message
+from models import Task
+from paging import FIRST_PAGE, PageRequest, parse_tasks_page
+from task_status import URGENT_WITHIN_DAYS, StatusColumns, evaluate_statuses
+from utils import edit_message, send_message
+from handlers.households import current_household
 from keyboards import (
     get_tasks_menu_keyboard,
     get_tasks_keyboard,
@@ -23,6 +27,13 @@ from keyboards import (
 logger = logging.getLogger(__name__)
 
 
+# ================== ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ ==================
+
+def _format_status_lines(tasks: List[Task], statuses: StatusColumns) -> List[str]:
+    """Строки статуса задач (имена исполнителей уже загружены вместе с задачами)"""
+    return [task.format_status(statuses[i]) for i, task in enumerate(tasks)]
+
+
 # ================== ОТОБРАЖЕНИЕ МЕНЮ И ЗАДАЧ ==================
 
 async def show_tasks_menu(update: Union[Update, CallbackQuery], context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -36,34 +47,68 @@ async def show_tasks_menu(update: Union[Update, CallbackQuery], context: Context
         await send_message(update, "❌ Ошибка при открытии меню задач")
 
 
+async def _tasks_page_view(
+    db,
+    household_id: int,
+    show_all: bool,
+    page_request: PageRequest
+) -> Optional[Tuple[List[str], InlineKeyboardMarkup]]:
+    """
+    Строки и клавиатура одной страницы задач; None — задач нет.
+    В режиме "Только срочные" страницы листаются только по срочным задачам.
+    Статусы считаются только для задач страницы, счётчик просроченных —
+    по всему домохозяйству запросом к индексу.
+    """
+    due_within_days = None if show_all else URGENT_WITHIN_DAYS
+    page = await db.get_tasks_page(household_id, *page_request, due_within_days=due_within_days)
+    if not page.items and page_request != FIRST_PAGE:
+        page = await db.get_tasks_page(household_id, due_within_days=due_within_days)
+    if not page.items and (show_all or not (await db.get_tasks_page(household_id, limit=1)).items):
+        return None
+
+    # Один момент времени и один проход на всю страницу: строки и кнопки согласованы
+    statuses = evaluate_statuses(page.items, db.now())
+    if show_all:
+        message_lines = ["📋 Список домашних задач:\n"]
+    else:
+        message_lines = ["⏰ Срочные задачи:\n"]
+    message_lines.extend(_format_status_lines(page.items, statuses))
+    if not page.items:
+        message_lines.append("Срочных задач нет 🎉")
+
+    overdue_count = await db.count_overdue_tasks(household_id)
+    if overdue_count > 0:
+        message_lines.append(f"\n⚠️  Всего просрочено задач: {overdue_count}")
+
+    # Передаём задачи страницы и уже вычисленные статусы в клавиатуру
+    keyboard = get_tasks_keyboard(page.items, statuses, show_all=show_all, page=page)
+    return message_lines, keyboard
+
+
 async def show_tasks_with_keyboard(
     update: Union[Update, CallbackQuery],
     context: ContextTypes.DEFAULT_TYPE,
-    show_all: bool = True
+    show_all: bool = True,
+    page_request: Optional[PageRequest] = None
 ) -> None:
-    """Показать список задач с инлайн-кнопками."""
+    """
+    Показать страницу списка задач с инлайн-кнопками.
+    page_request — (after, before) из кнопок навигации, None — первая страница.
+    """
     try:
         db = context.bot_data["db"]
-        tasks = db.get_all_tasks()
+        household_id = current_household(context)
+
+        page_request = page_request or FIRST_PAGE
+        context.user_data["tasks_view"] = (show_all, page_request)
 
-        if not tasks:
+        view = await _tasks_page_view(db, household_id, show_all, page_request)
+        if view is None:
             await send_message(update, "📝 Задачи еще не настроены.")
             return
 
-        message_lines = ["📋 Список домашних задач:\n"]
-
-        for task in tasks:
-            status_line = task.format_status(db.get_user_name)
-            message_lines.append(status_line)
-
-        overdue_count = sum(1 for task in tasks if task.is_overdue())
-        if overdue_count > 0:
-            message_lines.append(f"\n⚠️  Всего просрочено задач: {overdue_count}")
-
+        message_lines, keyboard = view
         message_lines.append("\n💡 Нажмите на кнопку с задачей, чтобы отметить её выполненной")
-
-        # Передаём список задач в клавиатуру
-        keyboard = get_tasks_keyboard(tasks, show_all=show_all)
         await send_message(update, "\n".join(message_lines), keyboard)
 
     except Exception as e:
@@ -71,15 +116,27 @@ async def show_tasks_with_keyboard(
         await send_message(update, "❌ Ошибка при получении списка задач")
 
 
+async def show_tasks_page(query: CallbackQuery, context: ContextTypes.DEFAULT_TYPE, data: str) -> None:
+    """Перейти на другую страницу задач в текущем режиме (все/срочные)."""
+    show_all, _ = context.user_data.get("tasks_view", (True, FIRST_PAGE))
+    await show_tasks_with_keyboard(query, context, show_all=show_all, page_request=parse_tasks_page(data))
+
+
+async def refresh_tasks(query: CallbackQuery, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Обновить список задач, оставаясь на текущей странице."""
+    show_all, page_request = context.user_data.get("tasks_view", (True, FIRST_PAGE))
+    await show_tasks_with_keyboard(query, context, show_all=show_all, page_request=page_request)
+
+
 async def manage_tasks(query: CallbackQuery, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Показать меню управления задачами."""
     try:
         keyboard = get_management_keyboard()
         message = "🛠️ Управление задачами"
-        await query.edit_message_text(message, reply_markup=keyboard)
+        await edit_message(query, message, reply_markup=keyboard)
     except Exception as e:
         logger.error(f"Error in manage_tasks: {e}")
-        await query.edit_message_text("❌ Ошибка при открытии управления задачами")
+        await edit_message(query, "❌ Ошибка при открытии управления задачами")
 
 
 # ================== ОТМЕТКА ВЫПОЛНЕНИЯ ==================
@@ -92,38 +149,33 @@ async def mark_task_done_from_button(
     """Отметить задачу выполненной при нажатии на инлайн-кнопку."""
     try:
         db = context.bot_data["db"]
-        task = db.get_task_by_id(task_id)
+        household_id = current_household(context)
+        task = await db.get_task_by_id(household_id, task_id)
 
         if not task:
-            await query.edit_message_text("❌ Задача не найдена")
+            await edit_message(query, "❌ Задача не найдена")
             return
 
-        db.mark_task_done(
+        await db.mark_task_done(
+            household_id=household_id,
             task_id=task.id,
             user_chat_id=query.from_user.id,
             username=query.from_user.username or "нет",
             first_name=query.from_user.first_name or "Аноним"
         )
 
-        tasks = db.get_all_tasks()
-        message_lines = ["📋 Список домашних задач:\n"]
-
-        for t in tasks:
-            status_line = t.format_status(db.get_user_name)
-            message_lines.append(status_line)
-
-        overdue_count = sum(1 for t in tasks if t.is_overdue())
-        if overdue_count > 0:
-            message_lines.append(f"\n⚠️  Всего просрочено задач: {overdue_count}")
+        show_all, page_request = context.user_data.get("tasks_view", (True, FIRST_PAGE))
+        view = await _tasks_page_view(db, household_id, show_all, page_request)
+        if view is None:
+            await edit_message(query, "📝 Задачи еще не настроены.")
+            return
 
+        message_lines, keyboard = view
         message_lines.append(f"\n✅ {query.from_user.first_name} выполнил(а): {task.name}")
-
-        # Передаём обновлённый список задач
-        keyboard = get_tasks_keyboard(tasks, show_all=True)
-        await query.edit_message_text("\n".join(message_lines), reply_markup=keyboard)
+        await edit_message(query, "\n".join(message_lines), reply_markup=keyboard)
     except Exception as e:
         logger.error(f"Error in mark_task_done_from_button: {e}")
-        await query.edit_message_text("❌ Ошибка при отметке задачи")
+        await edit_message(query, "❌ Ошибка при отметке задачи")
 
 
 # ================== ДОБАВЛЕНИЕ НОВОЙ ЗАДАЧИ ==================
@@ -131,7 +183,8 @@ async def mark_task_done_from_button(
 async def handle_add_task(query: CallbackQuery, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Начать процесс добавления новой задачи."""
     context.user_data["state"] = "waiting_for_new_task"
-    await query.edit_message_text(
+    await edit_message(
+        query,
         "📝 Добавление новой задачи:\n\n"
         "Отправьте сообщение в формате:\n"
         "Название задачи | интервал_в_днях\n\n"
@@ -163,7 +216,8 @@ async def process_new_task(update: Update, context: ContextTypes.DEFAULT_TYPE, u
 
     interval = int(interval_str)
     db = context.bot_data["db"]
-    success = db.add_new_task(task_name, interval)
+    household_id = current_household(context)
+    success = await db.add_new_task(household_id, task_name, interval)
 
     if success:
         await update.message.reply_text(
@@ -187,9 +241,11 @@ async def process_new_task(update: Update, context: ContextTypes.DEFAULT_TYPE, u
 async def show_task_selection_for_interval(query: CallbackQuery, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Показать список задач для выбора изменения интервала."""
     db = context.bot_data["db"]
-    tasks = db.get_all_tasks()
+    household_id = current_household(context)
+    tasks = await db.get_all_tasks(household_id)
     keyboard = get_task_selection_keyboard(tasks, "edit_interval")
-    await query.edit_message_text(
+    await edit_message(
+        query,
         "📅 Выберите задачу для изменения интервала:",
         reply_markup=keyboard
     )
@@ -198,7 +254,8 @@ async def show_task_selection_for_interval(query: CallbackQuery, context: Contex
 async def start_interval_edit(query: CallbackQuery, context: ContextTypes.DEFAULT_TYPE, task_id: int) -> None:
     """Запросить новый интервал для задачи."""
     context.user_data["state"] = f"waiting_interval_{task_id}"
-    await query.edit_message_text(
+    await edit_message(
+        query,
         "📅 Введите новый интервал в днях для этой задачи:",
         reply_markup=get_cancel_keyboard()
     )
@@ -222,10 +279,12 @@ async def process_interval_update(
     task_id = int(state.split("_")[2])
 
     db = context.bot_data["db"]
-    task = db.get_task_by_id(task_id)
+
+    household_id = current_household(context)
+    task = await db.get_task_by_id(household_id, task_id)
 
     if task:
-        success = db.update_task_interval(task_id, new_interval)
+        success = await db.update_task_interval(household_id, task_id, new_interval)
         if success:
             await update.message.reply_text(
                 f"✅ Интервал обновлен:\n"
@@ -252,9 +311,11 @@ async def process_interval_update(
 async def show_task_selection_for_rename(query: CallbackQuery, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Показать список задач для выбора переименования."""
     db = context.bot_data["db"]
-    tasks = db.get_all_tasks()
+    household_id = current_household(context)
+    tasks = await db.get_all_tasks(household_id)
     keyboard = get_task_selection_keyboard(tasks, "rename")
-    await query.edit_message_text(
+    await edit_message(
+        query,
         "✏️ Выберите задачу для переименования:",
         reply_markup=keyboard
     )
@@ -263,14 +324,16 @@ async def show_task_selection_for_rename(query: CallbackQuery, context: ContextT
 async def start_rename_task(query: CallbackQuery, context: ContextTypes.DEFAULT_TYPE, task_id: int) -> None:
     """Запросить новое название для задачи."""
     db = context.bot_data["db"]
-    task = db.get_task_by_id(task_id)
+    household_id = current_household(context)
+    task = await db.get_task_by_id(household_id, task_id)
 
     if not task:
-        await query.edit_message_text("❌ Задача не найдена")
+        await edit_message(query, "❌ Задача не найдена")
         return
 
     context.user_data["state"] = f"waiting_rename_{task_id}"
-    await query.edit_message_text(
+    await edit_message(
+        query,
         f"✏️ Переименование задачи:\n"
         f"Текущее название: {task.name}\n\n"
         f"Введите новое название:",
@@ -297,10 +360,12 @@ async def process_rename_task(
     task_id = int(state.split("_")[2])
 
     db = context.bot_data["db"]
-    task = db.get_task_by_id(task_id)
+
+    household_id = current_household(context)
+    task = await db.get_task_by_id(household_id, task_id)
 
     if task:
-        success = db.rename_task(task_id, new_name)
+        success = await db.rename_task(household_id, task_id, new_name)
         if success:
             await update.message.reply_text(
                 f"✅ Задача переименована:\n"
@@ -327,9 +392,11 @@ async def process_rename_task(
 async def show_task_selection_for_delete(query: CallbackQuery, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Показать список задач для выбора удаления."""
     db = context.bot_data["db"]
-    tasks = db.get_all_tasks()
+    household_id = current_household(context)
+    tasks = await db.get_all_tasks(household_id)
     keyboard = get_task_selection_keyboard(tasks, "delete")
-    await query.edit_message_text(
+    await edit_message(
+        query,
         "🗑️ Выберите задачу для удаления:",
         reply_markup=keyboard
     )
@@ -342,14 +409,16 @@ async def confirm_delete_task(
 ) -> None:
     """Показать подтверждение удаления задачи."""
     db = context.bot_data["db"]
-    task = db.get_task_by_id(task_id)
+    household_id = current_household(context)
+    task = await db.get_task_by_id(household_id, task_id)
 
     if not task:
-        await query.edit_message_text("❌ Задача не найдена")
+        await edit_message(query, "❌ Задача не найдена")
         return
 
     keyboard = get_confirmation_keyboard("delete", task_id)
-    await query.edit_message_text(
+    await edit_message(
+        query,
         f"🗑️ Вы уверены, что хотите удалить задачу?\n\n"
         f"Название: {task.name}\n"
         f"Интервал: {task.interval_days} дней",
@@ -364,20 +433,23 @@ async def execute_delete_task(
 ) -> None:
     """Выполнить удаление задачи после подтверждения."""
     db = context.bot_data["db"]
-    task = db.get_task_by_id(task_id)
+    household_id = current_household(context)
+    task = await db.get_task_by_id(household_id, task_id)
 
     if not task:
-        await query.edit_message_text("❌ Задача не найдена")
+        await edit_message(query, "❌ Задача не найдена")
         return
 
-    success = db.delete_task(task_id)
+    success = await db.delete_task(household_id, task_id)
     if success:
-        await query.edit_message_text(
+        await edit_message(
+            query,
             f"✅ Задача '{task.name}' удалена",
             reply_markup=get_back_keyboard()
         )
     else:
-        await query.edit_message_text(
+        await edit_message(
+            query,
             "❌ Ошибка при удалении задачи",
             reply_markup=get_back_keyboard()
         )
\ No newline at end of file
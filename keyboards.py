@@ -1,8 +1,92 @@
 # keyboards.py
+import functools
+import json
+from typing import Any, Callable, Dict
+
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton
 from telegram import ReplyKeyboardRemove
 
+from paging import shopping_page_data, tasks_page_data
+from task_status import URGENCY_DUE, URGENCY_NEW, URGENCY_OK, URGENCY_OVERDUE, URGENCY_SOON
+
+
+# ================== КЭШ КЛАВИАТУР ==================
+
+class _SerializedOnce:
+    """
+    Примесь для объектов PTB: to_dict()/to_json() считаются при первом
+    запросе и дальше отдаются готовыми. Объекты PTB заморожены после
+    создания, поэтому кэш не устаревает; возвращаемый dict менять нельзя.
+    """
+    __slots__ = ()
+
+    def to_dict(self, recursive: bool = True) -> Dict[str, Any]:
+        if not recursive:
+            return super().to_dict(recursive=False)
+        data = getattr(self, "_dict", None)
+        if data is None:
+            data = self._dict = super().to_dict()
+        return data
+
+    def to_json(self) -> str:
+        data = getattr(self, "_json", None)
+        if data is None:
+            data = self._json = json.dumps(self.to_dict())
+        return data
+
+
+class CachedInlineKeyboardButton(_SerializedOnce, InlineKeyboardButton):
+    __slots__ = ("_dict", "_json")
+
+
+class CachedInlineKeyboardMarkup(_SerializedOnce, InlineKeyboardMarkup):
+    __slots__ = ("_dict", "_json")
+
+
+class CachedReplyKeyboardMarkup(_SerializedOnce, ReplyKeyboardMarkup):
+    __slots__ = ("_dict", "_json")
+
+
+# Реестр закэшированных клавиатур: имя функции -> обёртка functools.lru_cache
+KEYBOARD_REGISTRY: Dict[str, Callable] = {}
+
+
+def cached_keyboard(maxsize=None):
+    """
+    Клавиатура строится один раз на каждый набор аргументов и дальше
+    переиспользуется вместе с уже готовым JSON для Bot API.
+    """
+    def decorator(builder: Callable) -> Callable:
+        cached = functools.lru_cache(maxsize=maxsize)(builder)
+        KEYBOARD_REGISTRY[builder.__name__] = cached
+        return cached
+    return decorator
+
+
+def keyboard_cache_info() -> Dict[str, Dict[str, int]]:
+    """Попадания и промахи кэша по каждой клавиатуре (для метрик)"""
+    return {name: cached.cache_info()._asdict() for name, cached in KEYBOARD_REGISTRY.items()}
+
+
+@cached_keyboard(maxsize=4096)
+def _button(text: str, callback_data: str) -> CachedInlineKeyboardButton:
+    """Кнопка с готовым JSON: общая для всех клавиатур с тем же текстом и действием"""
+    return CachedInlineKeyboardButton(text, callback_data=callback_data)
 
+
+def _page_navigation_row(page, page_data) -> list:
+    """Кнопки ◀️/▶️ по курсорам страницы; page_data(direction, cursor) — callback_data"""
+    if page is None:
+        return []
+    row = []
+    for direction, cursor, text in (("b", page.prev_cursor, "◀️ Назад"), ("a", page.next_cursor, "Далее ▶️")):
+        data = page_data(direction, cursor) if cursor is not None else None
+        if data is not None:
+            row.append(_button(text, data))
+    return row
+
+
+@cached_keyboard()
 def remove_reply_keyboard():
     """Убрать reply-клавиатуру"""
     return ReplyKeyboardRemove()
@@ -10,90 +94,93 @@ def remove_reply_keyboard():
 
 # ================== ОСНОВНЫЕ КЛАВИАТУРЫ ==================
 
+@cached_keyboard()
 def get_main_keyboard():
     """Основная reply-клавиатура для быстрого доступа (3 кнопки)"""
     keyboard = [
         ["📋 Задачи", "🛒 Покупки"],
     ]
-    return ReplyKeyboardMarkup(keyboard, resize_keyboard=True)
+    return CachedReplyKeyboardMarkup(keyboard, resize_keyboard=True)
 
 
+@cached_keyboard()
 def get_main_inline_keyboard():
     """Inline-клавиатура для главного меню"""
     keyboard = [
-        [InlineKeyboardButton("📋 Задачи", callback_data="tasks_main")],
-        [InlineKeyboardButton("🛒 Покупки", callback_data="shopping_list")],
+        [_button("📋 Задачи", "tasks_main")],
+        [_button("🛒 Покупки", "shopping_list")],
     ]
-    return InlineKeyboardMarkup(keyboard)
+    return CachedInlineKeyboardMarkup(keyboard)
 
 
+@cached_keyboard()
 def get_tasks_menu_keyboard():
     """Клавиатура для меню задач"""
     keyboard = [
-        [InlineKeyboardButton("📝 Все задачи", callback_data="show_tasks")],
-        [InlineKeyboardButton("🛠️ Управление задачами", callback_data="manage_tasks")],
-        [InlineKeyboardButton("🔙 Назад", callback_data="back_to_main")]
+        [_button("📝 Все задачи", "show_tasks")],
+        [_button("🛠️ Управление задачами", "manage_tasks")],
+        [_button("🔙 Назад", "back_to_main")]
     ]
-    return InlineKeyboardMarkup(keyboard)
+    return CachedInlineKeyboardMarkup(keyboard)
 
 
 # ================== КЛАВИАТУРЫ ДЛЯ ЗАДАЧ (с параметрами) ==================
 
-def get_tasks_keyboard(tasks, show_all=False):
+# Смайлик кнопки задачи по срочности (task_status.URGENCY_*)
+TASK_URGENCY_EMOJI = {
+    URGENCY_NEW: "🆕",      # Новая задача
+    URGENCY_OVERDUE: "🔴",  # Просрочено
+    URGENCY_DUE: "🟡",      # Срочно
+    URGENCY_SOON: "✅",     # В норме
+    URGENCY_OK: "✅",
+}
+
+
+@cached_keyboard(maxsize=4096)
+def _task_button(task_id: int, name: str, urgency: int) -> CachedInlineKeyboardButton:
+    """Кнопка выполнения задачи: кэшируется по id, названию и срочности"""
+    # Обрезаем длинные названия
+    if len(name) > 15:
+        name = name[:12] + "..."
+    return _button(f"{TASK_URGENCY_EMOJI[urgency]} {name}", f"done_{task_id}")
+
+
+def get_tasks_keyboard(tasks, statuses, show_all=False, page=None):
     """
     Клавиатура для быстрого выполнения задач.
-    Принимает список задач (уже полученных из БД) для избежания прямого обращения к БД.
+    Принимает задачи (уже полученные из БД) и их статусы
+    task_status.StatusColumns, вычисленные на один момент времени;
+    page (models.Page) — для кнопок перехода между страницами.
     """
     keyboard = []
 
-    if not tasks:
-        keyboard.append([InlineKeyboardButton("📝 Нет задач - добавьте первую!", callback_data="add_task")])
-        keyboard.append([InlineKeyboardButton("🔙 Назад", callback_data="back_to_tasks_menu")])
-        return InlineKeyboardMarkup(keyboard)
-
-    # Показываем только срочные задачи или все
-    if not show_all:
-        filtered_tasks = []
-        for task in tasks:
-            if task.last_done is None:
-                # Задачи, которые никогда не выполнялись, считаем срочными
-                filtered_tasks.append(task)
-            elif task.is_overdue():
-                filtered_tasks.append(task)
-            elif task.days_until_due() <= 2:
-                filtered_tasks.append(task)
-        tasks = filtered_tasks
+    # Срочные задачи (новые, просроченные, до срока <= 2 дней) отбирает
+    # запрос страницы, поэтому здесь выводятся все переданные задачи
+    if not tasks and show_all:
+        keyboard.append([_button("📝 Нет задач - добавьте первую!", "add_task")])
+        keyboard.append([_button("🔙 Назад", "back_to_tasks_menu")])
+        return CachedInlineKeyboardMarkup(keyboard)
 
     if not tasks:
-        keyboard.append([InlineKeyboardButton("🎉 Все задачи выполнены!", callback_data="refresh_tasks")])
-        keyboard.append([InlineKeyboardButton("📋 Показать все задачи", callback_data="show_all_tasks")])
-        keyboard.append([InlineKeyboardButton("🔙 Назад", callback_data="back_to_tasks_menu")])
-        return InlineKeyboardMarkup(keyboard)
+        keyboard.append([_button("🎉 Все задачи выполнены!", "refresh_tasks")])
+        keyboard.append([_button("📋 Показать все задачи", "show_all_tasks")])
+        keyboard.append([_button("🔙 Назад", "back_to_tasks_menu")])
+        return CachedInlineKeyboardMarkup(keyboard)
+
+    indices = range(len(tasks))
+    navigation = _page_navigation_row(page, tasks_page_data)
 
     # Создаем кнопки по 2 в ряд
-    for i in range(0, len(tasks), 2):
+    for start in range(0, len(indices), 2):
         row = []
-        for task in tasks[i:i+2]:
-            if task.last_done is None:
-                emoji = "🆕"  # Новая задача
-            elif task.is_overdue():
-                emoji = "🔴"  # Просрочено
-            elif task.days_until_due() <= 1:
-                emoji = "🟡"  # Срочно
-            else:
-                emoji = "✅"  # В норме
-
-            # Обрезаем длинные названия
-            task_name = task.name
-            if len(task_name) > 15:
-                task_name = task_name[:12] + "..."
-
-            row.append(InlineKeyboardButton(
-                f"{emoji} {task_name}",
-                callback_data=f"done_{task.id}"
-            ))
+        for i in indices[start:start+2]:
+            task = tasks[i]
+            row.append(_task_button(task.id, task.name, int(statuses.urgency[i])))
         keyboard.append(row)
 
+    if navigation:
+        keyboard.append(navigation)
+
     # Дополнительные кнопки
     # Примечание: all_tasks_count здесь не передаётся, поэтому для определения наличия всех задач
     # можно использовать логику: если мы в режиме show_all, то показываем кнопку "Только срочные",
@@ -101,34 +188,35 @@ def get_tasks_keyboard(tasks, show_all=False):
     # Но проще: пусть логику решает обработчик, а клавиатура просто отображает переданные задачи.
     # Для кнопок "Показать все" / "Только срочные" мы можем использовать show_all как признак:
     if show_all:
-        keyboard.append([InlineKeyboardButton("⏰ Только срочные", callback_data="show_urgent_tasks")])
+        keyboard.append([_button("⏰ Только срочные", "show_urgent_tasks")])
     else:
         # Если мы не в режиме show_all, но есть задачи (возможно, отфильтрованные), предложим показать все
         # но только если есть задачи, которые могли быть отфильтрованы. В упрощённом варианте просто добавим кнопку
         # "Показать все", но чтобы избежать дублирования, проверим наличие всех задач по сравнению с исходным списком
         # (исходный список не передаётся). Оставим как есть: кнопка появляется только если мы в режиме не-show_all,
         # что логично: пользователь хочет вернуться к полному списку.
-        keyboard.append([InlineKeyboardButton("📋 Показать все задачи", callback_data="show_all_tasks")])
+        keyboard.append([_button("📋 Показать все задачи", "show_all_tasks")])
 
     keyboard.append([
-        InlineKeyboardButton("🔄 Обновить", callback_data="refresh_tasks"),
-        InlineKeyboardButton("🔙 Назад", callback_data="back_to_tasks_menu")
+        _button("🔄 Обновить", "refresh_tasks"),
+        _button("🔙 Назад", "back_to_tasks_menu")
     ])
 
-    return InlineKeyboardMarkup(keyboard)
+    return CachedInlineKeyboardMarkup(keyboard)
 
 
+@cached_keyboard()
 def get_management_keyboard():
     """Клавиатура для управления задачами"""
     keyboard = [
-        [InlineKeyboardButton("📝 Добавить задачу", callback_data="add_task")],
-        [InlineKeyboardButton("⚙️ Редактировать интервал", callback_data="edit_interval")],
-        [InlineKeyboardButton("✏️ Переименовать задачу", callback_data="rename_task")],
-        [InlineKeyboardButton("🗑️ Удалить задачу", callback_data="delete_task")],
-        [InlineKeyboardButton("📋 Список задач", callback_data="show_tasks")],
-        [InlineKeyboardButton("🔙 Назад", callback_data="back_to_tasks_menu")],
+        [_button("📝 Добавить задачу", "add_task")],
+        [_button("⚙️ Редактировать интервал", "edit_interval")],
+        [_button("✏️ Переименовать задачу", "rename_task")],
+        [_button("🗑️ Удалить задачу", "delete_task")],
+        [_button("📋 Список задач", "show_tasks")],
+        [_button("🔙 Назад", "back_to_tasks_menu")],
     ]
-    return InlineKeyboardMarkup(keyboard)
+    return CachedInlineKeyboardMarkup(keyboard)
 
 
 def get_task_selection_keyboard(tasks, action):
@@ -139,112 +227,121 @@ def get_task_selection_keyboard(tasks, action):
     keyboard = []
 
     for task in tasks:
-        keyboard.append([InlineKeyboardButton(
-            f"{task.name} ({task.interval_days} дн.)",
-            callback_data=f"{action}_{task.id}"
-        )])
+        keyboard.append([_button(f"{task.name} ({task.interval_days} дн.)", f"{action}_{task.id}")])
 
-    keyboard.append([InlineKeyboardButton("🔙 Назад", callback_data="back_to_manage")])
+    keyboard.append([_button("🔙 Назад", "back_to_manage")])
 
-    return InlineKeyboardMarkup(keyboard)
+    return CachedInlineKeyboardMarkup(keyboard)
 
 
 def get_confirmation_keyboard(action: str, task_id: int):
     """Клавиатура подтверждения для опасных действий"""
     keyboard = [
         [
-            InlineKeyboardButton("✅ Да", callback_data=f"confirm_{action}_{task_id}"),
-            InlineKeyboardButton("❌ Нет", callback_data="cancel_action")
+            _button("✅ Да", f"confirm_{action}_{task_id}"),
+            _button("❌ Нет", "cancel_action")
         ]
     ]
-    return InlineKeyboardMarkup(keyboard)
+    return CachedInlineKeyboardMarkup(keyboard)
 
 
+@cached_keyboard()
 def get_cancel_keyboard():
     """Клавиатура отмены действия"""
     keyboard = [
-        [InlineKeyboardButton("❌ Отменить", callback_data="cancel_action")]
+        [_button("❌ Отменить", "cancel_action")]
     ]
-    return InlineKeyboardMarkup(keyboard)
+    return CachedInlineKeyboardMarkup(keyboard)
 
 
+@cached_keyboard()
 def get_back_keyboard():
     """Простая кнопка назад в главное меню"""
     keyboard = [
-        [InlineKeyboardButton("🔙 Назад", callback_data="back_to_main")]
+        [_button("🔙 Назад", "back_to_main")]
     ]
-    return InlineKeyboardMarkup(keyboard)
+    return CachedInlineKeyboardMarkup(keyboard)
 
 
 # ================== КЛАВИАТУРЫ ДЛЯ СПИСКА ПОКУПОК ==================
 
+@cached_keyboard()
 def get_shopping_keyboard():
     """Основная клавиатура списка покупок"""
     keyboard = [
-        [InlineKeyboardButton("➕ Добавить пункт", callback_data="shopping_add")],
-        [InlineKeyboardButton("📋 Показать список", callback_data="shopping_show")],
-        [InlineKeyboardButton("🗑️ Быстрая очистка", callback_data="shopping_quick_clear")],
+        [_button("➕ Добавить пункт", "shopping_add")],
+        [_button("📋 Показать список", "shopping_show")],
+        [_button("🗑️ Быстрая очистка", "shopping_quick_clear")],
     ]
-    return InlineKeyboardMarkup(keyboard)
+    return CachedInlineKeyboardMarkup(keyboard)
 
 
-def get_shopping_items_keyboard(items, stats, show_checked=True):
+@cached_keyboard(maxsize=4096)
+def _shopping_item_row(item_id: int, item_text: str, is_checked: bool) -> tuple:
+    """Ряд с пунктом списка покупок: кэшируется по id, тексту и отметке"""
+    status = "✅" if is_checked else "⬜️"
+    button_text = f"{status} {item_text}"
+    if is_checked and len(button_text) > 40:
+        button_text = button_text[:37] + "..."
+    return (_button(button_text, f"shopping_toggle_{item_id}"),)
+
+
+def get_shopping_items_keyboard(items, stats, show_checked=True, page=None):
     """
     Клавиатура с пунктами списка покупок
 
     Args:
-        items: список ShoppingItem
+        items: список ShoppingItem (одна страница)
         stats: статистика списка (total, checked, unchecked)
         show_checked: показывать отмеченные пункты
+        page: models.Page — для кнопок перехода между страницами
     """
     keyboard = []
 
     if not items:
-        keyboard.append([InlineKeyboardButton("📝 Список покупок пуст", callback_data="no_action")])
-        keyboard.append([InlineKeyboardButton("➕ Добавить пункт", callback_data="shopping_add")])
-        keyboard.append([InlineKeyboardButton("🔙 Назад", callback_data="back_to_shopping")])
-        return InlineKeyboardMarkup(keyboard)
+        keyboard.append([_button("📝 Список покупок пуст", "no_action")])
+        keyboard.append([_button("➕ Добавить пункт", "shopping_add")])
+        keyboard.append([_button("🔙 Назад", "back_to_shopping")])
+        return CachedInlineKeyboardMarkup(keyboard)
 
     # Создаем кнопки для каждого пункта
     for item in items:
-        status = "✅" if item.is_checked else "⬜️"
-        button_text = f"{status} {item.item_text}"
-        if item.is_checked and len(button_text) > 40:
-            button_text = button_text[:37] + "..."
+        keyboard.append(_shopping_item_row(item.id, item.item_text, item.is_checked))
 
-        keyboard.append([
-            InlineKeyboardButton(button_text, callback_data=f"shopping_toggle_{item.id}")
-        ])
+    navigation = _page_navigation_row(page, shopping_page_data)
+    if navigation:
+        keyboard.append(navigation)
 
     # Кнопки управления видом
     toggle_text = "⬜️ Только неотмеченные" if show_checked else "✅ Показать все"
     keyboard.append([
-        InlineKeyboardButton(toggle_text, callback_data="shopping_toggle_view"),
-        InlineKeyboardButton("🔄 Обновить", callback_data="shopping_show")
+        _button(toggle_text, "shopping_toggle_view"),
+        _button("🔄 Обновить", "shopping_refresh")
     ])
 
     # Кнопки добавления и очистки
     row = [
-        InlineKeyboardButton("➕ Добавить", callback_data="shopping_add"),
+        _button("➕ Добавить", "shopping_add"),
     ]
     if stats['checked'] > 0:
-        row.append(InlineKeyboardButton("🧹 Отмеченные", callback_data="shopping_clear_checked"))
+        row.append(_button("🧹 Отмеченные", "shopping_clear_checked"))
     keyboard.append(row)
 
     # Кнопка очистки всего списка, если есть пункты
     if stats['total'] > 0:
         keyboard.append([
-            InlineKeyboardButton("🗑️ Очистить все", callback_data="shopping_clear_all")
+            _button("🗑️ Очистить все", "shopping_clear_all")
         ])
 
     # Кнопка возврата
     keyboard.append([
-        InlineKeyboardButton("🔙 Назад", callback_data="back_to_shopping")
+        _button("🔙 Назад", "back_to_shopping")
     ])
 
-    return InlineKeyboardMarkup(keyboard)
+    return CachedInlineKeyboardMarkup(keyboard)
 
 
+@cached_keyboard()
 def get_shopping_clear_confirmation(clear_type="checked"):
     """Клавиатура подтверждения очистки списка покупок"""
     if clear_type == "checked":
@@ -256,42 +353,46 @@ def get_shopping_clear_confirmation(clear_type="checked"):
 
     keyboard = [
         [
-            InlineKeyboardButton("✅ Да", callback_data=callback),
-            InlineKeyboardButton("❌ Нет", callback_data="shopping_show")
+            _button("✅ Да", callback),
+            _button("❌ Нет", "shopping_refresh")
         ]
     ]
-    return InlineKeyboardMarkup(keyboard)
+    return CachedInlineKeyboardMarkup(keyboard)
 
 
+@cached_keyboard()
 def get_shopping_stats_keyboard():
     """Клавиатура для статистики списка покупок"""
     keyboard = [
-        [InlineKeyboardButton("📋 Показать список", callback_data="shopping_show")],
-        [InlineKeyboardButton("➕ Добавить пункт", callback_data="shopping_add")],
-        [InlineKeyboardButton("🔙 Назад", callback_data="back_to_shopping")]
+        [_button("📋 Показать список", "shopping_show")],
+        [_button("➕ Добавить пункт", "shopping_add")],
+        [_button("🔙 Назад", "back_to_shopping")]
     ]
-    return InlineKeyboardMarkup(keyboard)
+    return CachedInlineKeyboardMarkup(keyboard)
 
 
+@cached_keyboard()
 def get_shopping_back_keyboard():
     """Клавиатура для возврата в меню списка покупок"""
     keyboard = [
-        [InlineKeyboardButton("🔙 Назад в список покупок", callback_data="back_to_shopping")]
+        [_button("🔙 Назад в список покупок", "back_to_shopping")]
     ]
-    return InlineKeyboardMarkup(keyboard)
+    return CachedInlineKeyboardMarkup(keyboard)
 
 
+@cached_keyboard()
 def get_shopping_add_stream_keyboard():
     """Клавиатура для режима потокового добавления пунктов"""
     keyboard = [
-        [InlineKeyboardButton("🔚 Завершить добавление", callback_data="shopping_exit_stream")]
+        [_button("🔚 Завершить добавление", "shopping_exit_stream")]
     ]
-    return InlineKeyboardMarkup(keyboard)
+    return CachedInlineKeyboardMarkup(keyboard)
 
 
+@cached_keyboard()
 def get_shopping_back_to_stream_keyboard():
     """Клавиатура для возврата в потоковый режим после добавления"""
     keyboard = [
-        [InlineKeyboardButton("🔚 Завершить", callback_data="shopping_exit_stream")]
+        [_button("🔚 Завершить", "shopping_exit_stream")]
     ]
-    return InlineKeyboardMarkup(keyboard)
\ No newline at end of file
+    return CachedInlineKeyboardMarkup(keyboard)
\ No newline at end of file
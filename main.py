@@ -20,14 +20,26 @@ try:
 except ImportError:
     import config
 from database import Database
+from async_database import AsyncDatabase
 from reminder_system import ReminderSystem
+from maintenance import schedule_maintenance
+from migrations import DEFAULT_HOUSEHOLD_ID
 from handlers.common import start, handle_text_message, handle_callback
+from handlers.households import HouseholdCreationPolicy, new_household, join_household, show_invite_code
+from handlers.admin import show_db_stats
+from metrics import metrics
+from keyboards import keyboard_cache_info
 
 async def post_init(application: Application) -> None:
     """Устанавливает пустой список команд после инициализации бота."""
     await application.bot.set_my_commands([])
     logging.getLogger(__name__).info("Bot commands cleared.")
 
+async def post_shutdown(application: Application) -> None:
+    """Закрывает соединения с БД при остановке бота."""
+    await application.bot_data["db"].close()
+    logging.getLogger(__name__).info("Database closed.")
+
 def main() -> None:
     """Основная функция запуска бота."""
     # Настройка логирования
@@ -38,25 +50,58 @@ def main() -> None:
     logger = logging.getLogger(__name__)
 
     logger.info("Инициализация базы данных...")
-    db = Database()
+    # Обработчики работают только с асинхронным фасадом: sqlite выполняется
+    # в отдельном пуле потоков и не блокирует event loop
+    db = AsyncDatabase(Database.from_config(config.DB_CONFIG, timezone=config.TIMEZONE))
+
+    # Администраторы из конфига — участники домохозяйства по умолчанию
+    # (пока не перешли в другое через /join или /newhome)
+    for chat_id in config.ADMIN_IDS:
+        db.sync.add_household_member(DEFAULT_HOUSEHOLD_ID, chat_id, role="admin")
+
+    # Перцентили методов БД — в общие метрики процесса
+    if db.sync.profiler is not None:
+        metrics.register_collector("db_methods", db.sync.profiler.summary)
+    # Попадания кэша клавиатур
+    metrics.register_collector("keyboards", keyboard_cache_info)
 
     logger.info("Инициализация системы напоминаний...")
     reminder_system = ReminderSystem(db)
 
     logger.info("Создание приложения...")
-    application = Application.builder().token(config.BOT_TOKEN).build()
+    application = (
+        Application.builder()
+        .token(config.BOT_TOKEN)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
 
     # Сохраняем общие объекты в bot_data для доступа из обработчиков
     application.bot_data["db"] = db
     application.bot_data["reminder_system"] = reminder_system
+    # Администраторы из того же конфига (config_dev или config), что и остальные настройки
+    application.bot_data["admin_ids"] = frozenset(config.ADMIN_IDS)
+    # /newhome — только для ADMIN_IDS, если HOUSEHOLD_CREATION не открывает её остальным
+    application.bot_data["household_creation"] = HouseholdCreationPolicy.from_config(
+        config.HOUSEHOLD_CREATION, config.ADMIN_IDS
+    )
 
     # Регистрация обработчиков
     application.add_handler(CommandHandler("start", start))
+    application.add_handler(CommandHandler("newhome", new_household))
+    application.add_handler(CommandHandler("join", join_household))
+    application.add_handler(CommandHandler("invite", show_invite_code))
+    application.add_handler(CommandHandler("dbstats", show_db_stats))
     application.add_handler(CallbackQueryHandler(handle_callback))
     application.add_handler(
         MessageHandler(filters.TEXT & ~filters.COMMAND, handle_text_message)
     )
 
+    # Фоновое обслуживание БД (очистка истории и т.п.)
+    schedule_maintenance(
+        application, config.HISTORY_RETENTION, config.BACKUP_CONFIG, config.DB_MAINTENANCE
+    )
+
     # Запуск системы напоминаний (если требуется)
     # Предполагается, что reminder_system может запускать фоновые задачи или JobQueue
     # Если использует JobQueue, нужно передать application.job_queue
@@ -0,0 +1,130 @@
+"""
+Фоновые задачи обслуживания базы данных.
+Регистрируются в JobQueue приложения и выполняются вне обработчиков,
+чтобы пользователь не ждал их завершения.
+"""
+
+import logging
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from telegram.ext import Application, ContextTypes
+
+from backup import create_backup
+from db_maintenance import run_maintenance
+
+logger = logging.getLogger(__name__)
+
+
+async def prune_history_job(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Порционная очистка старой истории выполнений с ограничением по времени."""
+    db = context.bot_data["db"]
+    settings = context.job.data
+    await db.cleanup_old_history(
+        days_to_keep=settings["retention_days"],
+        chunk_size=settings["chunk_size"],
+        time_budget=settings["time_budget_ms"] / 1000,
+    )
+
+
+async def backup_job(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Резервная копия БД с проверкой и ротацией; копирование — в пуле потоков БД."""
+    db = context.bot_data["db"]
+    settings = context.job.data
+    if not hasattr(db.sync, "pool"):
+        return
+    try:
+        result = await db.run(
+            create_backup,
+            db.sync,
+            settings["dir"],
+            keep=settings["keep"],
+            pages_per_step=settings["pages_per_step"],
+            step_sleep=settings["step_sleep_ms"] / 1000,
+        )
+    except Exception as e:
+        logger.error(f"Error creating backup: {e}")
+        return
+    logger.info(
+        f"💾 Резервная копия {result['path']}: {result['size_bytes'] / 1024:.0f} КБ "
+        f"за {result['duration_ms']:.0f} мс, удалено старых: {len(result['removed'])}"
+    )
+
+
+async def db_maintenance_job(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Контрольные точки WAL, PRAGMA optimize и incremental_vacuum в пределах бюджета времени."""
+    db = context.bot_data["db"]
+    settings = context.job.data
+    if not hasattr(db.sync, "pool"):
+        return
+    try:
+        report = await db.run(
+            run_maintenance,
+            db.sync,
+            time_budget=settings["time_budget_ms"] / 1000,
+            vacuum_pages_per_step=settings["vacuum_pages_per_step"],
+            analysis_limit=settings["analysis_limit"],
+        )
+    except Exception as e:
+        logger.error(f"Error running database maintenance: {e}")
+        return
+    before, after = report["before"], report["after"]
+    logger.info(
+        f"🔧 Обслуживание БД: файл {before['file_bytes'] / 1024:.0f} → {after['file_bytes'] / 1024:.0f} КБ, "
+        f"WAL {before['wal_bytes'] / 1024:.0f} → {after['wal_bytes'] / 1024:.0f} КБ, "
+        f"свободных страниц {before['freelist_pages']} → {after['freelist_pages']}; "
+        f"шаги {', '.join(f'{name} {ms:.0f} мс' for name, ms in report['steps'].items())}"
+        + (f"; отложено: {', '.join(report['skipped'])}" if report["skipped"] else "")
+    )
+
+
+def schedule_maintenance(
+    application: Application,
+    history_config: Dict[str, Any],
+    backup_config: Optional[Dict[str, Any]] = None,
+    db_maintenance_config: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Зарегистрировать задачи обслуживания в JobQueue."""
+    job_queue = application.job_queue
+    if job_queue is None:
+        logger.warning("JobQueue недоступна (нужен python-telegram-bot[job-queue]), обслуживание БД отключено")
+        return
+
+    job_queue.run_repeating(
+        prune_history_job,
+        interval=timedelta(minutes=history_config["interval_minutes"]),
+        first=timedelta(minutes=1),
+        data=history_config,
+        name="prune_history",
+    )
+    logger.info(
+        f"Очистка истории: раз в {history_config['interval_minutes']} мин., "
+        f"хранение {history_config['retention_days']} дн."
+    )
+
+    if backup_config and backup_config.get("enabled", True):
+        # Время копии — в часовом поясе домохозяйства
+        tz = application.bot_data["db"].sync.tz
+        job_queue.run_daily(
+            backup_job,
+            time=backup_config["time"].replace(tzinfo=tz),
+            data=backup_config,
+            name="backup",
+        )
+        logger.info(
+            f"Резервные копии: ежедневно в {backup_config['time'].strftime('%H:%M')}, "
+            f"хранится {backup_config['keep']} шт. в {backup_config['dir']}"
+        )
+
+    if db_maintenance_config and db_maintenance_config.get("enabled", True):
+        tz = application.bot_data["db"].sync.tz
+        job_queue.run_daily(
+            db_maintenance_job,
+            time=db_maintenance_config["time"].replace(tzinfo=tz),
+            data=db_maintenance_config,
+            name="db_maintenance",
+        )
+        logger.info(
+            f"Обслуживание БД: ежедневно в {db_maintenance_config['time'].strftime('%H:%M')}, "
+            f"бюджет {db_maintenance_config['time_budget_ms']} мс"
+        )
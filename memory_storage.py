@@ -0,0 +1,483 @@
+"""
+Хранилище в памяти процесса — реализация Storage без SQLite.
+
+Повторяет поведение database.Database (порядок выдачи, дубли в списке
+покупок, границы сроков, статистику), но держит данные в словарях под
+одной блокировкой. Нужна, чтобы гонять логику бота и бенчмарки без файла
+БД и отделять накладные расходы хранилища от остального. Данные не
+сохраняются между запусками.
+"""
+
+import itertools
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone, tzinfo
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from migrations import DEFAULT_HOUSEHOLD_ID, DEFAULT_TASKS, new_invite_code
+from models import Page, ShoppingCursor, Task, TaskCursor, ShoppingItem, normalize_text, rank_by_match
+
+
+# Как database.PAGE_SIZE
+PAGE_SIZE = 20
+
+
+def _keyset_page(entries: List[Tuple[Any, Any]], follows: Callable[[Any, Any], bool],
+                 after=None, before=None, limit: int = PAGE_SIZE) -> Page:
+    """
+    Страница keyset-пагинации по списку [(ключ, объект)] в порядке вывода;
+    follows(a, b) — ключ a идёт после b. Границы те же, что у Database.
+    """
+    if before is not None:
+        end = sum(1 for key, _ in entries if follows(before, key))
+        if end > limit:
+            chosen = entries[end - limit:end]
+            return Page([item for _, item in chosen], chosen[-1][0], chosen[0][0])
+    elif after is not None:
+        start = sum(1 for key, _ in entries if not follows(key, after))
+        if start < len(entries):
+            chosen = entries[start:start + limit]
+            has_next = start + limit < len(entries)
+            return Page([item for _, item in chosen], chosen[-1][0] if has_next else None, chosen[0][0])
+    chosen = entries[:limit]
+    return Page([item for _, item in chosen], chosen[-1][0] if len(entries) > limit else None, None)
+
+
+def _utc_timestamp() -> datetime:
+    """Аналог CURRENT_TIMESTAMP: UTC без tzinfo, с точностью до секунды"""
+    return datetime.now(dt_timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+class MemoryStorage:
+    """Storage в словарях; потокобезопасно, но без параллелизма"""
+
+    def __init__(self, timezone: Optional[str] = None):
+        self.tz: tzinfo = ZoneInfo(timezone) if timezone else datetime.now().astimezone().tzinfo
+
+        self._lock = threading.RLock()
+        self._task_ids = itertools.count(1)
+        self._item_ids = itertools.count(1)
+        self._household_ids = itertools.count(DEFAULT_HOUSEHOLD_ID + 1)
+
+        self._households: Dict[int, Dict[str, Any]] = {}
+        self._members: Dict[int, Tuple[int, str]] = {}            # chat_id -> (household_id, role)
+        self._users: Dict[int, Tuple[str, str]] = {}              # chat_id -> (username, first_name)
+        self._tasks: Dict[int, Dict[str, Any]] = {}
+        self._items: Dict[int, Dict[str, Any]] = {}
+        self._history: List[Tuple[int, int, int, datetime]] = []  # (household_id, task_id, done_by, done_at)
+        self._daily: Dict[Tuple[int, str, int, int], int] = {}    # как task_history_daily
+
+        # Как новая база после миграций: домохозяйство по умолчанию со стандартными задачами
+        self._households[DEFAULT_HOUSEHOLD_ID] = {'name': 'Дом', 'invite_code': new_invite_code()}
+        self._add_default_tasks(DEFAULT_HOUSEHOLD_ID)
+
+    @property
+    def concurrency(self) -> int:
+        return 1
+
+    def now(self) -> datetime:
+        """Текущее время в часовом поясе домохозяйства (tz-aware)"""
+        return datetime.now(self.tz)
+
+    def _local_now(self) -> datetime:
+        return self.now().replace(tzinfo=None)
+
+    def close(self) -> None:
+        pass
+
+    # ================== ЗАДАЧИ ==================
+
+    def _add_default_tasks(self, household_id: int) -> None:
+        for name, interval in DEFAULT_TASKS:
+            self._insert_task(household_id, name, interval)
+
+    def _insert_task(self, household_id: int, name: str, interval_days: int) -> None:
+        task_id = next(self._task_ids)
+        self._tasks[task_id] = {
+            'household_id': household_id,
+            'name': name,
+            'interval_days': interval_days,
+            'last_done': None,
+            'last_done_by': None,
+            'created_at': _utc_timestamp(),
+        }
+
+    def _to_task(self, task_id: int, row: Dict[str, Any]) -> Task:
+        user = self._users.get(row['last_done_by'])
+        return Task(
+            id=task_id,
+            name=row['name'],
+            interval_days=row['interval_days'],
+            last_done=row['last_done'].replace(tzinfo=self.tz) if row['last_done'] else None,
+            last_done_by=row['last_done_by'],
+            created_at=row['created_at'],
+            last_done_by_name=user[1] if user else None,
+        )
+
+    def _household_tasks(self, household_id: int) -> List[Tuple[int, Dict[str, Any]]]:
+        return sorted(
+            ((task_id, row) for task_id, row in self._tasks.items() if row['household_id'] == household_id),
+            key=lambda entry: entry[1]['name']
+        )
+
+    def _next_due_epoch(self, row: Dict[str, Any]) -> Optional[int]:
+        if row['last_done'] is None:
+            return None
+        due = row['last_done'].replace(tzinfo=self.tz) + timedelta(days=row['interval_days'])
+        return int(due.timestamp())
+
+    def get_all_tasks(self, household_id: int) -> List[Task]:
+        with self._lock:
+            return [self._to_task(task_id, row) for task_id, row in self._household_tasks(household_id)]
+
+    def get_tasks_page(
+        self,
+        household_id: int,
+        after: Optional[TaskCursor] = None,
+        before: Optional[TaskCursor] = None,
+        limit: int = PAGE_SIZE,
+        due_within_days: Optional[int] = None,
+    ) -> Page[Task]:
+        deadline = None
+        if due_within_days is not None:
+            deadline = int(self.now().timestamp()) + due_within_days * 86400
+        with self._lock:
+            entries = [
+                ((row['name'], task_id), self._to_task(task_id, row))
+                for task_id, row in sorted(
+                    self._household_tasks(household_id), key=lambda entry: (entry[1]['name'], entry[0])
+                )
+                if deadline is None or self._next_due_epoch(row) is None or self._next_due_epoch(row) <= deadline
+            ]
+
+            def resolve(cursor):
+                # Курсор — id задачи; исчезнувшая задача означает первую страницу
+                row = self._tasks.get(cursor) if cursor is not None else None
+                if row is None or row['household_id'] != household_id:
+                    return None
+                return (row['name'], cursor)
+
+            after_key, before_key = resolve(after), resolve(before)
+        page = _keyset_page(entries, lambda a, b: a > b, after_key, before_key, limit)
+        return Page(
+            page.items,
+            next_cursor=page.next_cursor[1] if page.next_cursor else None,
+            prev_cursor=page.prev_cursor[1] if page.prev_cursor else None,
+        )
+
+    def get_task_by_id(self, household_id: int, task_id: int) -> Optional[Task]:
+        with self._lock:
+            row = self._tasks.get(task_id)
+            if row is None or row['household_id'] != household_id:
+                return None
+            return self._to_task(task_id, row)
+
+    def find_task_by_name(self, household_id: int, task_name: str) -> Optional[Task]:
+        tasks = self.search_tasks(household_id, task_name, limit=1)
+        return tasks[0] if tasks else None
+
+    def search_tasks(self, household_id: int, query: str, limit: int = 5) -> List[Task]:
+        key = normalize_text(query)
+        if not key or limit <= 0:
+            return []
+        return rank_by_match(key, self.get_all_tasks(household_id), lambda task: task.name, limit)
+
+    def _name_taken(self, household_id: int, name: str, exclude_id: Optional[int] = None) -> bool:
+        """Аналог уникального индекса (household_id, name_key)"""
+        name_key = normalize_text(name)
+        return any(
+            row['household_id'] == household_id and task_id != exclude_id
+            and normalize_text(row['name']) == name_key
+            for task_id, row in self._tasks.items()
+        )
+
+    def add_new_task(self, household_id: int, name: str, interval_days: int) -> bool:
+        with self._lock:
+            if self._name_taken(household_id, name):
+                return False
+            self._insert_task(household_id, name, interval_days)
+            return True
+
+    def update_task_interval(self, household_id: int, task_id: int, new_interval: int) -> bool:
+        with self._lock:
+            row = self._tasks.get(task_id)
+            if row is None or row['household_id'] != household_id:
+                return False
+            row['interval_days'] = new_interval
+            return True
+
+    def rename_task(self, household_id: int, task_id: int, new_name: str) -> bool:
+        with self._lock:
+            row = self._tasks.get(task_id)
+            if row is None or row['household_id'] != household_id:
+                return False
+            if self._name_taken(household_id, new_name, exclude_id=task_id):
+                return False
+            row['name'] = new_name
+            return True
+
+    def delete_task(self, household_id: int, task_id: int) -> bool:
+        with self._lock:
+            row = self._tasks.get(task_id)
+            if row is None or row['household_id'] != household_id:
+                return False
+            del self._tasks[task_id]
+            self._history = [entry for entry in self._history if entry[1] != task_id]
+            for key in [key for key in self._daily if key[0] == household_id and key[2] == task_id]:
+                del self._daily[key]
+            return True
+
+    def mark_task_done(
+        self, household_id: int, task_id: int, user_chat_id: int, username: str, first_name: str
+    ) -> None:
+        with self._lock:
+            self._users[user_chat_id] = (username, first_name)
+
+            row = self._tasks.get(task_id)
+            if row is None or row['household_id'] != household_id:
+                return
+
+            done_at = self._local_now()
+            row['last_done'] = done_at
+            row['last_done_by'] = user_chat_id
+
+            self._history.append((household_id, task_id, user_chat_id, done_at))
+            day_key = (household_id, done_at.date().isoformat(), task_id, user_chat_id)
+            self._daily[day_key] = self._daily.get(day_key, 0) + 1
+
+    def get_overdue_tasks(self, household_id: int) -> List[Task]:
+        now_epoch = int(self.now().timestamp())
+        with self._lock:
+            return [
+                self._to_task(task_id, row)
+                for task_id, row in self._household_tasks(household_id)
+                if self._next_due_epoch(row) is None or self._next_due_epoch(row) <= now_epoch
+            ]
+
+    def count_overdue_tasks(self, household_id: int) -> int:
+        return len(self.get_overdue_tasks(household_id))
+
+    def get_tasks_due_soon(self, household_id: int, days_threshold: int = 2) -> List[Task]:
+        now_epoch = int(self.now().timestamp())
+        until = now_epoch + days_threshold * 86400
+        with self._lock:
+            return [
+                self._to_task(task_id, row)
+                for task_id, row in self._household_tasks(household_id)
+                if self._next_due_epoch(row) is not None and now_epoch < self._next_due_epoch(row) <= until
+            ]
+
+    # ================== ПОЛЬЗОВАТЕЛИ И СТАТИСТИКА ==================
+
+    def get_user_name(self, chat_id: int) -> str:
+        with self._lock:
+            user = self._users.get(chat_id)
+        return user[1] if user else "Неизвестный пользователь"
+
+    def get_history_stats(self, household_id: int) -> Dict[str, int]:
+        today = self._local_now().date()
+        since = [(today - timedelta(days=days)).isoformat() for days in (365, 30, 7)]
+        stats = {'total': 0, 'last_365_days': 0, 'last_30_days': 0, 'last_7_days': 0}
+        with self._lock:
+            for (owner, day, _, _), count in self._daily.items():
+                if owner != household_id:
+                    continue
+                stats['total'] += count
+                for name, since_day in zip(('last_365_days', 'last_30_days', 'last_7_days'), since):
+                    if day >= since_day:
+                        stats[name] += count
+        return stats
+
+    def get_user_statistics(self, household_id: int, days: int = 7, top_tasks: int = 5) -> Dict[str, Any]:
+        since = self._local_now() - timedelta(days=days)
+        groups: Dict[Tuple[int, int], int] = {}
+        with self._lock:
+            for owner, task_id, done_by, done_at in self._history:
+                if owner == household_id and done_at >= since:
+                    groups[(done_by, task_id)] = groups.get((done_by, task_id), 0) + 1
+
+            user_stats: Dict[int, Dict[str, Any]] = {}
+            task_counts: Dict[str, int] = {}
+            total = 0
+            # Порядок групп как у GROUP BY done_by, task_id в SQLite
+            for (done_by, task_id), count in sorted(groups.items()):
+                user = self._users.get(done_by)
+                task = self._tasks.get(task_id)
+                user_name = user[1] if user else 'Неизвестный пользователь'
+                task_name = task['name'] if task else 'Удалённая задача'
+                user_stats.setdefault(done_by, {'name': user_name, 'task_count': 0})['task_count'] += count
+                task_counts[task_name] = task_counts.get(task_name, 0) + count
+                total += count
+
+        popular_tasks = sorted(task_counts.items(), key=lambda item: item[1], reverse=True)
+        return {
+            'days': days,
+            'total_tasks': total,
+            'user_stats': dict(
+                sorted(user_stats.items(), key=lambda item: item[1]['task_count'], reverse=True)
+            ),
+            'popular_tasks': popular_tasks[:top_tasks]
+        }
+
+    def cleanup_old_history(self, days_to_keep: int = 90, chunk_size: int = 500, time_budget: float = 0.2) -> int:
+        # Порции и бюджет времени нужны только SQLite; здесь удаление мгновенное
+        cutoff = self._local_now() - timedelta(days=days_to_keep)
+        with self._lock:
+            before = len(self._history)
+            self._history = [entry for entry in self._history if entry[3] >= cutoff]
+            return before - len(self._history)
+
+    # ================== СПИСОК ПОКУПОК ==================
+
+    def _to_item(self, item_id: int, row: Dict[str, Any]) -> ShoppingItem:
+        return ShoppingItem(
+            id=item_id,
+            item_text=row['item_text'],
+            is_checked=row['is_checked'],
+            created_at=row['created_at'],
+        )
+
+    def _household_items(self, household_id: int) -> List[Tuple[int, Dict[str, Any]]]:
+        return [(item_id, row) for item_id, row in self._items.items() if row['household_id'] == household_id]
+
+    def get_shopping_items(self, household_id: int, show_checked: bool = True) -> List[ShoppingItem]:
+        with self._lock:
+            items = [
+                (item_id, row) for item_id, row in self._household_items(household_id)
+                if show_checked or not row['is_checked']
+            ]
+            # ORDER BY is_checked, created_at DESC; равные created_at — новые выше
+            items.sort(key=lambda entry: (entry[1]['created_at'], entry[0]), reverse=True)
+            items.sort(key=lambda entry: entry[1]['is_checked'])
+            return [self._to_item(item_id, row) for item_id, row in items]
+
+    def get_shopping_page(
+        self,
+        household_id: int,
+        show_checked: bool = True,
+        after: Optional[ShoppingCursor] = None,
+        before: Optional[ShoppingCursor] = None,
+        limit: int = PAGE_SIZE,
+    ) -> Page[ShoppingItem]:
+        items = self.get_shopping_items(household_id, show_checked)
+        entries = [((int(item.is_checked), str(item.created_at), item.id), item) for item in items]
+
+        def follows(a: ShoppingCursor, b: ShoppingCursor) -> bool:
+            # Порядок вывода: is_checked по возрастанию, затем (created_at, id) по убыванию
+            return a[0] > b[0] or (a[0] == b[0] and (a[1], a[2]) < (b[1], b[2]))
+
+        return _keyset_page(entries, follows, after, before, limit)
+
+    def search_shopping_items(self, household_id: int, query: str, limit: int = 10) -> List[ShoppingItem]:
+        key = normalize_text(query)
+        if not key or limit <= 0:
+            return []
+        with self._lock:
+            items = [self._to_item(item_id, row) for item_id, row in self._household_items(household_id)]
+        return rank_by_match(key, items, lambda item: item.item_text, limit)
+
+    def _unchecked_twin(self, household_id: int, item_key: str, exclude_id: Optional[int] = None) -> Optional[int]:
+        for item_id, row in self._household_items(household_id):
+            if item_id != exclude_id and not row['is_checked'] and row['item_key'] == item_key:
+                return item_id
+        return None
+
+    def add_shopping_item(self, household_id: int, item_text: str) -> bool:
+        item_key = normalize_text(item_text)
+        with self._lock:
+            if self._unchecked_twin(household_id, item_key) is not None:
+                return False
+            self._items[next(self._item_ids)] = {
+                'household_id': household_id,
+                'item_text': item_text,
+                'item_key': item_key,
+                'is_checked': False,
+                'created_at': _utc_timestamp(),
+            }
+            return True
+
+    def toggle_shopping_item(self, household_id: int, item_id: int) -> Optional[ShoppingItem]:
+        with self._lock:
+            row = self._items.get(item_id)
+            if row is None or row['household_id'] != household_id:
+                return None
+
+            if row['is_checked']:
+                # Снимаем отметку, а такой же неотмеченный пункт уже добавлен заново
+                twin_id = self._unchecked_twin(household_id, row['item_key'], exclude_id=item_id)
+                if twin_id is not None:
+                    del self._items[item_id]
+                    return self._to_item(twin_id, self._items[twin_id])
+
+            row['is_checked'] = not row['is_checked']
+            return self._to_item(item_id, row)
+
+    def delete_checked_items(self, household_id: int) -> int:
+        with self._lock:
+            checked = [item_id for item_id, row in self._household_items(household_id) if row['is_checked']]
+            for item_id in checked:
+                del self._items[item_id]
+            return len(checked)
+
+    def delete_all_shopping_items(self, household_id: int) -> int:
+        with self._lock:
+            items = [item_id for item_id, _ in self._household_items(household_id)]
+            for item_id in items:
+                del self._items[item_id]
+            return len(items)
+
+    def get_shopping_item_count(self, household_id: int) -> Dict[str, int]:
+        with self._lock:
+            rows = [row for _, row in self._household_items(household_id)]
+        total = len(rows)
+        checked = sum(1 for row in rows if row['is_checked'])
+        return {'total': total, 'unchecked': total - checked, 'checked': checked}
+
+    # ================== ДОМОХОЗЯЙСТВА ==================
+
+    def create_household(self, name: str, owner_chat_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            household_id = next(self._household_ids)
+            invite_code = new_invite_code()
+            self._households[household_id] = {'name': name, 'invite_code': invite_code}
+            self._members[owner_chat_id] = (household_id, 'admin')
+            self._add_default_tasks(household_id)
+            return {'id': household_id, 'name': name, 'invite_code': invite_code}
+
+    def add_household_member(self, household_id: int, chat_id: int, role: str = "member") -> bool:
+        with self._lock:
+            if chat_id in self._members:
+                return False
+            self._members[chat_id] = (household_id, role)
+            return True
+
+    def join_household(self, invite_code: str, chat_id: int) -> Optional[Dict[str, Any]]:
+        code = invite_code.strip()
+        with self._lock:
+            for household_id, household in self._households.items():
+                if household['invite_code'] == code:
+                    self._members[chat_id] = (household_id, 'member')
+                    return {'id': household_id, 'name': household['name'], 'role': 'member'}
+            return None
+
+    def get_user_household(self, chat_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            member = self._members.get(chat_id)
+            if member is None:
+                return None
+            household_id, role = member
+            household = self._households[household_id]
+            return {
+                'id': household_id,
+                'name': household['name'],
+                'invite_code': household['invite_code'],
+                'role': role,
+            }
+
+    def get_household_members(self, household_id: int) -> List[int]:
+        with self._lock:
+            return sorted(chat_id for chat_id, (owner, _) in self._members.items() if owner == household_id)
+
+    def get_household_ids(self) -> List[int]:
+        with self._lock:
+            return sorted({household_id for household_id, _ in self._members.values()})
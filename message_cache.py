@@ -0,0 +1,59 @@
+"""
+Что бот последним показал в своих сообщениях.
+
+По ключу (chat_id, message_id) хранятся хэши текста и клавиатуры, которые
+бот отправил или вписал правкой. utils.edit_message сравнивает с ними новую
+версию и не ходит в Telegram, если ничего не изменилось, или правит только
+клавиатуру, если текст тот же. Хранится в памяти процесса, старые
+сообщения вытесняются.
+"""
+
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+# Сколько сообщений помнить (LRU)
+MESSAGE_CACHE_SIZE = 10_000
+
+MessageKey = Tuple[int, int]
+MessageState = Tuple[int, int]   # (хэш текста, хэш клавиатуры)
+
+
+def text_fingerprint(text: str, parse_mode: Optional[str]) -> int:
+    return hash((text, parse_mode))
+
+
+def markup_fingerprint(reply_markup) -> int:
+    """Хэш JSON разметки (у клавиатур из keyboards JSON уже посчитан и закэширован)"""
+    if reply_markup is None:
+        return 0
+    return hash(reply_markup.to_json())
+
+
+class MessageStateCache:
+    """LRU состояний сообщений; используется только из event loop бота"""
+
+    def __init__(self, max_messages: int = MESSAGE_CACHE_SIZE):
+        self.max_messages = max_messages
+        self._states: "OrderedDict[MessageKey, MessageState]" = OrderedDict()
+
+    def get(self, key: MessageKey) -> Optional[MessageState]:
+        state = self._states.get(key)
+        if state is not None:
+            self._states.move_to_end(key)
+        return state
+
+    def remember(self, key: MessageKey, state: MessageState) -> None:
+        self._states[key] = state
+        self._states.move_to_end(key)
+        if len(self._states) > self.max_messages:
+            self._states.popitem(last=False)
+
+    def forget(self, key: MessageKey) -> None:
+        self._states.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+
+# Общий кэш процесса
+message_states = MessageStateCache()
@@ -0,0 +1,58 @@
+"""
+Метрики процесса бота: счётчики и наблюдения (длительности, размеры).
+
+Хранятся в памяти процесса и сбрасываются при перезапуске. Пишут их
+фоновые задачи и слой БД, читают — логи и команды диагностики.
+"""
+
+import threading
+from typing import Any, Callable, Dict
+
+
+class Metrics:
+    """Потокобезопасный набор именованных счётчиков и наблюдений"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {}
+        # имя -> {'count', 'sum', 'min', 'max', 'last'}
+        self._observations: Dict[str, Dict[str, float]] = {}
+        # Источники, которые сами считают свои сводки (например, QueryProfiler)
+        self._collectors: Dict[str, Callable[[], Any]] = {}
+
+    def register_collector(self, name: str, collector: Callable[[], Any]) -> None:
+        """Добавить в snapshot() результат collector() под именем name"""
+        with self._lock:
+            self._collectors[name] = collector
+
+    def increment(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            entry = self._observations.get(name)
+            if entry is None:
+                self._observations[name] = {'count': 1, 'sum': value, 'min': value, 'max': value, 'last': value}
+                return
+            entry['count'] += 1
+            entry['sum'] += value
+            entry['min'] = min(entry['min'], value)
+            entry['max'] = max(entry['max'], value)
+            entry['last'] = value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Копия всех значений: {'counters': {...}, 'observations': {...}, 'collected': {...}}"""
+        with self._lock:
+            snapshot = {
+                'counters': dict(self._counters),
+                'observations': {name: dict(entry) for name, entry in self._observations.items()},
+            }
+            collectors = dict(self._collectors)
+        # Сборщики вызываются вне блокировки: у них свои
+        snapshot['collected'] = {name: collector() for name, collector in collectors.items()}
+        return snapshot
+
+
+# Общий набор метрик процесса
+metrics = Metrics()
@@ -0,0 +1,537 @@
+"""
+Версионированные миграции схемы базы данных.
+
+Номер применённой миграции хранится в PRAGMA user_version. Если база уже
+актуальна, запуск стоит одного чтения user_version. Каждая миграция
+выполняется в своей транзакции вместе с записью нового номера версии,
+поэтому прерванная миграция не оставляет схему наполовину изменённой.
+
+Миграции идемпотентны (IF NOT EXISTS, проверка столбцов): базы, созданные
+до появления user_version, проходят их с нуля без потери данных.
+"""
+
+import logging
+import secrets
+import sqlite3
+from typing import Callable, List, Tuple
+
+from db_pool import ConnectionPool
+from models import normalize_text
+
+logger = logging.getLogger(__name__)
+
+Migration = Tuple[int, str, Callable[[sqlite3.Connection], None]]
+
+MIGRATIONS: List[Migration] = []
+
+# Домохозяйство, которому принадлежат данные, созданные до появления households
+DEFAULT_HOUSEHOLD_ID = 1
+
+# Стандартные задачи новой базы и нового домохозяйства
+DEFAULT_TASKS = [
+    ("Помыть полы", 7),
+    ("Пропылесосить", 7),
+    ("Помыть ванну", 21),
+    ("Приготовить еду", 3),
+    ("Поменять постельное", 7),
+]
+
+
+def new_invite_code() -> str:
+    """Случайный код приглашения в домохозяйство"""
+    return secrets.token_urlsafe(6)
+
+
+def migration(version: int, description: str):
+    """Зарегистрировать функцию как миграцию с номером version"""
+    def decorator(func: Callable[[sqlite3.Connection], None]):
+        if MIGRATIONS and MIGRATIONS[-1][0] >= version:
+            raise ValueError(f"Migration {version} is out of order")
+        MIGRATIONS.append((version, description, func))
+        return func
+    return decorator
+
+
+def latest_version() -> int:
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def get_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(pool: ConnectionPool) -> int:
+    """Применить недостающие миграции. Возвращает итоговую версию схемы."""
+    with pool.reader() as conn:
+        version = get_version(conn)
+    if version >= latest_version():
+        return version
+
+    for number, description, func in MIGRATIONS:
+        with pool.writer() as conn:
+            # Перечитываем под блокировкой писателя: другой процесс мог успеть раньше
+            version = get_version(conn)
+            if number <= version:
+                continue
+            logger.info(f"Applying migration {number}: {description}")
+            func(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+
+    return latest_version()
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _table_exists(conn: sqlite3.Connection, table: str) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone() is not None
+
+
+# ================== МИГРАЦИИ ==================
+
+@migration(1, "base schema: users, tasks, task_history, shopping_items")
+def _base_schema(conn: sqlite3.Connection) -> None:
+    # Таблица пользователей
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            chat_id INTEGER PRIMARY KEY,
+            username TEXT,
+            first_name TEXT,
+            joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Таблица задач
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            interval_days INTEGER NOT NULL,
+            last_done TIMESTAMP,
+            last_done_by INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (last_done_by) REFERENCES users (chat_id)
+        )
+    ''')
+
+    # Таблица для хранения истории выполнений
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS task_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_id INTEGER,
+            done_by INTEGER,
+            done_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (task_id) REFERENCES tasks (id),
+            FOREIGN KEY (done_by) REFERENCES users (chat_id)
+        )
+    ''')
+
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_task_history_task
+        ON task_history(task_id)
+    ''')
+
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_tasks_interval
+        ON tasks(interval_days)
+    ''')
+
+    # Таблица списка покупок
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS shopping_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            item_text TEXT NOT NULL,
+            is_checked BOOLEAN DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Стандартные задачи для новой базы
+    if conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == 0:
+        conn.executemany(
+            "INSERT INTO tasks (name, interval_days) VALUES (?, ?)",
+            DEFAULT_TASKS
+        )
+
+
+@migration(2, "covering index task_history(done_at, done_by, task_id)")
+def _history_covering_index(conn: sqlite3.Connection) -> None:
+    # Диапазон по done_at и группировка по пользователю/задаче без обращения к таблице
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_task_history_done
+        ON task_history(done_at, done_by, task_id)
+    ''')
+    conn.execute('DROP INDEX IF EXISTS idx_task_history_date')
+
+
+@migration(3, "shopping_items.item_key with partial unique index")
+def _shopping_item_keys(conn: sqlite3.Connection) -> None:
+    if "item_key" not in _columns(conn, "shopping_items"):
+        conn.execute("ALTER TABLE shopping_items ADD COLUMN item_key TEXT")
+
+    rows = conn.execute(
+        "SELECT id, item_text FROM shopping_items WHERE item_key IS NULL"
+    ).fetchall()
+    conn.executemany(
+        "UPDATE shopping_items SET item_key = ? WHERE id = ?",
+        [(normalize_text(text), item_id) for item_id, text in rows]
+    )
+
+    # Старая проверка LOWER() пропускала дубли с кириллицей — оставляем самый ранний
+    cursor = conn.execute('''
+        DELETE FROM shopping_items
+        WHERE is_checked = 0 AND id NOT IN (
+            SELECT MIN(id) FROM shopping_items WHERE is_checked = 0 GROUP BY item_key
+        )
+    ''')
+    if cursor.rowcount > 0:
+        logger.info(f"Removed {cursor.rowcount} duplicate unchecked shopping items")
+
+    # Уникальность неотмеченных пунктов по нормализованному ключу
+    conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_shopping_unchecked_key
+        ON shopping_items(item_key) WHERE is_checked = 0
+    ''')
+
+
+@migration(4, "shopping_counters maintained by triggers")
+def _shopping_counters(conn: sqlite3.Connection) -> None:
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS shopping_counters (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total INTEGER NOT NULL,
+            checked INTEGER NOT NULL
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_shopping_counters_insert
+        AFTER INSERT ON shopping_items
+        BEGIN
+            UPDATE shopping_counters
+            SET total = total + 1, checked = checked + (NEW.is_checked != 0)
+            WHERE id = 1;
+        END
+    ''')
+
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_shopping_counters_delete
+        AFTER DELETE ON shopping_items
+        BEGIN
+            UPDATE shopping_counters
+            SET total = total - 1, checked = checked - (OLD.is_checked != 0)
+            WHERE id = 1;
+        END
+    ''')
+
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_shopping_counters_toggle
+        AFTER UPDATE OF is_checked ON shopping_items
+        WHEN (OLD.is_checked != 0) != (NEW.is_checked != 0)
+        BEGIN
+            UPDATE shopping_counters
+            SET checked = checked + (NEW.is_checked != 0) - (OLD.is_checked != 0)
+            WHERE id = 1;
+        END
+    ''')
+
+    # Начальные значения — в той же транзакции, что и триггеры
+    conn.execute('''
+        INSERT OR REPLACE INTO shopping_counters (id, total, checked)
+        SELECT 1, COUNT(*), COALESCE(SUM(is_checked != 0), 0) FROM shopping_items
+    ''')
+
+
+@migration(5, "task_history_daily rollup")
+def _history_rollup(conn: sqlite3.Connection) -> None:
+    # Дневные агрегаты (день, задача, пользователь) -> количество. Пополняются
+    # триггером и не затрагиваются очисткой сырой истории.
+    existed = _table_exists(conn, "task_history_daily")
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS task_history_daily (
+            day TEXT NOT NULL,
+            task_id INTEGER NOT NULL,
+            done_by INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (day, task_id, done_by)
+        ) WITHOUT ROWID
+    ''')
+
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_task_history_daily
+        AFTER INSERT ON task_history
+        BEGIN
+            INSERT INTO task_history_daily (day, task_id, done_by, count)
+            VALUES (date(NEW.done_at), NEW.task_id, NEW.done_by, 1)
+            ON CONFLICT (day, task_id, done_by) DO UPDATE SET count = count + 1;
+        END
+    ''')
+
+    if not existed:
+        # Переносим уже накопленную историю
+        conn.execute('''
+            INSERT INTO task_history_daily (day, task_id, done_by, count)
+            SELECT date(done_at), task_id, done_by, COUNT(*)
+            FROM task_history
+            WHERE task_id IS NOT NULL AND done_by IS NOT NULL
+            GROUP BY date(done_at), task_id, done_by
+        ''')
+
+
+@migration(6, "tasks.next_due_at indexed due time")
+def _tasks_next_due(conn: sqlite3.Connection) -> None:
+    # Момент просрочки в секундах Unix; NULL — задача ни разу не выполнялась.
+    # SQL-функцию next_due_epoch() регистрирует Database с учётом config.TIMEZONE.
+    if "next_due_at" not in _columns(conn, "tasks"):
+        conn.execute("ALTER TABLE tasks ADD COLUMN next_due_at INTEGER")
+
+    conn.execute("UPDATE tasks SET next_due_at = next_due_epoch(last_done, interval_days)")
+
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_tasks_next_due
+        ON tasks(next_due_at)
+    ''')
+
+
+def fts5_available(conn: sqlite3.Connection) -> bool:
+    """Собран ли SQLite с FTS5 (в некоторых сборках его нет)"""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x, tokenize='trigram')")
+        conn.execute("DROP TABLE temp._fts5_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+@migration(7, "trigram FTS5 search over task names and shopping items")
+def _search_index(conn: sqlite3.Connection) -> None:
+    if not fts5_available(conn):
+        # Поиск работает и без индекса — перебором в Database
+        logger.warning("SQLite without FTS5 trigram tokenizer: search index not created")
+        return
+
+    # Внешний контент: индекс хранит только триграммы, текст берётся из таблиц
+    for fts, table, column in (
+        ("tasks_fts", "tasks", "name"),
+        ("shopping_fts", "shopping_items", "item_text"),
+    ):
+        conn.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts}
+            USING fts5({column}, content='{table}', content_rowid='id', tokenize='trigram')
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{fts}_insert AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO {fts} (rowid, {column}) VALUES (NEW.id, NEW.{column});
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{fts}_delete AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {column}) VALUES ('delete', OLD.id, OLD.{column});
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{fts}_update AFTER UPDATE OF {column} ON {table}
+            BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {column}) VALUES ('delete', OLD.id, OLD.{column});
+                INSERT INTO {fts} (rowid, {column}) VALUES (NEW.id, NEW.{column});
+            END
+        ''')
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+@migration(8, "households: membership and household_id on every data table")
+def _households(conn: sqlite3.Connection) -> None:
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS households (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            invite_code TEXT NOT NULL UNIQUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Членство: роль admin может приглашать; пользователь состоит в одном домохозяйстве
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS household_members (
+            household_id INTEGER NOT NULL,
+            chat_id INTEGER NOT NULL,
+            role TEXT NOT NULL DEFAULT 'member',
+            joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (household_id, chat_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_household_members_chat
+        ON household_members(chat_id)
+    ''')
+
+    # Всё, что уже есть в базе, принадлежит домохозяйству по умолчанию
+    conn.execute(
+        "INSERT OR IGNORE INTO households (id, name, invite_code) VALUES (?, 'Дом', ?)",
+        (DEFAULT_HOUSEHOLD_ID, new_invite_code())
+    )
+    for table in ("tasks", "shopping_items", "task_history"):
+        if "household_id" not in _columns(conn, table):
+            conn.execute(
+                f"ALTER TABLE {table} ADD COLUMN household_id INTEGER NOT NULL "
+                f"DEFAULT {DEFAULT_HOUSEHOLD_ID}"
+            )
+
+    # Составные индексы начинаются с household_id: запросы одного домохозяйства
+    # читают только его диапазон индекса
+    conn.execute("DROP INDEX IF EXISTS idx_tasks_next_due")
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_tasks_household_due
+        ON tasks(household_id, next_due_at)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_tasks_household_name
+        ON tasks(household_id, name)
+    ''')
+
+    conn.execute("DROP INDEX IF EXISTS idx_shopping_unchecked_key")
+    conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_shopping_unchecked_key
+        ON shopping_items(household_id, item_key) WHERE is_checked = 0
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_shopping_household
+        ON shopping_items(household_id, is_checked, created_at)
+    ''')
+
+    # Покрывающий индекс для статистики домохозяйства; idx_task_history_done
+    # остаётся для очистки истории по всем домохозяйствам сразу
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_task_history_household
+        ON task_history(household_id, done_at, done_by, task_id)
+    ''')
+
+    _household_shopping_counters(conn)
+    _household_history_rollup(conn)
+
+
+def _household_shopping_counters(conn: sqlite3.Connection) -> None:
+    """shopping_counters: строка на домохозяйство вместо одной глобальной"""
+    if "household_id" in _columns(conn, "shopping_counters"):
+        return
+
+    for trigger in ("insert", "delete", "toggle"):
+        conn.execute(f"DROP TRIGGER IF EXISTS trg_shopping_counters_{trigger}")
+    conn.execute("DROP TABLE IF EXISTS shopping_counters")
+
+    conn.execute('''
+        CREATE TABLE shopping_counters (
+            household_id INTEGER PRIMARY KEY,
+            total INTEGER NOT NULL,
+            checked INTEGER NOT NULL
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TRIGGER trg_shopping_counters_insert
+        AFTER INSERT ON shopping_items
+        BEGIN
+            INSERT INTO shopping_counters (household_id, total, checked)
+            VALUES (NEW.household_id, 1, NEW.is_checked != 0)
+            ON CONFLICT (household_id) DO UPDATE
+            SET total = total + 1, checked = checked + excluded.checked;
+        END
+    ''')
+
+    conn.execute('''
+        CREATE TRIGGER trg_shopping_counters_delete
+        AFTER DELETE ON shopping_items
+        BEGIN
+            UPDATE shopping_counters
+            SET total = total - 1, checked = checked - (OLD.is_checked != 0)
+            WHERE household_id = OLD.household_id;
+        END
+    ''')
+
+    conn.execute('''
+        CREATE TRIGGER trg_shopping_counters_toggle
+        AFTER UPDATE OF is_checked ON shopping_items
+        WHEN (OLD.is_checked != 0) != (NEW.is_checked != 0)
+        BEGIN
+            UPDATE shopping_counters
+            SET checked = checked + (NEW.is_checked != 0) - (OLD.is_checked != 0)
+            WHERE household_id = NEW.household_id;
+        END
+    ''')
+
+    conn.execute('''
+        INSERT INTO shopping_counters (household_id, total, checked)
+        SELECT household_id, COUNT(*), COALESCE(SUM(is_checked != 0), 0)
+        FROM shopping_items
+        GROUP BY household_id
+    ''')
+
+
+def _household_history_rollup(conn: sqlite3.Connection) -> None:
+    """task_history_daily с household_id в начале первичного ключа"""
+    if "household_id" in _columns(conn, "task_history_daily"):
+        return
+
+    # Триггер удаляем до переименования, иначе SQLite перепишет его на старую таблицу
+    conn.execute("DROP TRIGGER IF EXISTS trg_task_history_daily")
+    conn.execute("ALTER TABLE task_history_daily RENAME TO task_history_daily_old")
+
+    conn.execute('''
+        CREATE TABLE task_history_daily (
+            household_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            task_id INTEGER NOT NULL,
+            done_by INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (household_id, day, task_id, done_by)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute(f'''
+        INSERT INTO task_history_daily (household_id, day, task_id, done_by, count)
+        SELECT {DEFAULT_HOUSEHOLD_ID}, day, task_id, done_by, count
+        FROM task_history_daily_old
+    ''')
+    conn.execute("DROP TABLE task_history_daily_old")
+
+    conn.execute('''
+        CREATE TRIGGER trg_task_history_daily
+        AFTER INSERT ON task_history
+        BEGIN
+            INSERT INTO task_history_daily (household_id, day, task_id, done_by, count)
+            VALUES (NEW.household_id, date(NEW.done_at), NEW.task_id, NEW.done_by, 1)
+            ON CONFLICT (household_id, day, task_id, done_by) DO UPDATE SET count = count + 1;
+        END
+    ''')
+
+
+@migration(9, "tasks.name_key with unique index per household")
+def _task_name_keys(conn: sqlite3.Connection) -> None:
+    if "name_key" not in _columns(conn, "tasks"):
+        conn.execute("ALTER TABLE tasks ADD COLUMN name_key TEXT")
+
+    rows = conn.execute("SELECT id, household_id, name FROM tasks ORDER BY id").fetchall()
+    # LOWER() проверял только ASCII — в домохозяйстве могли оказаться
+    # «Уборка» и «уборка». Историю не теряем: более поздние дубли получают
+    # номер в названии
+    seen = set()
+    updates = []
+    for task_id, household_id, name in rows:
+        key = normalize_text(name)
+        if (household_id, key) in seen:
+            name = f"{name} ({task_id})"
+            key = normalize_text(name)
+            logger.info(f"Renamed duplicate task {task_id} to {name!r}")
+        seen.add((household_id, key))
+        updates.append((name, key, task_id))
+    conn.executemany("UPDATE tasks SET name = ?, name_key = ? WHERE id = ?", updates)
+
+    conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_household_name_key
+        ON tasks(household_id, name_key)
+    ''')
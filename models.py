@@ -1,60 +1,137 @@
 from dataclasses import dataclass
-from datetime import datetime, timedelta
-from typing import Optional
+from datetime import datetime
+from difflib import SequenceMatcher
+from typing import Callable, Generic, Iterable, List, Optional, Tuple, TypeVar
 
-@dataclass
+T = TypeVar("T")
+
+# Минимальная похожесть для нечёткого совпадения в поиске (SequenceMatcher.ratio)
+SEARCH_FUZZY_THRESHOLD = 0.5
+
+
+def normalize_text(text: str) -> str:
+    """Ключ для сравнения названий: casefold (включая кириллицу), trim, схлопывание пробелов"""
+    return " ".join(text.casefold().split())
+
+
+def match_score(key: str, candidate: str) -> float:
+    """
+    Оценка совпадения нормализованных строк: точное > префикс > префикс
+    слова > подстрока > нечёткое. 0 — не подходит.
+    """
+    if candidate == key:
+        return 4.0
+    if candidate.startswith(key):
+        return 3.0
+    if any(word.startswith(key) for word in candidate.split()):
+        return 2.5
+    if key in candidate:
+        return 2.0
+    words = candidate.split()
+    if all(any(word.startswith(part) for word in words) for part in key.split()):
+        return 1.5
+    # Опечатки и другие формы слова: лучшая похожесть на строку целиком или на одно слово
+    ratio = max(
+        SequenceMatcher(None, key, text).ratio()
+        for text in [candidate, *words]
+    )
+    return ratio if ratio >= SEARCH_FUZZY_THRESHOLD else 0.0
+
+
+def rank_by_match(key: str, items: Iterable[T], text_of: Callable[[T], str], limit: int) -> List[T]:
+    """
+    Лучшие limit элементов по match_score нормализованного запроса key:
+    при равной оценке короче и раньше по алфавиту — выше.
+    """
+    scored = []
+    for item in items:
+        text = normalize_text(text_of(item))
+        score = match_score(key, text)
+        if score > 0:
+            scored.append((-score, len(text), text, item))
+    scored.sort(key=lambda entry: entry[:3])
+    return [entry[3] for entry in scored[:limit]]
+
+
+@dataclass(slots=True, frozen=True)
+class TaskStatus:
+    """Состояние задачи на момент now: вычисляется один раз за проход рендера"""
+    days_since_done: Optional[int]   # None — задача ни разу не выполнялась
+    is_overdue: bool
+    days_until_due: int
+    overdue_days: int                # сколько дней просрочено (<= 0 — не просрочено)
+
+    @property
+    def emoji(self) -> str:
+        """Смайлик статуса: 🔔 — не выполнялось или просрочено, ⏳ — ожидает"""
+        return "🔔" if self.is_overdue else "⏳"
+
+
+@dataclass(slots=True)
 class Task:
     id: int
     name: str
     interval_days: int
-    last_done: Optional[datetime] = None
+    last_done: Optional[datetime] = None      # в часовом поясе домохозяйства (tz-aware)
     last_done_by: Optional[int] = None
     created_at: Optional[datetime] = None
-    
-    def days_since_done(self) -> Optional[int]:
-        if not self.last_done:
-            return None
-        return (datetime.now() - self.last_done).days
-    
-    def is_overdue(self) -> bool:
-        if not self.last_done:
-            return True
-        return self.days_since_done() >= self.interval_days
-    
-    def days_until_due(self) -> int:
-        if not self.last_done:
-            return self.interval_days  # Изменено с 0 на interval_days
-        days_passed = self.days_since_done() or 0
-        return max(0, self.interval_days - days_passed)
-        
-    def get_status_emoji(self) -> str:
-        """Получить смайлик статуса"""
-        if self.last_done is None:
-            return "🔔"  # Никогда не выполнялось
-        elif self.is_overdue():
-            return "🔔"  # Просрочено
-        else:
-            return "⏳"  # Ожидает выполнения
-    
-    def format_status(self, user_name_func) -> str:
-        """Форматировать строку статуса задачи"""
-        emoji = self.get_status_emoji()
-        
+    last_done_by_name: Optional[str] = None   # users.first_name, читается JOIN'ом вместе с задачей
+
+    def status(self, now: datetime) -> TaskStatus:
+        """
+        Состояние задачи на момент now. now берётся один раз на весь проход
+        (Database.now() — tz-aware в часовом поясе домохозяйства), чтобы
+        все строки и кнопки считались от одного момента.
+        """
         if self.last_done is None:
+            return TaskStatus(
+                days_since_done=None,
+                is_overdue=True,
+                days_until_due=self.interval_days,
+                overdue_days=0,
+            )
+
+        last_done = self.last_done
+        if last_done.tzinfo is None and now.tzinfo is not None:
+            last_done = last_done.replace(tzinfo=now.tzinfo)
+        days = (now - last_done).days
+        return TaskStatus(
+            days_since_done=days,
+            is_overdue=days >= self.interval_days,
+            days_until_due=max(0, self.interval_days - days),
+            overdue_days=days - self.interval_days,
+        )
+
+    def done_by_name(self, user_name_func: Optional[Callable[[int], str]] = None) -> str:
+        """Имя последнего исполнителя: из задачи, иначе через user_name_func"""
+        if not self.last_done_by:
+            return "Неизвестно"
+        if self.last_done_by_name:
+            return self.last_done_by_name
+        if user_name_func:
+            return user_name_func(self.last_done_by)
+        return "Неизвестный пользователь"
+
+    def format_status(self, status: TaskStatus, user_name_func: Optional[Callable[[int], str]] = None) -> str:
+        """Форматировать строку статуса задачи по уже вычисленному status"""
+        emoji = status.emoji
+
+        if status.days_since_done is None:
             status_text = f"{emoji} {self.name} - никогда не выполнялось"
-        elif self.is_overdue():
-            overdue_days = (self.days_since_done() or 0) - self.interval_days
-            done_by = user_name_func(self.last_done_by) if self.last_done_by else "Неизвестно"
-            status_text = f"{emoji} {self.name} - просрочено на {overdue_days} дн. (последний раз: {done_by})"
+        elif status.is_overdue:
+            done_by = self.done_by_name(user_name_func)
+            status_text = f"{emoji} {self.name} - просрочено на {status.overdue_days} дн. (последний раз: {done_by})"
         else:
-            days_ago = self.days_since_done() or 0
-            days_left = self.interval_days - days_ago
-            done_by = user_name_func(self.last_done_by) if self.last_done_by else "Неизвестно"
-            status_text = f"{emoji} {self.name} - {days_ago} дн. назад (осталось {days_left} дн., выполнял: {done_by})"
-        
+            done_by = self.done_by_name(user_name_func)
+            status_text = (
+                f"{emoji} {self.name} - {status.days_since_done} дн. назад "
+                f"(осталось {status.days_until_due} дн., выполнял: {done_by})"
+            )
+
         return status_text
 
-@dataclass
+
+@dataclass(slots=True)
 class ShoppingItem:
     """Модель элемента списка покупок"""
     id: int
@@ -70,4 +147,17 @@ class ShoppingItem:
     
     def toggle_checked(self) -> None:
         """Переключить состояние отметки"""
-        self.is_checked = not self.is_checked
\ No newline at end of file
+        self.is_checked = not self.is_checked
+
+
+# Ключи keyset-пагинации: позиция элемента в порядке вывода списка
+ShoppingCursor = Tuple[int, str, int]   # (is_checked, created_at как хранится, id)
+TaskCursor = int                        # id задачи; ключ (name, id) берётся из БД
+
+
+@dataclass(slots=True)
+class Page(Generic[T]):
+    """Страница списка и курсоры соседних страниц (None — страницы нет)"""
+    items: List[T]
+    next_cursor: Optional[tuple] = None   # ключ последнего элемента: следующая — после него
+    prev_cursor: Optional[tuple] = None   # ключ первого элемента: предыдущая — перед ним
@@ -0,0 +1,59 @@
+"""
+Курсоры страниц списков в callback_data inline-кнопок.
+
+Telegram ограничивает callback_data 64 байтами, поэтому курсор кодируется
+компактно:
+
+* ``shp:<a|b>:<is_checked>:<id>:<created_at>`` — список покупок, ключ
+  (is_checked, created_at, id) целиком;
+* ``tsk:<a|b>:<id>`` — задачи: только id, ключ (name, id) БД читает сама
+  (название может быть длиннее лимита).
+
+``a`` — страница после курсора, ``b`` — перед ним.
+"""
+
+import logging
+from typing import Optional, Tuple
+
+from models import ShoppingCursor, TaskCursor
+
+logger = logging.getLogger(__name__)
+
+CALLBACK_DATA_LIMIT = 64
+SHOPPING_PAGE_PREFIX = "shp:"
+TASKS_PAGE_PREFIX = "tsk:"
+
+# (after, before) — аргументы get_*_page для страницы
+PageRequest = Tuple[Optional[object], Optional[object]]
+FIRST_PAGE: PageRequest = (None, None)
+
+
+def _page_request(direction: str, cursor) -> PageRequest:
+    return (cursor, None) if direction == "a" else (None, cursor)
+
+
+def shopping_page_data(direction: str, cursor: ShoppingCursor) -> Optional[str]:
+    """callback_data перехода на страницу списка покупок; None — курсор не помещается"""
+    is_checked, created_at, item_id = cursor
+    data = f"{SHOPPING_PAGE_PREFIX}{direction}:{is_checked}:{item_id}:{created_at}"
+    if len(data.encode()) > CALLBACK_DATA_LIMIT:
+        logger.warning(f"Shopping page cursor does not fit into callback_data: {data!r}")
+        return None
+    return data
+
+
+def parse_shopping_page(data: str) -> PageRequest:
+    """(after, before) из callback_data shopping_page_data"""
+    direction, is_checked, item_id, created_at = data[len(SHOPPING_PAGE_PREFIX):].split(":", 3)
+    return _page_request(direction, (int(is_checked), created_at, int(item_id)))
+
+
+def tasks_page_data(direction: str, cursor: TaskCursor) -> str:
+    """callback_data перехода на страницу задач"""
+    return f"{TASKS_PAGE_PREFIX}{direction}:{cursor}"
+
+
+def parse_tasks_page(data: str) -> PageRequest:
+    """(after, before) из callback_data tasks_page_data"""
+    direction, task_id = data[len(TASKS_PAGE_PREFIX):].split(":", 1)
+    return _page_request(direction, int(task_id))
@@ -0,0 +1,306 @@
+"""
+Профилирование запросов к SQLite.
+
+ConnectionPool открывает соединения класса InstrumentedConnection: каждый
+выполненный оператор записывается в QueryProfiler с именем метода Database,
+нормализованным текстом SQL (fingerprint), числом строк и длительностью —
+выполнение плюс выборка строк. Операторы дольше slow_query_ms попадают в
+лог вместе с EXPLAIN QUERY PLAN.
+
+Имя метода хранится в thread-local: его выставляют обёртки публичных
+методов Database (instrument_methods) и очередь записи для своих операций.
+По методам собираются перцентили длительности вызова — summary() отдаёт их
+в metrics и команде /dbstats.
+"""
+
+import functools
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_METHOD = "-"
+FINGERPRINT_LENGTH = 200
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "REPLACE")
+
+
+@functools.lru_cache(maxsize=1024)
+def fingerprint(sql: str) -> str:
+    """SQL без литералов и лишних пробелов: одинаковые запросы — одна строка статистики"""
+    text = _STRING_LITERAL.sub("?", sql)
+    text = _NUMBER_LITERAL.sub("?", text)
+    return _WHITESPACE.sub(" ", text).strip()[:FINGERPRINT_LENGTH]
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    """Перцентиль методом ближайшего ранга по отсортированной выборке"""
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class QueryProfiler:
+    """Статистика операторов и методов; потокобезопасен"""
+
+    def __init__(self, slow_query_ms: float = 50, sample_size: int = 1000):
+        self.slow_query_ms = slow_query_ms
+        self.sample_size = sample_size
+        self.slow_queries = 0
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # метод -> последние sample_size длительностей вызова, мс
+        self._samples: Dict[str, Deque[float]] = {}
+        self._calls: Dict[str, int] = {}
+        # (метод, fingerprint) -> {'count', 'rows', 'total_ms', 'max_ms'}
+        self._statements: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    # ---- имя текущего метода
+
+    def current_method(self) -> str:
+        return getattr(self._local, "method", None) or UNKNOWN_METHOD
+
+    @contextmanager
+    def attribute(self, name: str) -> Iterator[None]:
+        """Приписывать операторы методу name (вложенные вызовы — внешнему методу)"""
+        if getattr(self._local, "method", None) is not None:
+            yield
+            return
+        self._local.method = name
+        try:
+            yield
+        finally:
+            self._local.method = None
+
+    @contextmanager
+    def method(self, name: str) -> Iterator[None]:
+        """attribute() плюс замер длительности всего вызова"""
+        if getattr(self._local, "method", None) is not None:
+            yield
+            return
+        started = time.perf_counter()
+        with self.attribute(name):
+            try:
+                yield
+            finally:
+                self.record_call(name, (time.perf_counter() - started) * 1000)
+
+    # ---- запись
+
+    def record_call(self, name: str, duration_ms: float) -> None:
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.sample_size)
+            samples.append(duration_ms)
+            self._calls[name] = self._calls.get(name, 0) + 1
+
+    def record_statement(
+        self,
+        conn: sqlite3.Connection,
+        sql: str,
+        parameters: Any,
+        rows: int,
+        duration_ms: float,
+    ) -> None:
+        method = self.current_method()
+        key = (method, fingerprint(sql))
+        with self._lock:
+            entry = self._statements.get(key)
+            if entry is None:
+                entry = self._statements[key] = {'count': 0, 'rows': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+            entry['count'] += 1
+            entry['rows'] += rows
+            entry['total_ms'] += duration_ms
+            entry['max_ms'] = max(entry['max_ms'], duration_ms)
+
+        if duration_ms >= self.slow_query_ms:
+            with self._lock:
+                self.slow_queries += 1
+            logger.warning(
+                f"Slow query in {method}: {duration_ms:.1f} ms, {rows} rows: {key[1]}\n"
+                f"{self._explain(conn, sql, parameters)}"
+            )
+
+    def _explain(self, conn: sqlite3.Connection, sql: str, parameters: Any) -> str:
+        if parameters is None or not sql.lstrip().upper().startswith(_EXPLAINABLE):
+            return "  (no query plan)"
+        try:
+            plan = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, parameters).fetchall()
+        except sqlite3.Error as e:
+            return f"  (query plan unavailable: {e})"
+        return "\n".join(f"  {row[-1]}" for row in plan)
+
+    # ---- сводки
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Перцентили длительности вызовов по методам, мс (по последним sample_size вызовам)"""
+        with self._lock:
+            samples = {name: sorted(values) for name, values in self._samples.items()}
+            calls = dict(self._calls)
+
+        return {
+            name: {
+                'calls': calls[name],
+                'p50_ms': _percentile(ordered, 0.50),
+                'p95_ms': _percentile(ordered, 0.95),
+                'p99_ms': _percentile(ordered, 0.99),
+                'max_ms': ordered[-1],
+            }
+            for name, ordered in samples.items()
+        }
+
+    def top_statements(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Операторы с наибольшим суммарным временем"""
+        with self._lock:
+            items = [(key, dict(entry)) for key, entry in self._statements.items()]
+        items.sort(key=lambda item: item[1]['total_ms'], reverse=True)
+        return [
+            dict(entry, method=method, sql=sql)
+            for (method, sql), entry in items[:limit]
+        ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self._calls.clear()
+            self._statements.clear()
+            self.slow_queries = 0
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Курсор, отмечающий каждый оператор в профайлере соединения. Время
+    выборки строк (fetch*, итерация) добавляется к оператору; запись
+    закрывается, когда строки кончились, курсор выполнил новый оператор,
+    закрыт или удалён.
+    """
+
+    _pending: Optional[List[Any]] = None    # [sql, parameters, мс, строки]
+
+    def execute(self, sql: str, parameters: Any = ()) -> "InstrumentedCursor":
+        self._finish()
+        started = time.perf_counter()
+        super().execute(sql, parameters)
+        self._pending = [sql, parameters, (time.perf_counter() - started) * 1000, 0]
+        if self.description is None:
+            # Без результата (DML/DDL): строк для выборки нет
+            self._pending[3] = max(self.rowcount, 0)
+            self._finish()
+        return self
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> "InstrumentedCursor":
+        self._finish()
+        started = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        # План для executemany не строим: параметров много
+        self._pending = [sql, None, (time.perf_counter() - started) * 1000, max(self.rowcount, 0)]
+        self._finish()
+        return self
+
+    def _fetched(self, started: float, rows: int, exhausted: bool) -> None:
+        pending = self._pending
+        if pending is None:
+            return
+        pending[2] += (time.perf_counter() - started) * 1000
+        pending[3] += rows
+        if exhausted:
+            self._finish()
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size: int = None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(started, len(rows), not rows)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, len(rows), True)
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(started, 0, True)
+            raise
+        self._fetched(started, 1, False)
+        return row
+
+    def close(self) -> None:
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        self._finish()
+
+    def _finish(self) -> None:
+        pending, self._pending = self._pending, None
+        profiler = getattr(self.connection, "profiler", None)
+        if pending is None or profiler is None:
+            return
+        sql, parameters, duration_ms, rows = pending
+        try:
+            profiler.record_statement(self.connection, sql, parameters, rows, duration_ms)
+        except Exception as e:
+            logger.error(f"Error recording query stats: {e}")
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Соединение, все операторы которого идут через InstrumentedCursor"""
+
+    profiler: Optional[QueryProfiler] = None
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parameters: Any = ()) -> InstrumentedCursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> InstrumentedCursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def instrument_methods(skip: Tuple[str, ...] = ()) -> Callable[[type], type]:
+    """
+    Декоратор класса: публичные методы (кроме skip) выполняются под
+    profiler.method(имя), если у экземпляра задан self.profiler. Мутации
+    очереди записи (write_op) замеряет submit_write — от постановки в
+    очередь до COMMIT.
+    """
+    def decorator(cls: type) -> type:
+        for name, func in list(vars(cls).items()):
+            if name.startswith("_") or name in skip or not callable(func) or hasattr(func, "write_op"):
+                continue
+            setattr(cls, name, _profiled(name, func))
+        return cls
+    return decorator
+
+
+def _profiled(name: str, func: Callable) -> Callable:
+    @functools.wraps(func)
+    def method(self, *args, **kwargs):
+        profiler = self.profiler
+        if profiler is None:
+            return func(self, *args, **kwargs)
+        with profiler.method(name):
+            return func(self, *args, **kwargs)
+
+    return method
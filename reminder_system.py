@@ -2,14 +2,14 @@ import logging
 import asyncio
 from datetime import datetime, timedelta
 from telegram import Bot
-from database import Database
-from utils import format_reminder_message, get_weekday_name
+from async_database import AsyncDatabase
+from utils import format_reminder_message, get_weekday_name, split_message
 import config
 
 logger = logging.getLogger(__name__)
 
 class ReminderSystem:
-    def __init__(self, database: Database):
+    def __init__(self, database: AsyncDatabase):
         self.db = database
         self.bot = None
     
@@ -18,77 +18,92 @@ class ReminderSystem:
         if self.bot is None:
             self.bot = Bot(config.BOT_TOKEN)
     
+    async def _send_to_members(self, household_id: int, message: str) -> int:
+        """Отправить сообщение всем участникам домохозяйства, вернуть число доставленных"""
+        members = await self.db.get_household_members(household_id)
+        success_count = 0
+        for chat_id in members:
+            try:
+                for chunk in split_message(message):
+                    await self.bot.send_message(chat_id=chat_id, text=chunk)
+                success_count += 1
+                logger.info(f"✅ Message sent to chat {chat_id}")
+            except Exception as e:
+                logger.error(f"❌ Failed to send message to {chat_id}: {e}")
+
+        logger.info(f"📊 Household {household_id}: delivered {success_count}/{len(members)}")
+        return success_count
+
     async def send_daily_reminders(self):
-        """Отправка ежедневных напоминаний"""
+        """Отправка ежедневных напоминаний каждому домохозяйству"""
         try:
             await self.initialize_bot()
             logger.info("🕒 Starting daily reminders check...")
             
-            overdue_tasks = self.db.get_overdue_tasks()
-            due_soon_tasks = self.db.get_tasks_due_soon(days_threshold=1)
-            
-            if not overdue_tasks and not due_soon_tasks:
-                logger.info("✅ No reminders to send today - all tasks are up to date!")
-                return
-            
-            message = format_reminder_message(overdue_tasks, due_soon_tasks)
-            
-            logger.info(f"📤 Sending reminders: {len(overdue_tasks)} overdue, {len(due_soon_tasks)} due soon")
-            
-            success_count = 0
-            for chat_id in config.ADMIN_IDS:
+            for household_id in await self.db.get_household_ids():
                 try:
-                    await self.bot.send_message(chat_id=chat_id, text=message)
-                    success_count += 1
-                    logger.info(f"✅ Reminder sent to chat {chat_id}")
+                    await self.send_household_reminders(household_id)
                 except Exception as e:
-                    logger.error(f"❌ Failed to send reminder to {chat_id}: {e}")
-            
-            logger.info(f"📊 Reminders delivered: {success_count}/{len(config.ADMIN_IDS)}")
+                    logger.error(f"💥 Error in daily reminders for household {household_id}: {e}")
         
         except Exception as e:
             logger.error(f"💥 Critical error in daily reminders: {e}")
+
+    async def send_household_reminders(self, household_id: int):
+        """Напоминания одного домохозяйства"""
+        overdue_tasks = await self.db.get_overdue_tasks(household_id)
+        due_soon_tasks = await self.db.get_tasks_due_soon(household_id, days_threshold=1)
+        
+        if not overdue_tasks and not due_soon_tasks:
+            logger.info(f"✅ Household {household_id}: all tasks are up to date!")
+            return
+        
+        message = format_reminder_message(overdue_tasks, due_soon_tasks, self.db.now())
+        
+        logger.info(
+            f"📤 Household {household_id}: {len(overdue_tasks)} overdue, {len(due_soon_tasks)} due soon"
+        )
+        await self._send_to_members(household_id, message)
     
     async def send_weekly_summary(self):
-        """Отправка еженедельной статистики"""
+        """Отправка еженедельной статистики каждому домохозяйству"""
         try:
             await self.initialize_bot()
             logger.info("📈 Starting weekly summary...")
             
-            stats = self.db.get_user_statistics(days=7)
-            
-            message_lines = ["📊 Недельная статистика:\n"]
-            
-            if stats['user_stats']:
-                message_lines.append("👥 Выполнено задач за неделю:")
-                for user_name, user_data in stats['user_stats'].items():
-                    percentage = (user_data['task_count'] / stats['total_tasks'] * 100) if stats['total_tasks'] > 0 else 0
-                    message_lines.append(f"   {user_name}: {user_data['task_count']} задач ({percentage:.1f}%)")
-                message_lines.append("")
-            else:
-                message_lines.append("😴 На этой неделе задачи не выполнялись")
-                message_lines.append("")
-            
-            if stats['popular_tasks']:
-                message_lines.append("🏆 Самые частые задачи:")
-                for task_name, count in stats['popular_tasks']:
-                    message_lines.append(f"   {task_name}: {count} раз")
-                message_lines.append("")
-            
-            message = "\n".join(message_lines)
-            
-            success_count = 0
-            for chat_id in config.ADMIN_IDS:
+            for household_id in await self.db.get_household_ids():
                 try:
-                    await self.bot.send_message(chat_id=chat_id, text=message)
-                    success_count += 1
+                    await self.send_household_summary(household_id)
                 except Exception as e:
-                    logger.error(f"❌ Failed to send weekly summary to {chat_id}: {e}")
-            
-            logger.info(f"📊 Weekly summaries delivered: {success_count}/{len(config.ADMIN_IDS)}")
+                    logger.error(f"💥 Error in weekly summary for household {household_id}: {e}")
         
         except Exception as e:
             logger.error(f"💥 Error in weekly summary: {e}")
+
+    async def send_household_summary(self, household_id: int):
+        """Недельная статистика одного домохозяйства"""
+        stats = await self.db.get_user_statistics(household_id, days=7)
+        
+        message_lines = ["📊 Недельная статистика:\n"]
+        
+        if stats['user_stats']:
+            message_lines.append("👥 Выполнено задач за неделю:")
+            for user_data in stats['user_stats'].values():
+                percentage = (user_data['task_count'] / stats['total_tasks'] * 100) if stats['total_tasks'] > 0 else 0
+                message_lines.append(f"   {user_data['name']}: {user_data['task_count']} задач ({percentage:.1f}%)")
+            message_lines.append("")
+        else:
+            message_lines.append("😴 На этой неделе задачи не выполнялись")
+            message_lines.append("")
+        
+        if stats['popular_tasks']:
+            message_lines.append("🏆 Самые частые задачи:")
+            for task_name, count in stats['popular_tasks']:
+                message_lines.append(f"   {task_name}: {count} раз")
+            message_lines.append("")
+        
+        message = "\n".join(message_lines)
+        await self._send_to_members(household_id, message)
     
     async def send_achievement_message(self, chat_id: int, achievement: str):
         """Отправка сообщения о достижении"""
@@ -0,0 +1,107 @@
+"""
+Интерфейс хранилища данных бота.
+
+Storage перечисляет операции, которыми пользуются обработчики, система
+напоминаний и фоновое обслуживание. Реализации:
+
+* database.Database — SQLite (основная);
+* memory_storage.MemoryStorage — в памяти процесса, для тестов, бенчмарков
+  и прогонов логики бота без файла БД.
+
+AsyncDatabase принимает любую реализацию. Соответствие реализаций друг
+другу проверяют тесты tests/test_storage.py.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Protocol, runtime_checkable
+
+from models import Page, ShoppingCursor, Task, TaskCursor, ShoppingItem
+
+
+@runtime_checkable
+class Storage(Protocol):
+    """Операции хранилища; все данные, кроме пользователей, принадлежат домохозяйству"""
+
+    @property
+    def concurrency(self) -> int:
+        """Сколько вызовов имеет смысл выполнять параллельно (размер пула потоков)"""
+        ...
+
+    def now(self) -> datetime: ...
+
+    def close(self) -> None: ...
+
+    # ---- задачи
+    def get_all_tasks(self, household_id: int) -> List[Task]: ...
+
+    def get_tasks_page(
+        self, household_id: int, after: Optional[TaskCursor] = None,
+        before: Optional[TaskCursor] = None, limit: int = 20,
+        due_within_days: Optional[int] = None
+    ) -> Page[Task]: ...
+
+    def get_task_by_id(self, household_id: int, task_id: int) -> Optional[Task]: ...
+
+    def find_task_by_name(self, household_id: int, task_name: str) -> Optional[Task]: ...
+
+    def search_tasks(self, household_id: int, query: str, limit: int = 5) -> List[Task]: ...
+
+    def add_new_task(self, household_id: int, name: str, interval_days: int) -> bool: ...
+
+    def update_task_interval(self, household_id: int, task_id: int, new_interval: int) -> bool: ...
+
+    def rename_task(self, household_id: int, task_id: int, new_name: str) -> bool: ...
+
+    def delete_task(self, household_id: int, task_id: int) -> bool: ...
+
+    def mark_task_done(
+        self, household_id: int, task_id: int, user_chat_id: int, username: str, first_name: str
+    ) -> None: ...
+
+    def get_overdue_tasks(self, household_id: int) -> List[Task]: ...
+
+    def count_overdue_tasks(self, household_id: int) -> int: ...
+
+    def get_tasks_due_soon(self, household_id: int, days_threshold: int = 2) -> List[Task]: ...
+
+    # ---- пользователи и статистика
+    def get_user_name(self, chat_id: int) -> str: ...
+
+    def get_history_stats(self, household_id: int) -> Dict[str, int]: ...
+
+    def get_user_statistics(self, household_id: int, days: int = 7, top_tasks: int = 5) -> Dict[str, Any]: ...
+
+    def cleanup_old_history(self, days_to_keep: int = 90, chunk_size: int = 500, time_budget: float = 0.2) -> int: ...
+
+    # ---- список покупок
+    def get_shopping_items(self, household_id: int, show_checked: bool = True) -> List[ShoppingItem]: ...
+
+    def get_shopping_page(
+        self, household_id: int, show_checked: bool = True, after: Optional[ShoppingCursor] = None,
+        before: Optional[ShoppingCursor] = None, limit: int = 20
+    ) -> Page[ShoppingItem]: ...
+
+    def search_shopping_items(self, household_id: int, query: str, limit: int = 10) -> List[ShoppingItem]: ...
+
+    def add_shopping_item(self, household_id: int, item_text: str) -> bool: ...
+
+    def toggle_shopping_item(self, household_id: int, item_id: int) -> Optional[ShoppingItem]: ...
+
+    def delete_checked_items(self, household_id: int) -> int: ...
+
+    def delete_all_shopping_items(self, household_id: int) -> int: ...
+
+    def get_shopping_item_count(self, household_id: int) -> Dict[str, int]: ...
+
+    # ---- домохозяйства
+    def create_household(self, name: str, owner_chat_id: int) -> Optional[Dict[str, Any]]: ...
+
+    def add_household_member(self, household_id: int, chat_id: int, role: str = "member") -> bool: ...
+
+    def join_household(self, invite_code: str, chat_id: int) -> Optional[Dict[str, Any]]: ...
+
+    def get_user_household(self, chat_id: int) -> Optional[Dict[str, Any]]: ...
+
+    def get_household_members(self, household_id: int) -> List[int]: ...
+
+    def get_household_ids(self) -> List[int]: ...
@@ -0,0 +1,73 @@
+"""
+Кэш разобранных списков задач по домохозяйствам.
+
+Задачи меняются редко, а читаются на каждом экране меню. Database отдаёт
+список из кэша и сбрасывает запись домохозяйства после COMMIT любой
+мутации его задач (ConnectionPool.after_commit).
+
+Изменения, сделанные в файле БД другим процессом (например, импорт через
+transfer.py), кэш не отслеживает: их ограничивает TTL записи.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+from models import Task
+
+
+class TaskCache:
+    """Списки задач домохозяйств с TTL и счётчиками попаданий и промахов"""
+
+    def __init__(self, ttl: float = 60):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        # household_id -> (список задач, момент устаревания по time.monotonic)
+        self._tasks: Dict[int, Tuple[List[Task], float]] = {}
+        # Номер поколения растёт при каждом сбросе: список, прочитанный до
+        # сброса, не попадёт в кэш после него
+        self._generations: Dict[int, int] = {}
+        self._epoch = 0     # то же для clear()
+
+    def get(self, household_id: int, loader: Callable[[], List[Task]]) -> List[Task]:
+        """Список задач домохозяйства; при промахе читается через loader()"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._tasks.get(household_id)
+            if entry is not None and entry[1] > now:
+                self.hits += 1
+                return list(entry[0])
+            self.misses += 1
+            generation = (self._epoch, self._generations.get(household_id, 0))
+
+        # Чтение из БД — без блокировки, параллельно с другими домохозяйствами
+        tasks = loader()
+
+        with self._lock:
+            if (self._epoch, self._generations.get(household_id, 0)) == generation:
+                self._tasks[household_id] = (tasks, now + self.ttl)
+        return list(tasks)
+
+    def invalidate(self, household_id: int) -> None:
+        """Сбросить список домохозяйства (вызывается после COMMIT)"""
+        with self._lock:
+            self._generations[household_id] = self._generations.get(household_id, 0) + 1
+            self._tasks.pop(household_id, None)
+
+    def clear(self) -> None:
+        """Сбросить списки всех домохозяйств"""
+        with self._lock:
+            self._epoch += 1
+            self._tasks.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Счётчики для диагностики"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'households': len(self._tasks),
+            }
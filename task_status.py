@@ -0,0 +1,184 @@
+"""
+Статусы задач всего домохозяйства за один проход.
+
+Задачи раскладываются в параллельные колонки (id, интервал, момент
+последнего выполнения в микросекундах Unix), и просрочка, остаток дней и
+срочность считаются сразу для всех задач: векторно через NumPy, если он
+установлен и задач достаточно много, иначе одним циклом по массивам модуля
+array. Результат
+совпадает с Task.status(now) для каждой задачи.
+"""
+
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import List, Sequence, Tuple
+
+from models import Task, TaskStatus
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+BACKEND = "numpy" if np is not None else "array"
+
+# На маленьких списках накладные расходы NumPy больше выигрыша
+NUMPY_MIN_TASKS = 64
+
+# Задача ни разу не выполнялась (значение колонки done_us)
+NEVER_DONE = -(2 ** 63)
+
+# Срочность для клавиатуры и сводок: чем меньше, тем срочнее
+URGENCY_NEW = 0        # ни разу не выполнялась
+URGENCY_OVERDUE = 1    # просрочена
+URGENCY_DUE = 2        # остался день или меньше
+URGENCY_SOON = 3       # осталось два дня
+URGENCY_OK = 4
+
+# URGENCY_SOON и срочнее: до срока не больше стольких дней (фильтр "Только срочные")
+URGENT_WITHIN_DAYS = 2
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+_DAY_US = 86_400_000_000
+
+
+def _epoch_us(moment: datetime, tz) -> int:
+    """Момент в микросекундах Unix; naive-время считается временем tz"""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=tz)
+    return (moment - _EPOCH) // _MICROSECOND
+
+
+class TaskColumns:
+    """Колонки задач: ids, intervals и done_us (NEVER_DONE — не выполнялась)"""
+
+    __slots__ = ("ids", "intervals", "done_us")
+
+    def __init__(self, ids: array, intervals: array, done_us: array):
+        self.ids = ids
+        self.intervals = intervals
+        self.done_us = done_us
+
+    @classmethod
+    def from_tasks(cls, tasks: Sequence[Task], tz=None) -> "TaskColumns":
+        """Разложить задачи в колонки; tz — пояс для naive last_done"""
+        return cls(
+            array("q", [task.id for task in tasks]),
+            array("q", [task.interval_days for task in tasks]),
+            array("q", [
+                NEVER_DONE if task.last_done is None else _epoch_us(task.last_done, tz)
+                for task in tasks
+            ]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def evaluate(self, now: datetime) -> "StatusColumns":
+        """Статусы всех задач на момент now"""
+        now_us = _epoch_us(now, now.tzinfo)
+        if np is not None and len(self.ids) >= NUMPY_MIN_TASKS:
+            return self._evaluate_numpy(now_us)
+        return self._evaluate_array(now_us)
+
+    def _evaluate_numpy(self, now_us: int) -> "StatusColumns":
+        intervals = np.frombuffer(self.intervals, dtype=np.int64)
+        done_us = np.frombuffer(self.done_us, dtype=np.int64)
+        never = done_us == NEVER_DONE
+        # Для невыполнявшихся подставляем now_us, чтобы не переполнить int64
+        days = (now_us - np.where(never, now_us, done_us)) // _DAY_US
+        overdue = never | (days >= intervals)
+        days_left = np.where(never, intervals, np.maximum(0, intervals - days))
+        urgency = np.select(
+            [never, overdue, days_left <= 1, days_left <= 2],
+            [URGENCY_NEW, URGENCY_OVERDUE, URGENCY_DUE, URGENCY_SOON],
+            URGENCY_OK,
+        ).astype(np.int8)
+        return StatusColumns(never, days, overdue, days_left, intervals, urgency, vectorized=True)
+
+    def _evaluate_array(self, now_us: int) -> "StatusColumns":
+        size = len(self.ids)
+        never = array("b", bytes(size))
+        days = array("q", bytes(8 * size))
+        overdue = array("b", bytes(size))
+        days_left = array("q", bytes(8 * size))
+        urgency = array("b", bytes(size))
+        for i, (interval, done) in enumerate(zip(self.intervals, self.done_us)):
+            if done == NEVER_DONE:
+                never[i] = overdue[i] = 1
+                days_left[i] = interval
+                urgency[i] = URGENCY_NEW
+                continue
+            elapsed = (now_us - done) // _DAY_US
+            days[i] = elapsed
+            if elapsed >= interval:
+                overdue[i] = 1
+                urgency[i] = URGENCY_OVERDUE
+            else:
+                left = interval - elapsed
+                days_left[i] = left
+                urgency[i] = URGENCY_DUE if left <= 1 else URGENCY_SOON if left <= 2 else URGENCY_OK
+        return StatusColumns(never, days, overdue, days_left, self.intervals, urgency)
+
+
+class StatusColumns:
+    """
+    Статусы задач в колонках (тот же порядок, что у TaskColumns).
+    statuses[i] — TaskStatus i-й задачи: создаётся только для тех задач,
+    которые действительно выводятся.
+    """
+
+    __slots__ = ("never", "days", "overdue", "days_left", "intervals", "urgency", "vectorized")
+
+    def __init__(self, never, days, overdue, days_left, intervals, urgency, vectorized: bool = False):
+        # vectorized — колонки это массивы NumPy, иначе array
+        self.vectorized = vectorized
+        self.never = never
+        self.days = days
+        self.overdue = overdue
+        self.days_left = days_left
+        self.intervals = intervals
+        self.urgency = urgency
+
+    def __len__(self) -> int:
+        return len(self.urgency)
+
+    def __getitem__(self, i: int) -> TaskStatus:
+        if self.never[i]:
+            return TaskStatus(
+                days_since_done=None,
+                is_overdue=True,
+                days_until_due=int(self.intervals[i]),
+                overdue_days=0,
+            )
+        days = int(self.days[i])
+        return TaskStatus(
+            days_since_done=days,
+            is_overdue=bool(self.overdue[i]),
+            days_until_due=int(self.days_left[i]),
+            overdue_days=days - int(self.intervals[i]),
+        )
+
+    def overdue_count(self) -> int:
+        """Сколько задач просрочено (включая ни разу не выполнявшиеся)"""
+        if self.vectorized:
+            return int(np.count_nonzero(self.overdue))
+        return sum(self.overdue)
+
+    def urgent_indices(self, threshold: int = URGENCY_SOON) -> List[int]:
+        """Номера задач со срочностью не ниже threshold (URGENCY_*)"""
+        if self.vectorized:
+            return np.flatnonzero(self.urgency <= threshold).tolist()
+        return [i for i, level in enumerate(self.urgency) if level <= threshold]
+
+
+def evaluate_statuses(tasks: Sequence[Task], now: datetime) -> StatusColumns:
+    """Статусы задач домохозяйства на один момент now — одним проходом"""
+    return TaskColumns.from_tasks(tasks, now.tzinfo).evaluate(now)
+
+
+def evaluate_tasks(tasks: Sequence[Task], now: datetime) -> List[Tuple[Task, TaskStatus]]:
+    """Пары (задача, состояние) для одного прохода рендера"""
+    statuses = evaluate_statuses(tasks, now)
+    return [(task, statuses[i]) for i, task in enumerate(tasks)]
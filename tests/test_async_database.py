@@ -0,0 +1,73 @@
+"""
+Event loop остаётся отзывчивым, пока запись ждёт блокировку БД.
+
+Стороннее соединение держит BEGIN IMMEDIATE, поэтому запись через
+AsyncDatabase ждёт busy_timeout в потоке пула. Корутина-"пульс" тем временем
+каждые TICK секунд замеряет задержку loop: она должна оставаться намного
+меньше времени удержания блокировки.
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+
+from async_database import AsyncDatabase
+from database import Database
+from migrations import DEFAULT_HOUSEHOLD_ID
+
+LOCK_SECONDS = 0.5
+TICK = 0.01
+# Допустимая задержка loop: на порядок меньше удержания блокировки
+MAX_LAG = LOCK_SECONDS / 10
+
+
+def _hold_write_lock(db_path: str, started: threading.Event) -> None:
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute("BEGIN IMMEDIATE")
+    started.set()
+    time.sleep(LOCK_SECONDS)
+    conn.execute("ROLLBACK")
+    conn.close()
+
+
+async def _heartbeat(stop: asyncio.Event, lags: list) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def _write_under_lock(db_path: str, adb: AsyncDatabase):
+    started = threading.Event()
+    locker = threading.Thread(target=_hold_write_lock, args=(db_path, started))
+    locker.start()
+    started.wait()
+
+    stop = asyncio.Event()
+    lags: list = []
+    beat = asyncio.create_task(_heartbeat(stop, lags))
+    await asyncio.sleep(TICK * 2)
+
+    start = time.perf_counter()
+    added = await adb.add_shopping_item(DEFAULT_HOUSEHOLD_ID, "Хлеб")
+    write_time = time.perf_counter() - start
+
+    stop.set()
+    await beat
+    locker.join()
+    await adb.close()
+    return added, write_time, max(lags)
+
+
+def test_loop_stays_responsive_while_write_is_blocked(tmp_path):
+    db_path = str(tmp_path / "async.db")
+    adb = AsyncDatabase(Database(db_path))
+
+    added, write_time, max_lag = asyncio.run(_write_under_lock(db_path, adb))
+
+    assert added
+    # Запись действительно ждала блокировку...
+    assert write_time >= LOCK_SECONDS / 2
+    # ...а event loop всё это время продолжал работать
+    assert max_lag < MAX_LAG
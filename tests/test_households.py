@@ -0,0 +1,36 @@
+"""Кто и как часто может создавать домохозяйства (/newhome)."""
+
+from handlers.households import HouseholdCreationPolicy
+
+ADMIN = 1
+ALLOWED = 2
+STRANGER = 3
+
+
+def test_closed_by_default():
+    policy = HouseholdCreationPolicy.from_config(None, [ADMIN])
+    assert policy.refusal(ADMIN) is None
+    assert policy.refusal(STRANGER) is not None
+
+
+def test_allowlist_and_cooldown():
+    policy = HouseholdCreationPolicy.from_config({"allowed_ids": [ALLOWED], "cooldown_minutes": 60}, [ADMIN])
+    assert policy.refusal(ALLOWED) is None
+    assert policy.refusal(STRANGER) is not None
+
+    policy.record(ALLOWED)
+    assert "60 мин" in policy.refusal(ALLOWED)
+    # Администраторов бота лимит не касается
+    policy.record(ADMIN)
+    assert policy.refusal(ADMIN) is None
+
+
+def test_open_to_all_is_rate_limited():
+    policy = HouseholdCreationPolicy.from_config({"open": True, "cooldown_minutes": 0}, [ADMIN])
+    assert policy.refusal(STRANGER) is None
+    policy.record(STRANGER)
+    assert policy.refusal(STRANGER) is None
+
+    policy = HouseholdCreationPolicy.from_config({"open": True}, [ADMIN])
+    policy.record(STRANGER)
+    assert policy.refusal(STRANGER) is not None
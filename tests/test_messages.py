@@ -0,0 +1,62 @@
+"""Разбиение и обрезка текстов под лимит длины сообщения Telegram."""
+
+import re
+
+from utils import TRUNCATED_MARK, split_message, truncate_message
+
+TAG = re.compile(r"</?(\w+)[^>]*>")
+
+
+def balanced(chunk: str) -> bool:
+    """Все теги части закрыты, ни один тег или сущность не разрезаны"""
+    stack = []
+    for match in TAG.finditer(chunk):
+        if match.group(0).startswith("</"):
+            if not stack or stack.pop() != match.group(1):
+                return False
+        else:
+            stack.append(match.group(1))
+    stripped = TAG.sub("", chunk)
+    return not stack and "<" not in stripped and ">" not in stripped \
+        and not re.search(r"&#?\w*$", stripped)
+
+
+def test_short_text_is_kept():
+    assert split_message("Молоко\nХлеб", 100) == ["Молоко\nХлеб"]
+    assert truncate_message("Молоко\nХлеб", 100) == "Молоко\nХлеб"
+
+
+def test_split_on_line_boundaries():
+    lines = [f"⬜️ Пункт {i}" for i in range(50)]
+    chunks = split_message("\n".join(lines), 100)
+    assert all(len(chunk.encode('utf-16-le')) // 2 <= 100 for chunk in chunks)
+    assert "\n".join(chunks).split("\n") == lines
+
+
+def test_long_html_line_is_cut_between_tags():
+    line = " ".join(f"<s>Пункт&amp;{i}</s>" for i in range(200))
+    chunks = split_message(line, 100, parse_mode='HTML')
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 100 and balanced(chunk) for chunk in chunks)
+    assert "".join(chunks) == line
+
+
+def test_oversized_html_element_loses_markup():
+    line = "<b>" + "ж" * 250 + "</b>"
+    chunks = split_message(line, 100, parse_mode='HTML')
+    assert all(len(chunk) <= 100 and balanced(chunk) for chunk in chunks)
+    assert "".join(chunks) == "ж" * 250
+
+
+def test_surrogate_pairs_count_double():
+    chunks = split_message("🛒" * 120, 100)
+    assert all(len(chunk.encode('utf-16-le')) // 2 <= 100 for chunk in chunks)
+    assert "".join(chunks) == "🛒" * 120
+
+
+def test_truncate_keeps_one_message():
+    text = "\n".join(f"<s>Пункт {i}</s>" for i in range(100))
+    truncated = truncate_message(text, 200, parse_mode='HTML')
+    assert truncated.endswith(TRUNCATED_MARK)
+    assert len(truncated) <= 200
+    assert balanced(truncated[:-len(TRUNCATED_MARK)])
@@ -0,0 +1,271 @@
+"""
+Общие тесты соответствия Storage: одинаковые сценарии прогоняются на
+Database (временный файл SQLite) и на MemoryStorage.
+"""
+
+import functools
+
+import pytest
+
+from database import Database
+from memory_storage import MemoryStorage
+from migrations import DEFAULT_HOUSEHOLD_ID, DEFAULT_TASKS
+from storage import Storage
+from task_status import URGENT_WITHIN_DAYS
+
+HOME = DEFAULT_HOUSEHOLD_ID
+OWNER = 1001
+GUEST = 2002
+DEFAULT_NAMES = sorted(name for name, _ in DEFAULT_TASKS)
+
+
+@pytest.fixture(params=["database", "memory"])
+def storage(request, tmp_path):
+    if request.param == "database":
+        backend = Database(str(tmp_path / "storage.db"))
+    else:
+        backend = MemoryStorage()
+    yield backend
+    backend.close()
+
+
+def add_flowers(storage: Storage):
+    """Новая задача "Полить цветы" с интервалом 3 дня"""
+    assert storage.add_new_task(HOME, "Полить цветы", 3)
+    return storage.find_task_by_name(HOME, "цветы")
+
+
+def walk_pages(fetch, limit: int):
+    """id всех страниц вперёд и затем назад от последней — в порядке вывода"""
+    pages = [fetch(after=None, limit=limit)]
+    while pages[-1].next_cursor is not None:
+        pages.append(fetch(after=pages[-1].next_cursor, limit=limit))
+    forward = [item.id for page in pages for item in page.items]
+
+    page = pages[-1]
+    backward = [item.id for item in page.items]
+    while page.prev_cursor is not None:
+        page = fetch(before=page.prev_cursor, limit=limit)
+        backward = [item.id for item in page.items] + backward
+    return forward, backward
+
+
+# ================== ЗАДАЧИ ==================
+
+def test_implements_protocol(storage):
+    assert isinstance(storage, Storage)
+
+
+def test_default_tasks_sorted_by_name(storage):
+    assert [task.name for task in storage.get_all_tasks(HOME)] == DEFAULT_NAMES
+
+
+def test_add_task_rejects_normalized_duplicates(storage):
+    task = add_flowers(storage)
+    assert not storage.add_new_task(HOME, "Полить цветы", 5)
+    assert not storage.add_new_task(HOME, "  ПОЛИТЬ   цветы ", 5)
+    assert task is not None and task.name == "Полить цветы" and task.interval_days == 3
+    assert storage.get_task_by_id(HOME, task.id).name == "Полить цветы"
+
+
+def test_mark_task_done_updates_due_state(storage):
+    task = add_flowers(storage)
+    assert any(overdue.id == task.id for overdue in storage.get_overdue_tasks(HOME))
+
+    storage.mark_task_done(HOME, task.id, OWNER, "owner", "Анна")
+    done = storage.get_task_by_id(HOME, task.id)
+    assert done.last_done is not None and done.last_done_by == OWNER
+    assert done.last_done_by_name == "Анна"
+    assert storage.get_user_name(OWNER) == "Анна"
+    assert storage.get_user_name(999999) == "Неизвестный пользователь"
+    assert all(overdue.id != task.id for overdue in storage.get_overdue_tasks(HOME))
+    assert all(soon.id != task.id for soon in storage.get_tasks_due_soon(HOME, days_threshold=2))
+    assert any(soon.id == task.id for soon in storage.get_tasks_due_soon(HOME, days_threshold=3))
+    assert storage.count_overdue_tasks(HOME) == len(storage.get_overdue_tasks(HOME))
+
+
+def test_update_interval_and_rename(storage):
+    task = add_flowers(storage)
+    assert storage.update_task_interval(HOME, task.id, 10)
+    assert storage.get_task_by_id(HOME, task.id).interval_days == 10
+    assert storage.rename_task(HOME, task.id, "Полить все цветы")
+    assert not storage.rename_task(HOME, task.id, DEFAULT_TASKS[0][0])
+    assert not storage.rename_task(HOME, task.id, DEFAULT_TASKS[0][0].upper())
+    # Своё же название в другом регистре — не конфликт
+    assert storage.rename_task(HOME, task.id, "ПОЛИТЬ ВСЕ ЦВЕТЫ")
+    assert storage.rename_task(HOME, task.id, "Полить все цветы")
+    assert storage.get_task_by_id(HOME, task.id).name == "Полить все цветы"
+
+
+def test_update_and_rename_reject_missing_or_foreign_task(storage):
+    task = add_flowers(storage)
+    other = storage.create_household("Дача", GUEST)['id']
+
+    assert not storage.update_task_interval(HOME, 999999, 10)
+    assert not storage.rename_task(HOME, 999999, "Новое название")
+    assert not storage.update_task_interval(other, task.id, 10)
+    assert not storage.rename_task(other, task.id, "Чужое название")
+
+    unchanged = storage.get_task_by_id(HOME, task.id)
+    assert unchanged.name == "Полить цветы" and unchanged.interval_days == 3
+
+
+def test_delete_task(storage):
+    task = add_flowers(storage)
+    storage.mark_task_done(HOME, task.id, OWNER, "owner", "Анна")
+    assert storage.delete_task(HOME, task.id)
+    assert storage.get_task_by_id(HOME, task.id) is None
+    assert storage.get_user_statistics(HOME)['total_tasks'] == 0
+
+
+# ================== СТАТИСТИКА ==================
+
+def test_history_and_user_statistics(storage):
+    task = add_flowers(storage)
+    storage.mark_task_done(HOME, task.id, OWNER, "owner", "Анна")
+
+    stats = storage.get_history_stats(HOME)
+    assert stats == {'total': 1, 'last_365_days': 1, 'last_30_days': 1, 'last_7_days': 1}
+    user_stats = storage.get_user_statistics(HOME, days=7)
+    assert user_stats['total_tasks'] == 1
+    assert user_stats['user_stats'] == {OWNER: {'name': "Анна", 'task_count': 1}}
+    assert user_stats['popular_tasks'] == [("Полить цветы", 1)]
+    assert storage.cleanup_old_history(days_to_keep=90) == 0
+
+
+def test_user_statistics_keeps_namesakes_apart(storage):
+    task = add_flowers(storage)
+    storage.mark_task_done(HOME, task.id, OWNER, "owner", "Анна")
+    storage.mark_task_done(HOME, task.id, GUEST, "guest", "Анна")
+    storage.mark_task_done(HOME, task.id, GUEST, "guest", "Анна")
+
+    user_stats = storage.get_user_statistics(HOME, days=7)
+    assert user_stats['total_tasks'] == 3
+    assert user_stats['user_stats'] == {
+        GUEST: {'name': "Анна", 'task_count': 2},
+        OWNER: {'name': "Анна", 'task_count': 1},
+    }
+    assert list(user_stats['user_stats']) == [GUEST, OWNER]
+
+
+# ================== СПИСОК ПОКУПОК ==================
+
+def test_shopping_duplicates_by_normalized_text(storage):
+    assert storage.add_shopping_item(HOME, "Молоко")
+    assert not storage.add_shopping_item(HOME, "  молоко ")
+    assert storage.add_shopping_item(HOME, "Хлеб")
+    assert storage.get_shopping_item_count(HOME) == {'total': 2, 'unchecked': 2, 'checked': 0}
+
+
+def test_shopping_toggle_and_filter(storage):
+    storage.add_shopping_item(HOME, "Молоко")
+    storage.add_shopping_item(HOME, "Хлеб")
+    milk = next(item for item in storage.get_shopping_items(HOME) if item.item_text == "Молоко")
+
+    toggled = storage.toggle_shopping_item(HOME, milk.id)
+    assert toggled.id == milk.id and toggled.is_checked
+    assert [item.is_checked for item in storage.get_shopping_items(HOME)] == [False, True]
+    assert [item.item_text for item in storage.get_shopping_items(HOME, show_checked=False)] == ["Хлеб"]
+
+
+def test_unchecking_merges_readded_item(storage):
+    storage.add_shopping_item(HOME, "Молоко")
+    storage.add_shopping_item(HOME, "Хлеб")
+    milk = next(item for item in storage.get_shopping_items(HOME) if item.item_text == "Молоко")
+    storage.toggle_shopping_item(HOME, milk.id)
+
+    # Отмеченный пункт добавили заново — снятие отметки склеивает их
+    assert storage.add_shopping_item(HOME, "молоко")
+    twin = storage.toggle_shopping_item(HOME, milk.id)
+    assert twin.id != milk.id and not twin.is_checked and twin.item_text == "молоко"
+    assert storage.get_shopping_item_count(HOME) == {'total': 2, 'unchecked': 2, 'checked': 0}
+
+
+def test_shopping_search_and_clear(storage):
+    storage.add_shopping_item(HOME, "Молоко")
+    storage.add_shopping_item(HOME, "Хлеб")
+
+    found = storage.search_shopping_items(HOME, "хле")
+    assert [item.item_text for item in found] == ["Хлеб"]
+    storage.toggle_shopping_item(HOME, found[0].id)
+    assert storage.delete_checked_items(HOME) == 1
+    assert storage.delete_all_shopping_items(HOME) == 1
+    assert storage.get_shopping_item_count(HOME) == {'total': 0, 'unchecked': 0, 'checked': 0}
+
+
+# ================== ПОСТРАНИЧНЫЙ ВЫВОД ==================
+
+@pytest.mark.parametrize("show_checked", [True, False])
+@pytest.mark.parametrize("limit", [3, 10])
+def test_shopping_pages_cover_list(storage, show_checked, limit):
+    for i in range(7):
+        assert storage.add_shopping_item(HOME, f"Товар {i}")
+    for item in storage.get_shopping_items(HOME)[1:6:2]:
+        storage.toggle_shopping_item(HOME, item.id)
+
+    expected = [item.id for item in storage.get_shopping_items(HOME, show_checked)]
+    fetch = functools.partial(storage.get_shopping_page, HOME, show_checked)
+    assert walk_pages(fetch, limit) == (expected, expected)
+
+
+def test_task_pages_cover_list(storage):
+    expected = [task.id for task in storage.get_all_tasks(HOME)]
+    assert walk_pages(functools.partial(storage.get_tasks_page, HOME), 2) == (expected, expected)
+
+
+def test_urgent_task_pages_cover_only_urgent_tasks(storage):
+    # Выполненные сегодня задачи с интервалом > 2 дней — не срочные
+    for i, interval in enumerate([1, 10, 2, 30, 3]):
+        assert storage.add_new_task(HOME, f"Задача {i}", interval)
+    for task in storage.get_all_tasks(HOME)[::2]:
+        storage.mark_task_done(HOME, task.id, OWNER, "owner", "Анна")
+
+    now = storage.now()
+    expected = [
+        task.id for task in storage.get_all_tasks(HOME)
+        if task.status(now).is_overdue or task.status(now).days_until_due <= URGENT_WITHIN_DAYS
+    ]
+    assert 0 < len(expected) < len(storage.get_all_tasks(HOME))
+    fetch = functools.partial(storage.get_tasks_page, HOME, due_within_days=URGENT_WITHIN_DAYS)
+    assert walk_pages(fetch, 2) == (expected, expected)
+
+
+def test_stale_task_cursor_returns_first_page(storage):
+    expected = [task.id for task in storage.get_all_tasks(HOME)]
+    assert [task.id for task in storage.get_tasks_page(HOME, after=999999, limit=2).items] == expected[:2]
+
+
+# ================== ДОМОХОЗЯЙСТВА ==================
+
+def test_household_membership(storage):
+    assert storage.add_household_member(HOME, OWNER, role="admin")
+    assert not storage.add_household_member(HOME, OWNER)
+    assert storage.get_user_household(OWNER)['role'] == "admin"
+
+    created = storage.create_household("Дача", GUEST)
+    other = created['id']
+    assert other != HOME
+    assert storage.get_user_household(GUEST)['id'] == other
+    assert storage.get_household_ids() == sorted([HOME, other])
+    assert [task.name for task in storage.get_all_tasks(other)] == DEFAULT_NAMES
+
+    joined = storage.join_household(f" {created['invite_code']} ", 3003)
+    assert joined == {'id': other, 'name': "Дача", 'role': "member"}
+    assert storage.get_household_members(other) == [GUEST, 3003]
+    assert storage.join_household("нет-такого", 3004) is None
+
+
+def test_household_isolation(storage):
+    task = add_flowers(storage)
+    storage.mark_task_done(HOME, task.id, OWNER, "owner", "Анна")
+    other = storage.create_household("Дача", GUEST)['id']
+
+    assert storage.get_task_by_id(other, task.id) is None
+    assert not storage.delete_task(other, task.id)
+    storage.mark_task_done(other, task.id, GUEST, "guest", "Борис")
+    assert storage.get_task_by_id(HOME, task.id).last_done_by == OWNER
+
+    assert storage.add_shopping_item(other, "Молоко")
+    assert storage.get_shopping_items(HOME) == []
+    other_item = storage.get_shopping_items(other)[0]
+    assert storage.toggle_shopping_item(HOME, other_item.id) is None
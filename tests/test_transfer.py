@@ -0,0 +1,156 @@
+"""
+Экспорт и импорт домохозяйства (transfer.py): состояние задач, история и
+список покупок переносятся в новое домохозяйство без потерь и дублей.
+"""
+
+import time
+
+import pytest
+
+from database import Database
+from migrations import DEFAULT_HOUSEHOLD_ID, DEFAULT_TASKS
+from transfer import export_household, import_household
+
+HOME = DEFAULT_HOUSEHOLD_ID
+OWNER = 1001
+GUEST = 2002
+MOVER = 3003
+# Стандартная задача с изменённым интервалом, стандартная без выполнений
+# и своя задача — просроченная
+CHANGED, UNTOUCHED = DEFAULT_TASKS[0][0], DEFAULT_TASKS[1][0]
+CUSTOM = "Полить цветы"
+
+
+@pytest.fixture
+def source(tmp_path):
+    db = Database(str(tmp_path / "source.db"))
+    assert db.add_new_task(HOME, CUSTOM, 3)
+    changed = db.find_task_by_name(HOME, CHANGED)
+    custom = db.find_task_by_name(HOME, CUSTOM)
+    db.mark_task_done(HOME, changed.id, OWNER, "owner", "Анна")
+    db.mark_task_done(HOME, custom.id, GUEST, "guest", "Борис")
+    assert db.update_task_interval(HOME, changed.id, 30)
+
+    # Выполнения в прошлом: CHANGED ещё не просрочена, CUSTOM — просрочена
+    with db.pool.writer() as conn:
+        conn.execute('DELETE FROM task_history')
+        for task_id, done_by, done_at in [
+            (changed.id, OWNER, "2024-01-01 09:00:00"),
+            (changed.id, GUEST, "2024-02-01T09:00:00"),
+            (custom.id, GUEST, "2024-01-15 18:30:00"),
+        ]:
+            conn.execute(
+                'INSERT INTO task_history (household_id, task_id, done_by, done_at) VALUES (?, ?, ?, ?)',
+                (HOME, task_id, done_by, done_at)
+            )
+        conn.execute('''
+            UPDATE tasks SET last_done = datetime('now', 'localtime', '-10 days'), last_done_by = ?,
+                             next_due_at = next_due_epoch(datetime('now', 'localtime', '-10 days'), interval_days)
+            WHERE id IN (?, ?)
+        ''', (GUEST, changed.id, custom.id))
+    db.task_cache.clear()
+
+    assert db.add_shopping_item(HOME, "Молоко")
+    assert db.add_shopping_item(HOME, "Хлеб")
+    assert db.add_shopping_item(HOME, "Сыр")
+    for item in db.get_shopping_items(HOME)[:2]:
+        db.toggle_shopping_item(HOME, item.id)
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def target(tmp_path):
+    db = Database(str(tmp_path / "target.db"))
+    yield db
+    db.close()
+
+
+def snapshot(db: Database, household_id: int):
+    """Состояние домохозяйства без id, зависящих от базы"""
+    tasks = {
+        task.name: (task.interval_days, task.last_done, task.last_done_by)
+        for task in db.get_all_tasks(household_id)
+    }
+    overdue = sorted(task.name for task in db.get_overdue_tasks(household_id))
+    with db.pool.reader() as conn:
+        history = sorted(conn.execute('''
+            SELECT t.name, h.done_by, h.done_at
+            FROM task_history h JOIN tasks t ON t.id = h.task_id
+            WHERE h.household_id = ?
+        ''', (household_id,)).fetchall())
+    shopping = sorted(
+        (item.item_text, item.is_checked, item.created_at)
+        for item in db.get_shopping_items(household_id)
+    )
+    return tasks, overdue, history, shopping
+
+
+def task_names(db: Database, household_id: int):
+    return {task.name for task in db.get_all_tasks(household_id)}
+
+
+def test_round_trip_keeps_task_state_and_history(source, target):
+    household = target.create_household("Переезд", MOVER)['id']
+    counts = import_household(target, household, export_household(source, HOME))
+
+    assert counts['tasks'] == len(source.get_all_tasks(HOME))
+    assert snapshot(target, household) == snapshot(source, HOME)
+    tasks, overdue, history, _ = snapshot(target, household)
+    assert tasks[CHANGED][0] == 30 and tasks[CHANGED][2] == GUEST
+    assert tasks[UNTOUCHED][1] is None
+    assert CUSTOM in overdue and CHANGED not in overdue
+    assert [name for name, _, _ in history].count(CHANGED) == 2
+    assert target.get_user_name(GUEST) == "Борис"
+
+
+def test_import_keeps_later_local_completion(source, target):
+    household = target.create_household("Переезд", MOVER)['id']
+    assert target.add_new_task(household, CUSTOM.upper(), 7)
+    local = target.find_task_by_name(household, CUSTOM)
+    target.mark_task_done(household, local.id, MOVER, "mover", "Вера")
+
+    import_household(target, household, export_household(source, HOME))
+
+    merged = target.get_task_by_id(household, local.id)
+    assert merged.interval_days == 3
+    assert merged.last_done_by == MOVER
+    assert CUSTOM.upper() not in {task.name for task in target.get_overdue_tasks(household)}
+
+
+def test_second_import_does_not_duplicate_shopping_items(source, target):
+    household = target.create_household("Переезд", MOVER)['id']
+    records = list(export_household(source, HOME))
+    import_household(target, household, records)
+    before = target.get_shopping_item_count(household)
+
+    import_household(target, household, records)
+    assert target.get_shopping_item_count(household) == before == {'total': 3, 'unchecked': 1, 'checked': 2}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2])
+def test_small_chunks_give_same_result(source, target, chunk_size):
+    records = list(export_household(source, HOME))
+    whole = target.create_household("Целиком", MOVER)['id']
+    chunked = target.create_household("Порциями", MOVER + 1)['id']
+
+    import_household(target, whole, records)
+    import_household(target, chunked, records, chunk_size=chunk_size)
+    assert snapshot(target, chunked) == snapshot(target, whole) == snapshot(source, HOME)
+
+
+def test_running_bot_sees_import_after_task_cache_ttl(source, tmp_path):
+    ttl = 0.2
+    bot = Database(str(tmp_path / "target.db"), task_cache_ttl=ttl)
+    household = bot.create_household("Переезд", MOVER)['id']
+    assert CUSTOM not in task_names(bot, household)
+
+    cli = Database(str(tmp_path / "target.db"))
+    import_household(cli, household, export_household(source, HOME))
+    cli.close()
+
+    # Импорт шёл в другом процессе: до истечения TTL бот отдаёт старый список
+    assert CUSTOM not in task_names(bot, household)
+    time.sleep(ttl)
+    assert CUSTOM in task_names(bot, household)
+    bot.close()
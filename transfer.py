@@ -0,0 +1,286 @@
+"""
+Экспорт и импорт данных домохозяйства в формате JSON Lines.
+
+Каждая строка файла — одна запись: {"table": "...", <столбцы>}. Порядок
+таблиц: users, tasks, task_history, shopping_items — история ссылается на
+задачи, поэтому при импорте задачи уже на месте.
+
+Экспорт — генератор: строки читаются курсором по одной внутри одной
+транзакции чтения (согласованный снимок), память не растёт с размером
+истории. Импорт группирует записи порциями по chunk_size и вставляет каждую
+порцию одним executemany в отдельной транзакции, не задерживая бота на
+всё время загрузки.
+
+Импорт дополняет данные, а не заменяет их:
+* пользователи, которые уже есть в базе, не перезаписываются;
+* задача с тем же названием (без учёта регистра) не дублируется: она
+  получает интервал из файла и более позднее из двух выполнений (с его
+  исполнителем), история привязывается к ней;
+* неотмеченный пункт покупок, который уже есть в списке, пропускается, как
+  и отмеченный с тем же временем создания — повторный импорт не удваивает
+  список;
+* история добавляется как есть: повторный импорт того же файла её удвоит.
+
+Запущенный бот держит списки задач в TaskCache: импортированные задачи и
+их сроки он покажет не позже чем через DB_CONFIG["task_cache_ttl"] секунд
+(перезапуск не нужен).
+
+Запуск:
+    python transfer.py export 1 household-1.jsonl
+    python transfer.py import household-1.jsonl --household 2
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import sys
+from typing import Any, Dict, Iterable, Iterator, List
+
+from database import Database
+from models import normalize_text
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Выполнение из файла позже уже записанного (форматы даты с "T" и с пробелом
+# сравниваются через julianday)
+_IMPORTED_DONE_IS_NEWER = (
+    "tasks.last_done IS NULL OR julianday(excluded.last_done) > julianday(tasks.last_done)"
+)
+
+# Столбцы выгрузки; id задач нужен, чтобы связать с ними историю при импорте
+EXPORT_QUERIES = {
+    "users": '''
+        SELECT chat_id, username, first_name, joined_at
+        FROM users
+        WHERE chat_id IN (
+            SELECT chat_id FROM household_members WHERE household_id = :household_id
+            UNION SELECT last_done_by FROM tasks WHERE household_id = :household_id
+            UNION SELECT done_by FROM task_history WHERE household_id = :household_id
+        )
+        ORDER BY chat_id
+    ''',
+    "tasks": '''
+        SELECT id, name, interval_days, last_done, last_done_by, created_at
+        FROM tasks
+        WHERE household_id = :household_id
+        ORDER BY id
+    ''',
+    "task_history": '''
+        SELECT task_id, done_by, done_at
+        FROM task_history
+        WHERE household_id = :household_id
+        ORDER BY done_at
+    ''',
+    "shopping_items": '''
+        SELECT item_text, is_checked, created_at
+        FROM shopping_items
+        WHERE household_id = :household_id
+        ORDER BY created_at
+    ''',
+}
+
+
+def export_household(db: Database, household_id: int) -> Iterator[Dict[str, Any]]:
+    """Записи домохозяйства по одной, в порядке EXPORT_QUERIES"""
+    with db.pool.reader() as conn:
+        conn.execute("BEGIN")
+        try:
+            for table, query in EXPORT_QUERIES.items():
+                cursor = conn.execute(query, {"household_id": household_id})
+                columns = [column[0] for column in cursor.description]
+                for row in cursor:
+                    record = {"table": table}
+                    record.update(zip(columns, row))
+                    yield record
+        finally:
+            conn.execute("COMMIT")
+
+
+def write_jsonl(records: Iterable[Dict[str, Any]], stream) -> int:
+    """Записать записи в поток построчно; возвращает их число"""
+    count = 0
+    for record in records:
+        stream.write(json.dumps(record, ensure_ascii=False))
+        stream.write("\n")
+        count += 1
+    return count
+
+
+def read_jsonl(stream) -> Iterator[Dict[str, Any]]:
+    """Записи из потока JSON Lines (пустые строки пропускаются)"""
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def _chunks(records: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    records = iter(records)
+    while True:
+        chunk = list(itertools.islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def import_household(
+    db: Database,
+    household_id: int,
+    records: Iterable[Dict[str, Any]],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Dict[str, int]:
+    """
+    Загрузить записи export_household в домохозяйство household_id.
+    Возвращает число обработанных записей по таблицам.
+    """
+    with db.pool.reader() as conn:
+        if conn.execute('SELECT 1 FROM households WHERE id = ?', (household_id,)).fetchone() is None:
+            raise ValueError(f"Household {household_id} does not exist")
+
+    counts = {table: 0 for table in EXPORT_QUERIES}
+    # id задачи в файле -> id задачи в этой базе
+    task_ids: Dict[int, int] = {}
+
+    for table, group in itertools.groupby(records, key=lambda record: record["table"]):
+        if table not in EXPORT_QUERIES:
+            raise ValueError(f"Unknown table in import: {table!r}")
+
+        for chunk in _chunks(group, chunk_size):
+            with db.pool.writer() as conn:
+                if table == "users":
+                    _import_users(db, conn, chunk)
+                elif table == "tasks":
+                    _import_tasks(conn, household_id, chunk, task_ids)
+                elif table == "task_history":
+                    _import_history(conn, household_id, chunk, task_ids)
+                else:
+                    _import_shopping_items(conn, household_id, chunk)
+            counts[table] += len(chunk)
+
+    db.task_cache.invalidate(household_id)
+    return counts
+
+
+def _import_users(db: Database, conn, chunk: List[Dict[str, Any]]) -> None:
+    conn.executemany('''
+        INSERT OR IGNORE INTO users (chat_id, username, first_name, joined_at)
+        VALUES (:chat_id, :username, :first_name, COALESCE(:joined_at, CURRENT_TIMESTAMP))
+    ''', chunk)
+    for record in chunk:
+        db.pool.after_commit(lambda chat_id=record["chat_id"]: db.user_directory.invalidate(chat_id))
+
+
+def _import_tasks(conn, household_id: int, chunk: List[Dict[str, Any]], task_ids: Dict[int, int]) -> None:
+    # Задача с таким же названием уже есть (у каждого домохозяйства есть
+    # DEFAULT_TASKS) — переносим на неё состояние из файла: интервал и более
+    # позднее из двух выполнений вместе с исполнителем
+    conn.executemany('''
+        INSERT INTO tasks (household_id, name, name_key, interval_days, last_done, last_done_by, created_at, next_due_at)
+        VALUES (:household_id, :name, :name_key, :interval_days, :last_done, :last_done_by,
+                COALESCE(:created_at, CURRENT_TIMESTAMP), next_due_epoch(:last_done, :interval_days))
+        ON CONFLICT(household_id, name_key) DO UPDATE SET
+            interval_days = excluded.interval_days,
+            last_done = CASE WHEN {newer} THEN excluded.last_done ELSE tasks.last_done END,
+            last_done_by = CASE WHEN {newer} THEN excluded.last_done_by ELSE tasks.last_done_by END,
+            next_due_at = next_due_epoch(
+                CASE WHEN {newer} THEN excluded.last_done ELSE tasks.last_done END,
+                excluded.interval_days
+            )
+    '''.format(newer=_IMPORTED_DONE_IS_NEWER), [
+        dict(record, household_id=household_id, name_key=normalize_text(record["name"])) for record in chunk
+    ])
+
+    for record in chunk:
+        task_ids[record["id"]] = conn.execute(
+            'SELECT id FROM tasks WHERE household_id = ? AND name_key = ?',
+            (household_id, normalize_text(record["name"]))
+        ).fetchone()[0]
+
+
+def _import_history(conn, household_id: int, chunk: List[Dict[str, Any]], task_ids: Dict[int, int]) -> None:
+    rows = [
+        (household_id, task_ids[record["task_id"]], record["done_by"], record["done_at"])
+        for record in chunk
+        if record["task_id"] in task_ids
+    ]
+    if len(rows) < len(chunk):
+        logger.warning(f"Skipped {len(chunk) - len(rows)} history rows of tasks missing from import")
+    conn.executemany('''
+        INSERT INTO task_history (household_id, task_id, done_by, done_at)
+        VALUES (?, ?, ?, ?)
+    ''', rows)
+
+
+def _import_shopping_items(conn, household_id: int, chunk: List[Dict[str, Any]]) -> None:
+    # Неотмеченные дубли отсекает уникальный индекс, отмеченные — тот же пункт
+    # с тем же временем создания (повторный импорт файла)
+    conn.executemany('''
+        INSERT INTO shopping_items (household_id, item_text, item_key, is_checked, created_at)
+        SELECT :household_id, :item_text, :item_key, :is_checked, COALESCE(:created_at, CURRENT_TIMESTAMP)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM shopping_items
+            WHERE household_id = :household_id AND is_checked = :is_checked
+              AND created_at = :created_at AND item_key = :item_key
+        )
+        ON CONFLICT DO NOTHING
+    ''', [
+        {
+            "household_id": household_id,
+            "item_text": record["item_text"],
+            "item_key": normalize_text(record["item_text"]),
+            "is_checked": int(bool(record["is_checked"])),
+            "created_at": record["created_at"],
+        }
+        for record in chunk
+    ])
+
+
+def main() -> None:
+    try:
+        import config_dev as config
+    except ImportError:
+        import config
+
+    parser = argparse.ArgumentParser(description="Экспорт и импорт данных домохозяйства (JSON Lines)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="выгрузить домохозяйство в файл")
+    export_parser.add_argument("household", type=int, help="id домохозяйства")
+    export_parser.add_argument("path", help="файл .jsonl или - для stdout")
+
+    import_parser = commands.add_parser(
+        "import", help="загрузить файл в домохозяйство",
+        description="Загрузить файл в домохозяйство. Запущенный бот увидит импортированные "
+                    "задачи не позже чем через DB_CONFIG['task_cache_ttl'] секунд.",
+    )
+    import_parser.add_argument("path", help="файл .jsonl или - для stdin")
+    import_parser.add_argument("--household", type=int, required=True, help="id домохозяйства-получателя")
+    import_parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    db = Database.from_config(config.DB_CONFIG, timezone=config.TIMEZONE)
+    try:
+        if args.command == "export":
+            if args.path == "-":
+                count = write_jsonl(export_household(db, args.household), sys.stdout)
+            else:
+                with open(args.path, "w", encoding="utf-8") as stream:
+                    count = write_jsonl(export_household(db, args.household), stream)
+            logger.info(f"Exported {count} records of household {args.household}")
+        else:
+            if args.path == "-":
+                counts = import_household(db, args.household, read_jsonl(sys.stdin), args.chunk_size)
+            else:
+                with open(args.path, encoding="utf-8") as stream:
+                    counts = import_household(db, args.household, read_jsonl(stream), args.chunk_size)
+            logger.info(f"Imported into household {args.household}: {counts}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
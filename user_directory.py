@@ -0,0 +1,72 @@
+"""
+Кэш имён пользователей (chat_id -> first_name) с ограниченным временем жизни.
+
+Список задач получает имена исполнителей JOIN'ом; кэш нужен остальным
+местам, которым требуется имя по одному chat_id. Запись пользователя
+сбрасывается после COMMIT её изменения, TTL ограничивает устаревание
+на случай правок в обход Database.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+
+class UserDirectory:
+    """Имена пользователей с TTL и счётчиками попаданий и промахов"""
+
+    def __init__(
+        self,
+        loader: Callable[[int], Optional[str]],
+        ttl: float = 300,
+        max_size: int = 10000,
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+        self._loader = loader
+        self._lock = threading.Lock()
+        # chat_id -> (имя или None, момент устаревания по time.monotonic)
+        self._names: Dict[int, Tuple[Optional[str], float]] = {}
+
+    def get(self, chat_id: int) -> Optional[str]:
+        """Имя пользователя (None — пользователь неизвестен)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._names.get(chat_id)
+            if entry is not None and entry[1] > now:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        name = self._loader(chat_id)
+
+        with self._lock:
+            if len(self._names) >= self.max_size:
+                self._evict(now)
+            self._names[chat_id] = (name, now + self.ttl)
+        return name
+
+    def invalidate(self, chat_id: int) -> None:
+        """Сбросить запись пользователя (вызывается после COMMIT)"""
+        with self._lock:
+            self._names.pop(chat_id, None)
+
+    def _evict(self, now: float) -> None:
+        """Убрать устаревшие записи, а если их нет — самую старую"""
+        expired = [chat_id for chat_id, (_, expires) in self._names.items() if expires <= now]
+        for chat_id in expired:
+            del self._names[chat_id]
+        if not expired:
+            del self._names[next(iter(self._names))]
+
+    def stats(self) -> Dict[str, int]:
+        """Счётчики для диагностики"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._names),
+            }
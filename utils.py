@@ -1,5 +1,6 @@
 # utils.py
 import logging
+import re
 from datetime import datetime
 from typing import List, Optional, Union, Any
 
@@ -7,27 +8,31 @@ from telegram import Update, CallbackQuery
 from telegram.error import BadRequest
 from telegram.ext import ContextTypes
 
+from message_cache import MessageKey, markup_fingerprint, message_states, text_fingerprint
+from metrics import metrics
 from models import Task
+from task_status import evaluate_tasks
 
 logger = logging.getLogger(__name__)
 
 
-def format_reminder_message(overdue_tasks: List[Task], due_soon_tasks: List[Task]) -> str:
-    """Форматирование сообщения для напоминаний"""
+def format_reminder_message(overdue_tasks: List[Task], due_soon_tasks: List[Task], now: datetime) -> str:
+    """Форматирование сообщения для напоминаний (статусы считаются на момент now)"""
     message_lines = ["🔔 Ежедневное напоминание о задачах:\n"]
 
     if overdue_tasks:
         message_lines.append("📛 ПРОСРОЧЕННЫЕ ЗАДАЧИ:")
-        for task in overdue_tasks:
-            overdue_days = (task.days_since_done() or 0) - task.interval_days
-            message_lines.append(f"🔴 {task.name} - просрочено на {overdue_days} дней")
+        for task, status in evaluate_tasks(overdue_tasks, now):
+            if status.days_since_done is None:
+                message_lines.append(f"🔴 {task.name} - ещё ни разу не выполнялась")
+            else:
+                message_lines.append(f"🔴 {task.name} - просрочено на {status.overdue_days} дней")
         message_lines.append("")
 
     if due_soon_tasks:
         message_lines.append("⏰ СКОРО НУЖНО ВЫПОЛНИТЬ:")
-        for task in due_soon_tasks:
-            days_left = task.days_until_due()
-            message_lines.append(f"🟡 {task.name} - осталось {days_left} дней")
+        for task, status in evaluate_tasks(due_soon_tasks, now):
+            message_lines.append(f"🟡 {task.name} - осталось {status.days_until_due} дней")
         message_lines.append("")
 
     message_lines.append("Используйте /done [задача] чтобы отметить выполнение")
@@ -59,6 +64,150 @@ def safe_datetime_parse(date_string: Optional[str]) -> Optional[datetime]:
         return None
 
 
+# Лимит длины текста сообщения в Telegram (в UTF-16 символах)
+TELEGRAM_TEXT_LIMIT = 4096
+
+
+# Тег или HTML-сущность в тексте с parse_mode='HTML'
+_HTML_TOKEN = re.compile(r"<(/?)[^>]*>|&#?\w+;")
+_HTML_TAG = re.compile(r"</?[^>]*>")
+
+# Пометка обрезанного текста (truncate_message)
+TRUNCATED_MARK = "\n…"
+
+
+def _telegram_length(text: str) -> int:
+    return len(text.encode('utf-16-le')) // 2
+
+
+def _cut_position(line: str, limit: int, html: bool) -> int:
+    """
+    Длина (в символах) наибольшего префикса line, который укладывается в limit
+    UTF-16 символов. Для HTML префикс кончается вне тегов и сущностей и без
+    незакрытых тегов. 0 — подходящего места нет.
+    """
+    size = best = depth = pos = 0
+    for match in list(_HTML_TOKEN.finditer(line) if html else ()) + [None]:
+        end = match.start() if match else len(line)
+        for i in range(pos, end):
+            size += 2 if ord(line[i]) > 0xFFFF else 1
+            if size > limit:
+                return best
+            if depth == 0:
+                best = i + 1
+        if match is None:
+            return best
+        size += _telegram_length(match.group(0))
+        if size > limit:
+            return best
+        if match.group(0).startswith("<"):
+            depth += -1 if match.group(1) else 1
+        if depth == 0:
+            best = match.end()
+        pos = match.end()
+
+
+def split_message(text: str, limit: int = TELEGRAM_TEXT_LIMIT, parse_mode: Optional[str] = None) -> List[str]:
+    """
+    Разбить текст на части не длиннее limit по границам строк, чтобы HTML-
+    разметка строк не разрывалась. Строка длиннее limit режется на куски;
+    при parse_mode='HTML' — только между тегами и сущностями, а если один
+    элемент разметки сам длиннее limit, теги этой строки отбрасываются.
+    """
+    if _telegram_length(text) <= limit:
+        return [text]
+
+    html = parse_mode == 'HTML'
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for line in text.split("\n"):
+        while _telegram_length(line) > limit:
+            if current:
+                chunks.append("\n".join(current))
+                current, size = [], 0
+            cut = _cut_position(line, limit, html)
+            if cut == 0:
+                line = _HTML_TAG.sub("", line)
+                cut = _cut_position(line, limit, html)
+            chunks.append(line[:cut])
+            line = line[cut:]
+        length = _telegram_length(line)
+        if current and size + 1 + length > limit:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+        size += length + (1 if current else 0)
+        current.append(line)
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def truncate_message(text: str, limit: int = TELEGRAM_TEXT_LIMIT, parse_mode: Optional[str] = None) -> str:
+    """
+    Текст, который помещается в одно сообщение: всё, что не влезло в limit,
+    отбрасывается по правилам split_message и помечается TRUNCATED_MARK.
+    """
+    if _telegram_length(text) <= limit:
+        return text
+    logger.warning(f"Message text of {_telegram_length(text)} characters truncated to {limit}")
+    return split_message(text, limit - _telegram_length(TRUNCATED_MARK), parse_mode)[0] + TRUNCATED_MARK
+
+
+def _message_key(message) -> Optional[MessageKey]:
+    if message is None or not hasattr(message, 'message_id'):
+        return None
+    return (message.chat_id, message.message_id)
+
+
+async def edit_message(
+    query: CallbackQuery,
+    text: str,
+    reply_markup: Any = None,
+    parse_mode: Optional[str] = None
+) -> None:
+    """
+    Отредактировать сообщение под inline-кнопкой, отправив только то, что
+    изменилось: без запроса, если текст и клавиатура совпадают с последними
+    отправленными, через edit_message_reply_markup — если изменилась только
+    клавиатура. Ошибки Telegram, кроме "Message is not modified", пробрасываются,
+    как у query.edit_message_text.
+    """
+    key = _message_key(query.message)
+    state = (text_fingerprint(text, parse_mode), markup_fingerprint(reply_markup))
+    previous = message_states.get(key) if key else None
+
+    if previous == state:
+        metrics.increment("telegram.edits_skipped")
+        return
+
+    try:
+        if previous is not None and previous[0] == state[0]:
+            await query.edit_message_reply_markup(reply_markup=reply_markup)
+            metrics.increment("telegram.edits_markup_only")
+        else:
+            # Текст без клавиатуры отправить нельзя: editMessageText без
+            # reply_markup убирает кнопки, поэтому разметка идёт вместе с текстом
+            await query.edit_message_text(text, reply_markup=reply_markup, parse_mode=parse_mode)
+            metrics.increment("telegram.edits_full")
+    except BadRequest as e:
+        if "Message is not modified" not in str(e):
+            if key:
+                message_states.forget(key)
+            raise
+        metrics.increment("telegram.edits_not_modified")
+
+    if key:
+        message_states.remember(key, state)
+
+
+def _remember_sent(message, text: str, parse_mode: Optional[str], reply_markup: Any) -> None:
+    """Запомнить содержимое только что отправленного сообщения для edit_message"""
+    key = _message_key(message)
+    if key:
+        message_states.remember(key, (text_fingerprint(text, parse_mode), markup_fingerprint(reply_markup)))
+
+
 async def send_message(
     update: Union[Update, CallbackQuery],
     text: str,
@@ -67,22 +216,27 @@ async def send_message(
 ) -> None:
     """
     Универсальный метод отправки сообщений.
-    Работает как с Update, так и с CallbackQuery.
+    Работает как с Update, так и с CallbackQuery. Экран всегда остаётся
+    одним сообщением, которое правится на месте: списки ограничены
+    страницами, а текст длиннее лимита Telegram обрезается (truncate_message).
     """
     try:
-        # Если это CallbackQuery - редактируем сообщение
+        text = truncate_message(text, parse_mode=parse_mode)
+
+        # Если это CallbackQuery - редактируем сообщение (только изменившееся)
         if isinstance(update, CallbackQuery):
-            await update.edit_message_text(text, reply_markup=reply_markup, parse_mode=parse_mode)
+            await edit_message(update, text, reply_markup, parse_mode)
             return
 
         # Если это Update, проверяем наличие callback_query внутри
         if hasattr(update, 'callback_query') and update.callback_query:
-            await update.callback_query.edit_message_text(text, reply_markup=reply_markup, parse_mode=parse_mode)
+            await edit_message(update.callback_query, text, reply_markup, parse_mode)
             return
 
-        # Если это Update с сообщением - отвечаем
+        # Если это Update с сообщением - отвечаем и запоминаем отправленное
         if hasattr(update, 'message') and update.message:
-            await update.message.reply_text(text, reply_markup=reply_markup, parse_mode=parse_mode)
+            sent = await update.message.reply_text(text, reply_markup=reply_markup, parse_mode=parse_mode)
+            _remember_sent(sent, text, parse_mode, reply_markup)
             return
 
         # Если это что-то другое с методом edit_message_text (редкий случай)
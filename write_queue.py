@@ -0,0 +1,122 @@
+"""
+Очередь записи с групповым коммитом (group commit).
+
+Мутации от разных обработчиков складываются в очередь; фоновый поток
+забирает их пачкой и выполняет в одной транзакции на соединении-писателе.
+Каждая операция получает свой Future и SAVEPOINT, поэтому ошибка одной
+операции не откатывает остальные, а вызывающий узнаёт результат только
+после COMMIT.
+
+Окно долговечности ограничено flush_interval: запись попадает в COMMIT
+не позже чем через flush_interval после постановки в очередь (плюс время
+самой транзакции). Что именно гарантирует COMMIT на диске, определяет
+PRAGMA synchronous из профиля пула.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Tuple
+
+from db_pool import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class WriteQueue:
+    """Фоновый писатель, объединяющий мутации в общие транзакции"""
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        flush_interval: float = 0.002,
+        max_batch: int = 128,
+    ):
+        self.pool = pool
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+
+        # Счётчики для бенчмарков и диагностики
+        self.batches = 0
+        self.operations = 0
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="db-write-queue", daemon=True)
+        self._thread.start()
+
+    def submit(self, op: Callable[..., Any], *args, **kwargs) -> Future:
+        """Поставить операцию op(conn, *args, **kwargs) в очередь"""
+        if self._closed:
+            raise RuntimeError("WriteQueue is closed")
+        future: Future = Future()
+        self._queue.put((op, args, kwargs, future))
+        return future
+
+    def close(self) -> None:
+        """Дописать всё, что уже в очереди, и остановить поток"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                try:
+                    timeout = deadline - time.monotonic()
+                    item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._commit(batch)
+
+    def _commit(self, batch: List[Tuple]) -> None:
+        """
+        Выполнить пачку в одной транзакции и разрешить Future после COMMIT
+        (и после действий pool.after_commit успешных операций)
+        """
+        outcomes = []
+        try:
+            with self.pool.writer() as conn:
+                for op, args, kwargs, future in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with self.pool.savepoint(conn, "queued_write"):
+                            result = op(conn, *args, **kwargs)
+                    except Exception as e:
+                        outcomes.append((future, e, True))
+                    else:
+                        outcomes.append((future, result, False))
+        except Exception as e:
+            # Не удалось зафиксировать транзакцию — ошибка у всей пачки
+            logger.error(f"Group commit of {len(batch)} writes failed: {e}")
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.operations += len(outcomes)
+        for future, value, failed in outcomes:
+            if failed:
+                future.set_exception(value)
+            else:
+                future.set_result(value)